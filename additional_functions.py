@@ -4,20 +4,403 @@ CSC111 Project 1: Text Adventure Game - Additional Functions
 This module provides supplementary functions for the text adventure game,
 which can be accessed by the main game file (adventure.py).
 
+All of the game's input and output goes through display, prompt, pause and typewriter_effect,
+which forward to the GameIO that is currently in use. By default this is the console, but a
+simulation can swap in its own GameIO (see use_io) to run the game without a terminal.
+
+How output is shown is up to the GameIO's renderer: "typewriter" types text out and honours the game's
+pauses, "instant" shows everything immediately, and "null" discards it. The console uses the mode named by
+the ADVENTURE_OUTPUT environment variable, or "typewriter" if it is not set or names no mode (with a warning).
+
+A renderer without colour strips the ANSI colour codes out of everything it is given, for players whose output
+isn't a terminal. The console only uses colour when standard output is a terminal.
 """
+from __future__ import annotations
+
+import os
+import re
 import time
 import sys
+import warnings
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from messages import Message
+
+# Matches the ANSI escape codes that colour and style the game's text
+ANSI_CODE = re.compile(r"\033\[[0-9;]*m")
+
+
+class ScriptExhausted(Exception):
+    """Raised when the game asks a ScriptedInput for a line after its script has run out."""
+
+
+def strip_colours(text: str) -> str:
+    """Return the given text without any ANSI colour or style codes.
+
+    >>> strip_colours("\\033[35mWhat now?\\033[0m")
+    'What now?'
+    """
+    return ANSI_CODE.sub("", text)
+
+
+def _console_write(text: str) -> None:
+    """Write the given text to standard output."""
+    sys.stdout.write(text)
+
+
+def _console_flush() -> None:
+    """Flush standard output."""
+    sys.stdout.flush()
+
+
+class OutputRenderer(ABC):
+    """An abstract renderer that shows the game's output to the player.
+
+    Instance Attributes:
+        - write: a function that writes the given text to the player.
+        - flush: a function that makes sure everything written so far is shown to the player.
+        - silent: whether this renderer discards everything, so there is no need to format output for it.
+        - colour: whether the player sees colours, or the ANSI colour codes are stripped from the output.
+    """
+    write: Callable[[str], object]
+    flush: Callable[[], object]
+    silent: bool = False
+    colour: bool
+
+    def __init__(self, write: Callable[[str], object] = _console_write,
+                 flush: Callable[[], object] = _console_flush, colour: bool = True) -> None:
+        """Initialize a new renderer that writes and flushes its output with the given functions."""
+        self.write = write
+        self.flush = flush
+        self.colour = colour
+
+    @abstractmethod
+    def show(self, text: str) -> None:
+        """Show the given text to the player all at once."""
+
+    def show_message(self, message: Message) -> None:
+        """Show the given pre-rendered message to the player all at once, with or without its colours."""
+        self.show(message.text if self.colour else message.plain)
+
+    @abstractmethod
+    def type_out(self, text: str, speed: float) -> None:
+        """Show the given text followed by a newline, typed out at the given number of seconds per character."""
+
+    @abstractmethod
+    def pause(self, seconds: float) -> None:
+        """Pause for the given number of seconds, for dramatic effect."""
+
+
+class InstantRenderer(OutputRenderer):
+    """A renderer that shows every message with a single write and never pauses.
+
+    Output is left buffered until the game next asks the player for input.
+    """
+
+    def show(self, text: str) -> None:
+        """Show the given text to the player all at once."""
+        self.write(text)
+
+    def type_out(self, text: str, speed: float) -> None:
+        """Show the given text followed by a newline all at once, ignoring the typing speed."""
+        self.write(text + "\n")
+
+    def pause(self, seconds: float) -> None:
+        """Return immediately."""
+
+
+class TypewriterRenderer(OutputRenderer):
+    """A renderer that types text out gradually and honours the game's pauses.
+
+    Text is written in chunks of a few characters, each of which is held back until the time it would have
+    appeared at the requested typing speed, measured against a monotonic clock. This keeps the pace of one
+    character at a time without a write, flush and sleep for every single character.
+
+    Instance Attributes:
+        - sleep: a function that pauses for the given number of seconds.
+        - clock: a function that returns the current time of a monotonic clock, in seconds.
+        - frame: the number of seconds between chunks.
+
+    Representation Invariants:
+        - self.frame > 0
+    """
+    sleep: Callable[[float], object]
+    clock: Callable[[], float]
+    frame: float
+
+    def __init__(self, write: Callable[[str], object] = _console_write,
+                 flush: Callable[[], object] = _console_flush, sleep: Callable[[float], object] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic, frame: float = 1 / 30, colour: bool = True) -> None:
+        """Initialize a new typewriter renderer."""
+        super().__init__(write, flush, colour)
+        self.sleep = sleep
+        self.clock = clock
+        self.frame = frame
+
+    def show(self, text: str) -> None:
+        """Show the given text to the player all at once."""
+        self.write(text)
+        self.flush()
+
+    def type_out(self, text: str, speed: float) -> None:
+        """Show the given text followed by a newline, typed out at the given number of seconds per character."""
+        if speed <= 0:
+            self.show(text + "\n")
+            return
+
+        chunk_size = max(1, round(self.frame / speed))
+        start = self.clock()
+        for i in range(0, len(text), chunk_size):
+            self.write(text[i:i + chunk_size])
+            self.flush()
+            delay = start + (i + chunk_size) * speed - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+
+        self.show("\n")
+
+    def pause(self, seconds: float) -> None:
+        """Pause for the given number of seconds."""
+        self.sleep(seconds)
+
+
+class BufferedRenderer(OutputRenderer):
+    """A renderer that collects everything it shows as UTF-8 bytes, to be taken and sent all at once, and never
+    pauses.
+
+    Pre-rendered messages are collected as the bytes they were encoded to when they were rendered, so showing one
+    costs no formatting or encoding at all.
+
+    Instance Attributes:
+        - buffer: the encoded output shown since it was last taken.
+    """
+    buffer: list[bytes]
+
+    def __init__(self, flush: Callable[[], object] = lambda: None, colour: bool = True) -> None:
+        """Initialize a new buffered renderer with an empty buffer, which calls flush when its output should be
+        sent."""
+        super().__init__(self.show, flush, colour)
+        self.buffer = []
+
+    def show(self, text: str) -> None:
+        """Add the given text to the buffer."""
+        self.buffer.append(text.encode("utf-8"))
+
+    def show_message(self, message: Message) -> None:
+        """Add the given pre-rendered message to the buffer, with or without its colours."""
+        self.buffer.append(message.data if self.colour else message.plain_data)
+
+    def type_out(self, text: str, speed: float) -> None:
+        """Add the given text followed by a newline to the buffer, ignoring the typing speed."""
+        self.buffer.append((text + "\n").encode("utf-8"))
+
+    def pause(self, seconds: float) -> None:
+        """Return immediately."""
+
+    def take(self) -> bytes:
+        """Return everything in the buffer as a single block of bytes, and empty the buffer.
+
+        >>> renderer = BufferedRenderer()
+        >>> renderer.show("Café")
+        >>> renderer.type_out("!", 0.01)
+        >>> renderer.take(), renderer.take()
+        (b'Caf\\xc3\\xa9!\\n', b'')
+        """
+        data = b"".join(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+class NullRenderer(OutputRenderer):
+    """A renderer that discards all output and never pauses, for simulations and tests."""
+    silent = True
+
+    def __init__(self) -> None:
+        """Initialize a new null renderer."""
+        super().__init__(lambda _: None, lambda: None)
+
+    def show(self, text: str) -> None:
+        """Discard the given text."""
+
+    def type_out(self, text: str, speed: float) -> None:
+        """Discard the given text."""
+
+    def pause(self, seconds: float) -> None:
+        """Return immediately."""
+
+
+# The environment variable that chooses the console's output mode, and the renderer used for each mode
+OUTPUT_MODE_VARIABLE = "ADVENTURE_OUTPUT"
+OUTPUT_MODES = {
+    "instant": InstantRenderer,
+    "typewriter": TypewriterRenderer,
+    "null": NullRenderer
+}
+
+
+def make_renderer(mode: str, colour: bool = True) -> OutputRenderer:
+    """Return a new renderer for the console with the given output mode, with or without colour.
+
+    Raise a ValueError if mode is not one of OUTPUT_MODES.
+    """
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode {mode!r}; expected one of {', '.join(OUTPUT_MODES)}.")
+    renderer = OUTPUT_MODES[mode]()
+    renderer.colour = colour
+    return renderer
+
+
+@dataclass
+class GameIO:
+    """The input and output adapters that the game uses to talk to the player.
+
+    Instance Attributes:
+        - read: a function that shows the given prompt and returns the player's response.
+        - renderer: the renderer that shows the game's output to the player.
+    """
+    read: Callable[[str], str] = input
+    renderer: OutputRenderer = field(default_factory=TypewriterRenderer)
+
+
+class ScriptedInput:
+    """A GameIO read function that answers every prompt with the next line of a script.
+
+    Instance Attributes:
+        - consumed: the number of lines of the script that have been read so far.
+    """
+    # Private Instance Attributes:
+    #   - _lines: an iterator over the lines of the script that have not been read yet.
+    consumed: int
+    _lines: Iterator[str]
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        """Initialize a new scripted input that reads from the given lines in order."""
+        self._lines = iter(lines)
+        self.consumed = 0
+
+    def __call__(self, _: str = "") -> str:
+        """Return the next line of the script, or raise ScriptExhausted if there are none left."""
+        for line in self._lines:
+            self.consumed += 1
+            return line
+        raise ScriptExhausted
+
+
+class VirtualClock:
+    """A clock for simulations, which only moves when it is read or told to, so nothing timed with it depends on
+    how long anything really takes.
+
+    Each reading moves the clock forward by step seconds, so a simulated player takes exactly step seconds
+    between any two things they are timed doing. sleep moves it forward without waiting, so a VirtualClock can
+    also stand in for time.sleep.
+
+    Instance Attributes:
+        - now: the time the clock will show at its next reading, in seconds.
+        - step: the number of seconds the clock moves forward each time it is read.
+
+    Representation Invariants:
+        - self.step >= 0
+
+    >>> clock = VirtualClock(step=10.0)
+    >>> clock(), clock()
+    (0.0, 10.0)
+    >>> clock.sleep(2.5)
+    >>> clock()
+    22.5
+    """
+    now: float
+    step: float
+
+    def __init__(self, start: float = 0.0, step: float = 0.0) -> None:
+        """Initialize a new virtual clock showing the time start, moving forward by step seconds at each reading."""
+        self.now = start
+        self.step = step
+
+    def __call__(self) -> float:
+        """Return the current time, in seconds, and move the clock forward by step seconds."""
+        now = self.now
+        self.now += self.step
+        return now
+
+    def sleep(self, seconds: float) -> None:
+        """Move the clock forward by the given number of seconds, without waiting."""
+        self.now += max(seconds, 0.0)
+
+
+def console_renderer() -> OutputRenderer:
+    """Return a new renderer for the console, in the output mode named by the ADVENTURE_OUTPUT environment
+    variable, with colour only if standard output is a terminal.
+
+    If the variable names no output mode, warn about it and use "typewriter".
+    """
+    mode = os.environ.get(OUTPUT_MODE_VARIABLE, "typewriter")
+    if mode not in OUTPUT_MODES:
+        warnings.warn(f"Unknown output mode {mode!r} in {OUTPUT_MODE_VARIABLE}; using 'typewriter'.")
+        mode = "typewriter"
+    return make_renderer(mode, sys.stdout.isatty())
+
+
+CONSOLE_IO = GameIO(renderer=console_renderer())
+
+_current_io: ContextVar[GameIO] = ContextVar("current_io", default=CONSOLE_IO)
+
+
+def headless_io(lines: Iterable[str]) -> GameIO:
+    """Return a GameIO that reads from the given lines, discards all output and never pauses."""
+    return GameIO(read=ScriptedInput(lines), renderer=NullRenderer())
+
+
+def current_io() -> GameIO:
+    """Return the GameIO that the game is currently using."""
+    return _current_io.get()
+
+
+@contextmanager
+def use_io(io: GameIO) -> Iterator[GameIO]:
+    """Route all game input and output through the given GameIO inside this context."""
+    token = _current_io.set(io)
+    try:
+        yield io
+    finally:
+        _current_io.reset(token)
+
+
+def display(*values: object, sep: str = " ", end: str = "\n") -> None:
+    """Show the given values to the player, in the same format as print."""
+    renderer = _current_io.get().renderer
+    if not renderer.silent:
+        text = sep.join(str(value) for value in values) + end
+        renderer.show(text if renderer.colour else strip_colours(text))
+
+
+def display_message(message: Message) -> None:
+    """Show the given pre-rendered message to the player (see messages)."""
+    renderer = _current_io.get().renderer
+    if not renderer.silent:
+        renderer.show_message(message)
+
+
+def prompt(message: str = "") -> str:
+    """Show the given message to the player and return their response."""
+    io = _current_io.get()
+    return io.read(message if io.renderer.colour else strip_colours(message))
+
+
+def pause(seconds: float) -> None:
+    """Pause the game for the given number of seconds."""
+    _current_io.get().renderer.pause(seconds)
 
 
 # typewriter effect function
 def typewriter_effect(text: str, speed: float = 0.01) -> None:
     """Print the given text character by character with a delay, simulating a typewriter effect."""
-    for letter in text:
-        sys.stdout.write(letter)  # Print the letter without newline
-        sys.stdout.flush()  # Ensure the letter gets printed immediately
-        time.sleep(speed)  # A pause before printing the next letter
-
-    print()
+    renderer = _current_io.get().renderer
+    renderer.type_out(text if renderer.colour else strip_colours(text), speed)
 
 
 if __name__ == "__main__":
@@ -21,14 +21,27 @@ from __future__ import annotations
 
 # Standard library imports
 import json
+import os
+import random
 import time
-from typing import Optional
+from typing import Callable, Collection, Optional, TYPE_CHECKING
 from dataclasses import dataclass
 
 # Project-specific imports
-from additional_functions import typewriter_effect
-from game_entities import Location, Item, Score, Moves
+from additional_functions import (typewriter_effect, display, display_message, prompt, pause, GameIO, current_io,
+                                  use_io, make_renderer)
+from commands import CommandTable, normalize_command
+from descriptions import render_description
+from game_entities import Location, Item, ItemCollection, Score, Moves
+from game_world import load_world
+from messages import INVALID_OPTION, action_menu, decision, points_earned
 from proj1_event_logger import Event, EventList
+from route_table import load_route_table
+from world_validator import ERROR, InvalidWorldError, validate_file
+
+if TYPE_CHECKING:
+    from event_journal import EventJournal
+    from profiler import Profiler
 
 # Global constants for text colors
 RED = "\033[31m"
@@ -37,6 +50,26 @@ BLUE = "\033[34m"
 YELLOW = "\033[33m"
 RESET = "\033[0m"
 
+# Game settings
+MAX_MOVES = 35
+WINNING_ITEM_COUNT = 4
+
+# Menu options available at each location
+MENU = ["look", "inventory", "score", "undo", "log", "quit", "moves", "drop", "save", "load", "hint", "stats"]
+MENU_COMMANDS = CommandTable(MENU)
+
+# The shortest abbreviation of an action that the player may type instead of the whole action
+ABBREVIATION_MIN_LENGTH = 3
+
+# The file that the save and load menu options use when the player doesn't name one
+DEFAULT_SAVE_FILE = "savegame.sav"
+
+# The format version of the snapshots made by AdventureGame.snapshot
+SNAPSHOT_VERSION = 1
+
+# The number of bits in the seeds chosen for games that aren't given one
+SEED_BITS = 63
+
 
 @dataclass
 class GameState:
@@ -63,9 +96,19 @@ class AdventureGame:
         - ongoing: A boolean indicating if the game is ongoing (True) or ended (False).
         - score: A Score object that tracks the player's current score.
         - moves: A Moves object that tracks the remaining number of moves the player can make.
-        - inventory: A list of Item objects representing the player's collected items.
+        - inventory: An ItemCollection of the player's collected items.
         - game_state: A GameState object that manages the overall game state, including
           score and remaining moves.
+        - io: The GameIO that the game reads the player's input from and writes its output to.
+        - awaiting_action: Whether the game is waiting for the player to choose their next action. This is the
+          point in a turn where it is safe to snapshot the game and later resume it with play(resume=True).
+        - journal: The journal that the game records every line the player types, every reading of its clock and
+          every change to its log in, or None if it is not journaled (see event_journal).
+        - seed: The seed of every random choice the game's puzzles make (see puzzle_random).
+        - clock: The clock the game's puzzles time the player with, returning the current time in seconds.
+        - special_actions: The handler of the special actions at each location with a puzzle, as declared by the
+                           game's world (see puzzle_registry).
+        - profiler: The profiler that measures this game, or None if it is not profiled (see profiler).
 
     Representation Invariants:
         - self.current_location_id in self._locations
@@ -76,46 +119,121 @@ class AdventureGame:
     # Private Instance Attributes (do NOT remove these two attributes):
     #   - _locations: a mapping from location id to Location object.
     #                       This represents all the locations in the game.
-    #   - _items: a list of Item objects, representing all items in the game.
+    #   - _items: a read-only collection of Item objects, representing all items in the game.
     #   - _game_log: an EventList object that keeps track of all the player's actions in the game.
+    #   - _start_location_id: the ID of the location where the game began, where the target items must be returned.
+    #   - _game_data_file: the name of the game data file that the game was loaded from.
+    #   - _draws: the number of random number generators puzzle_random has returned so far.
 
     _locations: dict[int, Location]
-    _items: list[Item]
+    _items: Collection[Item]
     _game_log: EventList
-    inventory: list[Item]
+    _start_location_id: int
+    _game_data_file: str
+    _draws: int
+    inventory: ItemCollection
     current_location_id: int
     ongoing: bool
     game_state: GameState
-
-    def __init__(self, game_data_file: str, initial_location_id: int, moves: int) -> None:
+    io: GameIO
+    awaiting_action: bool
+    journal: Optional[EventJournal]
+    seed: int
+    clock: Callable[[], float]
+    special_actions: dict[int, Callable[[AdventureGame, Location, str], None]]
+    profiler: Optional[Profiler]
+
+    def __init__(self, game_data_file: str, initial_location_id: int, moves: int,
+                 io: Optional[GameIO] = None, output_mode: Optional[str] = None,
+                 journal: Optional[EventJournal] = None, validate: bool = False, seed: Optional[int] = None,
+                 clock: Optional[Callable[[], float]] = None, profiler: Optional[Profiler] = None) -> None:
         """
         Initialize a new text adventure game, based on the data in the given file, setting starting location of game
         at the given initial location ID.
         (note: you are allowed to modify the format of the file as you see fit)
 
+        The game talks to the player through the given GameIO, or through the GameIO currently in use if io is None.
+        If output_mode is given, the game's output is shown with a new renderer for that mode instead
+        (see additional_functions.OUTPUT_MODES).
+
+        If journal is given, the start of the game is recorded in it, along with everything the game does after.
+
+        If validate is True, the game data file is checked for mistakes first (see world_validator), and an
+        InvalidWorldError is raised if it has any errors.
+
+        The game's puzzles make their random choices from the given seed, or from a seed chosen at random if seed
+        is None, and time the player with the given clock, or with the system clock if clock is None. Games with the
+        same seed and clock that are given the same lines play out the same way.
+
+        If profiler is given, it measures everything the game does (see profiler.Profiler.attach). Otherwise the
+        game is not measured at all.
+
         Preconditions:
         - game_data_file is the filename of a valid game data JSON file
         """
 
+        if validate:
+            problems = validate_file(game_data_file, initial_location_id, WINNING_ITEM_COUNT, MENU)
+            if any(problem.severity == ERROR for problem in problems):
+                raise InvalidWorldError(game_data_file, problems)
+
         # Suggested helper method (you can remove and load these differently if you wish to do so):
         self._locations, self._items = self._load_game_data(game_data_file)
         self._game_log = EventList()
-        self.inventory = []
+        self.inventory = ItemCollection()
 
         # Suggested attributes (you can remove and track these differently if you wish to do so):
         self.current_location_id = initial_location_id  # game begins at this location
         self.ongoing = True  # whether the game is ongoing
         self.game_state = GameState(score=Score(), moves=Moves(moves))
+        self.io = current_io() if io is None else io
+        if output_mode is not None:
+            self.io = GameIO(read=self.io.read, renderer=make_renderer(output_mode, self.io.renderer.colour))
+        self._start_location_id = initial_location_id
+        self._game_data_file = game_data_file
+        self.awaiting_action = False
+        self.seed = random.getrandbits(SEED_BITS) if seed is None else seed
+        self.clock = time.time if clock is None else clock
+        self._draws = 0
+        self.special_actions = dict(load_world(game_data_file).special_actions)
+        self.profiler = None
+        self.journal = None
+        if journal is not None:
+            journal.record_start(game_data_file, initial_location_id, moves, self.seed)
+            self.attach_journal(journal)
+        if profiler is not None:
+            profiler.attach(self)
+
+    def attach_journal(self, journal: EventJournal) -> None:
+        """Record every line the player types and every change to the game's log from now on in the given journal.
+        """
+        self.journal = journal
+        self._game_log.journal = journal
+
+    def puzzle_random(self) -> random.Random:
+        """Return a new random number generator for the next puzzle the player starts.
+
+        Each generator is seeded from the game's seed and the number of generators returned before it, so the
+        random choices of a game depend only on its seed and what the player has done, and a snapshot of the game
+        only needs to hold that number to carry on making the same choices.
+
+        >>> first = AdventureGame('game_data.json', 1, MAX_MOVES, seed=7).puzzle_random()
+        >>> second = AdventureGame('game_data.json', 1, MAX_MOVES, seed=7).puzzle_random()
+        >>> first.random() == second.random()
+        True
+        """
+        self._draws += 1
+        return random.Random(f"{self.seed}/{self._draws}")
 
     # Handle choices in game menu
     def handle_menu_choice(self, menu_choice: str, adventure_game: AdventureGame) -> bool:
         """Handle user menu choices and return whether the game should continue."""
         if menu_choice == "look":
-            print(self.get_location().long_description)  # Show current location's full description
+            display(self.get_location().long_description)  # Show current location's full description
         elif menu_choice == "inventory":
             adventure_game.get_inventory()  # Show the inventory contents
         elif menu_choice == "score":
-            print(f"{YELLOW}\033[1mCURRENT SCORE: {self.game_state.score}\033[0m{RESET}")
+            display(f"{YELLOW}\033[1mCURRENT SCORE: {self.game_state.score}\033[0m{RESET}")
         elif menu_choice == "undo":
             adventure_game.undo_move()  # Undo the last move
         elif menu_choice == "log":
@@ -123,15 +241,30 @@ class AdventureGame:
         elif menu_choice == "quit":
             self.quit_game()  # End the game
         elif menu_choice == "moves":
-            print(f"{RED}\033[1mMOVES LEFT: {self.game_state.moves}\033[0m{RESET}")
+            display(f"{RED}\033[1mMOVES LEFT: {self.game_state.moves}\033[0m{RESET}")
         elif menu_choice == "drop":
-            adventure_game.remove_from_inventory(location)  # Drop the given item
+            adventure_game.remove_from_inventory(self.get_location())  # Drop the given item
+        elif menu_choice == "save":
+            self.save_game()  # Save the game to a file
+        elif menu_choice == "load":
+            self.load_game()  # Replace the game with one saved in a file
+        elif menu_choice == "hint":
+            self.give_hint()  # Show the way to a location
+        elif menu_choice == "stats":
+            self.show_stats()  # Show how long the game's commands have taken
         else:
-            print("Please choose a valid option.")
+            display("Please choose a valid option.")
             return True
         return False
 
     # Menu Helper Functions
+    def show_stats(self) -> None:
+        """Show the measurements of this game's profiler, if it has one."""
+        if self.profiler is None:
+            display("Profiling is off. Start the game with a profiler to see how long each command takes.")
+        else:
+            display(self.profiler.report())
+
     def get_location(self, loc_id: Optional[int] = None) -> Location:
         """Return the Location object associated with the provided location ID."""
         if loc_id is None:
@@ -146,18 +279,23 @@ class AdventureGame:
             self._game_log.add_event(Event(id_num=current_location.id_num, description=None, item=event_item,
                                            next_command=action_choice))
         else:  # Log a location change (movement)
-            self._game_log.add_event(Event(id_num=current_location.id_num, description=location.long_description,
+            self._game_log.add_event(Event(id_num=current_location.id_num,
+                                           description=current_location.long_description,
                                            next_command=action_choice, item=None))
 
+    def get_game_log(self) -> EventList:
+        """Return the event log of this game."""
+        return self._game_log
+
     def get_inventory(self) -> None:
         """Prints all the items (name and description) currently in the player's inventory."""
         if not self.inventory:
-            print("There are currently no items in your inventory.")
+            display("There are currently no items in your inventory.")
         else:
-            print("The following items are in your inventory: \n")
+            display("The following items are in your inventory: \n")
             for inv_item in self.inventory:
                 cleaned_description = inv_item.description.replace("\n", " ")  # Remove new lines in description
-                print(f"- {inv_item.name}: {cleaned_description}")
+                display(f"- {inv_item.name}: {cleaned_description}")
 
     def remove_from_inventory(self, current_location: Location, curr_item: Optional[Item] = None) -> None:
         """Remove an item from the inventory and drop it at the current location.
@@ -167,63 +305,63 @@ class AdventureGame:
         """
         if curr_item is not None:
             # Check if item exists in the inventory
-            if not any(inv_item.name == curr_item.name for inv_item in self.inventory):
-                print(f"{curr_item.name} is not in the inventory.")
+            if curr_item not in self.inventory:
+                display(f"{curr_item.name} is not in the inventory.")
                 return
 
             # Item exists in inventory, so remove it and add it to the location
             self.inventory.remove(curr_item)
-            location.items.append(curr_item)
-            self.add_event_to_log(current_location=location, event_item=curr_item)
-            print(f"{curr_item.name} has been dropped at the location.")
+            current_location.items.append(curr_item)
+            self.add_event_to_log(current_location=current_location, event_item=curr_item)
+            display(f"{curr_item.name} has been dropped at the location.")
 
         elif curr_item is None:  # Ask Player for the item to drop
-            response = input("What is the name of the item you would like to drop at this location? ").strip().lower()
+            response = prompt("What is the name of the item you would like to drop at this location? ").strip().lower()
 
             # Find the item instance in inventory
-            item_to_remove = next((inv_item for inv_item in self.inventory if inv_item.name.lower() == response), None)
+            item_to_remove = self.inventory.find(response)
 
             if item_to_remove is not None:
                 # Remove item from inventory and add it to location
                 self.inventory.remove(item_to_remove)  # Remove the correct instance
                 current_location.items.append(item_to_remove)  # Add the item to the location
-                self.add_event_to_log(current_location=location, event_item=item_to_remove)  # Log the event
-                print(f"{item_to_remove.name} has been dropped at the location.")
+                self.add_event_to_log(current_location=current_location, event_item=item_to_remove)  # Log the event
+                display(f"{item_to_remove.name} has been dropped at the location.")
             else:
-                print("Item not found in inventory.")  # Notify the player if the item is not in inventory
+                display("Item not found in inventory.")  # Notify the player if the item is not in inventory
 
     def undo_move(self) -> None:
         """Undo the last move made by the player."""
         if self._game_log.is_empty():
-            print("No actions to undo.")
+            display("No actions to undo.")
             return
 
         last_event = self._game_log.last  # Get the last event
-        print(f"Last event: {last_event}")  # Debugging line
+        display(f"Last event: {last_event}")  # Debugging line
 
         if last_event.item is None:  # Undo location movement
             if last_event.prev is not None:
                 self.current_location_id = last_event.prev.id_num
                 # Ensure we are correctly setting the location back before calling `get_location`
                 previous_location = self.get_location(self.current_location_id)
-                print(f"You are moved back to {previous_location.name}.")
+                display(f"You are moved back to {previous_location.name}.")
             else:
-                print("No previous location to return to.")
+                display("No previous location to return to.")
 
         else:
             if last_event.item in self.inventory:  # Undo item pickup (Drop the item to the current location)
-                self.remove_from_inventory(location, last_event.item)
+                self.remove_from_inventory(self.get_location(), last_event.item)
                 self.get_location().items.append(last_event.item)
-                print(f"Dropped {last_event.item.name} back at {self.get_location().name}.")
+                display(f"Dropped {last_event.item.name} back at {self.get_location().name}.")
             else:  # Undo item drop (Pick the item back up)
                 self.get_location(last_event.id_num).items.remove(last_event.item)
                 self.inventory.append(last_event.item)
-                print(f"Picked {last_event.item.name} back up.")
+                display(f"Picked {last_event.item.name} back up.")
 
-        self._game_log.last = last_event.prev
+        self._game_log.remove_last_event(clear_command=False)
 
         self.game_state.moves.increase(1)  # Increase the number of moves left
-        print(f"{YELLOW}\033[1mEARNED POINTS: +{1}\033[0m")
+        display_message(points_earned(1))
 
     def log(self) -> None:
         """Display all events in the game log."""
@@ -231,58 +369,192 @@ class AdventureGame:
 
     def quit_game(self) -> None:
         """Quit the game and display the score."""
-        print(f"{RED}Thanks for playing! Your score was: {self.game_state.score}{RESET}")
+        display(f"{RED}Thanks for playing! Your score was: {self.game_state.score}{RESET}")
         self.ongoing = False
 
+    def snapshot(self) -> bytes:
+        """Return a compact snapshot of this game's state, which restore can later bring back.
+
+        Only the parts of each location that differ from the world template are included, along with the score,
+        moves, inventory and event log. Puzzles keep no state between turns, since each one is played from start
+        to finish within a single action; their progress is captured by the items, moves and commands they
+        change.
+        """
+        world = load_world(self._game_data_file)
+        locations = {}
+        for loc_id, location in self._locations.items():
+            template = world.locations[loc_id]
+            changes = {}
+            if location.id_num != template.id_num:
+                changes['id'] = location.id_num
+            if location.visited != template.visited:
+                changes['visited'] = location.visited
+            items = None if location.items is None else [item.id_num for item in location.items]
+            if items != (None if template.item_ids is None else list(template.item_ids)):
+                changes['items'] = items
+            commands = {command: destination for command, destination in location.available_commands.items()
+                        if command not in template.available_commands
+                        or template.available_commands[command] != destination}
+            if commands:
+                changes['commands'] = commands
+            if changes:
+                locations[loc_id] = changes
+
+        events = self._game_log.entries()
+
+        state = {'version': SNAPSHOT_VERSION, 'location': self.current_location_id, 'ongoing': self.ongoing,
+                 'score': self.game_state.score.score, 'moves': self.game_state.moves.moves,
+                 'inventory': [item.id_num for item in self.inventory], 'locations': locations, 'events': events,
+                 'seed': self.seed, 'draws': self._draws}
+        return json.dumps(state, separators=(',', ':')).encode('utf-8')
+
+    def restore(self, snapshot: bytes) -> None:
+        """Replace this game's state with the state in the given snapshot.
+
+        Raise a ValueError if the snapshot is not one that this version of the game can restore.
+
+        Preconditions:
+            - snapshot was returned by the snapshot method of a game in the same world as this one
+        """
+        try:
+            state = json.loads(snapshot)
+        except ValueError as error:
+            raise ValueError("This is not a saved game.") from error
+        if not isinstance(state, dict) or state.get('version') != SNAPSHOT_VERSION:
+            raise ValueError("This saved game is from a different version of the game.")
+
+        world = load_world(self._game_data_file)
+        self._locations, self._items = self._load_game_data(self._game_data_file)
+        for loc_id, changes in state['locations'].items():
+            location = self._locations[int(loc_id)]
+            location.id_num = changes.get('id', location.id_num)
+            location.visited = changes.get('visited', location.visited)
+            if 'items' in changes:
+                location.items = None if changes['items'] is None else ItemCollection(
+                    world.items[item_id] for item_id in changes['items'])
+            for command, destination in changes.get('commands', {}).items():
+                location.set_command(command, destination)
+
+        if self.journal is not None:
+            self.journal.record_reset()
+        self._game_log = EventList(self.journal)
+        for id_num, command, item_id in state['events']:
+            if item_id is None:
+                self._game_log.add_event(Event(id_num=id_num, description=world.locations[id_num].long_description,
+                                               next_command=command))
+            else:
+                self._game_log.add_event(Event(id_num=id_num, description=None, next_command=command,
+                                               item=world.items[item_id]))
+
+        self.inventory = ItemCollection(world.items[item_id] for item_id in state['inventory'])
+        self.current_location_id = state['location']
+        self.ongoing = state['ongoing']
+        self.game_state.score.score = state['score']
+        self.game_state.moves.moves = state['moves']
+        self.seed = state.get('seed', self.seed)
+        self._draws = state.get('draws', 0)
+
+    def save_game(self) -> None:
+        """Ask the player for a file name and save a snapshot of the game to it."""
+        filename = prompt(f"Save to which file? (press Enter for {DEFAULT_SAVE_FILE}) ").strip() or DEFAULT_SAVE_FILE
+        try:
+            with open(filename, 'wb') as f:
+                f.write(self.snapshot())
+        except OSError as error:
+            display(f"Could not save the game: {error.strerror}.")
+            return
+        display(f"Game saved to {filename}.")
+
+    def load_game(self) -> None:
+        """Ask the player for a file name and replace the game with the one saved in it."""
+        filename = prompt(f"Load which file? (press Enter for {DEFAULT_SAVE_FILE}) ").strip() or DEFAULT_SAVE_FILE
+        try:
+            with open(filename, 'rb') as f:
+                self.restore(f.read())
+        except OSError as error:
+            display(f"Could not load the game: {error.strerror}.")
+            return
+        except ValueError as error:
+            display(f"Could not load the game: {error}")
+            return
+        display(f"Game loaded from {filename}. You are at {self.get_location().name}.")
+
+    def give_hint(self) -> None:
+        """Ask the player which location they want to go to and show them the shortest way there that they know of.
+
+        The way is found in the route table shared by the games in this world, which only searches from the
+        locations next to the player's, the first time a hint needs them. Its first step is taken from the commands
+        at the player's location as they are now, so a way the player has opened there is used.
+        """
+        answer = prompt("Where do you want to go? (a location's name or id) ").strip()
+        destination = self.find_location_id(answer)
+        if destination is None:
+            display(f"There is no location called {answer!r}.")
+            return
+
+        name = load_world(self._game_data_file).locations[destination].name
+        routes = load_route_table(self._game_data_file)
+        best = None
+        if destination == self.current_location_id:
+            best = []
+        for command, loc_id in self.get_location().available_commands.items():
+            rest = None if loc_id is None else routes.path(loc_id, destination)
+            if rest is not None and (best is None or len(rest) + 1 < len(best)):
+                best = [command] + rest
+
+        if best is None:
+            display(f"You don't know a way to {name} from here yet.")
+        elif not best:
+            display(f"You are already at {name}.")
+        else:
+            display(f"The way to {name} takes {len(best)} move{'s' if len(best) != 1 else ''}: {', '.join(best)}.")
+
+    def find_location_id(self, text: str) -> Optional[int]:
+        """Return the id of the location in this game's world with the given id or name, ignoring case and spacing,
+        or None if there is none."""
+        locations = load_world(self._game_data_file).locations
+        if text.isdigit():
+            return int(text) if int(text) in locations else None
+
+        name = normalize_command(text)
+        for loc_id in locations:
+            if normalize_command(locations[loc_id].name) == name:
+                return loc_id
+        return None
+
     def handle_non_menu_choice(self, nonmenu_choice: str, current_location: Location) -> None:
         """Handle non-menu choices based on location-specific commands.
 
         Preconditions:
             - a pickup action has a command that leads to None.
-            - a "special" action is a command that leads to None and its location is in location_commands
+            - a "special" action is a command that leads to None and its location is in self.special_actions
         """
 
-        # A mapping of a location id to its specific function to handle special actions in the location
-        location_commands = {
-            3: (location.location_3_commands, [nonmenu_choice, self.inventory]),
-            5: (location.sublocation_5_commands, [nonmenu_choice, self.game_state.moves, self.game_state.score,
-                                                  self.inventory]),
-            6: (location.sublocation_6_commands, [nonmenu_choice, self.game_state.moves, self.game_state.score,
-                                                  self.inventory]),
-            8: (location.location_8_commands, [nonmenu_choice, self.game_state.moves, self.inventory,
-                                               self.game_state.score]),
-            11: (location.sublocation_11_commands, [nonmenu_choice]),
-            12: (location.sublocation_12_commands, [nonmenu_choice, self.game_state.moves, self.inventory,
-                                                    self.game_state.score])
-        }
-
         # Check if the choice is a valid command
         valid_choice = current_location.available_commands[nonmenu_choice]
 
         if valid_choice is None:
-            if self.current_location_id not in location_commands:  # PICK UP
+            if self.current_location_id not in self.special_actions:  # PICK UP
                 pickup = current_location.handle_pickup_item(nonmenu_choice, self.inventory)
                 if pickup:  # Log only if an item was actually picked up
                     self.add_event_to_log(current_location, nonmenu_choice, pickup)
             else:  # SPECIAL ACTION
-                func, args = location_commands[self.current_location_id]
-                func(*args)  # Call the function with arguments
+                self.special_actions[self.current_location_id](self, current_location, nonmenu_choice)
 
                 self.add_event_to_log(current_location, nonmenu_choice)
 
                 # log if this wasn't a pickup action
-                if self.current_location_id in location_commands:
+                if self.current_location_id in self.special_actions:
                     self.add_event_to_log(current_location, nonmenu_choice)
 
         else:  # CHANGE LOCATION
-            new_location_id = location.available_commands.get(nonmenu_choice)
+            new_location_id = valid_choice
             if new_location_id is not None:
                 self.current_location_id = new_location_id
 
                 # If location-specific functions exist, call them
-                if self.current_location_id in location_commands:
-                    func, args = location_commands[self.current_location_id]
-                    func(*args)
+                if self.current_location_id in self.special_actions:
+                    self.special_actions[self.current_location_id](self, current_location, nonmenu_choice)
 
                 self.add_event_to_log(current_location, nonmenu_choice)
 
@@ -290,42 +562,167 @@ class AdventureGame:
             current_location.visited = True  # Mark the new location as visited
             self.game_state.moves.decrease(1)  # Decrease the moves
 
-    # Assign each location object an list of Item objects, if it has any.
-    def assign_location_items(self, locations: dict[int, Location], items: list[Item]) -> None:
-        """Assign each Location object to an Items object."""
+    def describe_location(self, current_location: Location) -> None:
+        """Show the description of the given location, followed by the actions available there."""
+        # Show location description depending on whether it's been visited before.
+        if current_location.visited:
+            brief_description = current_location.brief_description
+            if brief_description != "":
+                display(render_description(brief_description, BLUE))
+        else:
+            display(render_description(current_location.long_description, BLUE))
+
+        pause(1)
+
+        # Display possible actions at this location, rendered once for every game whose location has these actions
+        display_message(action_menu(MENU_COMMANDS, current_location.command_table))
+
+    def read_choice(self, current_location: Location) -> str:
+        """Ask the player for an action until they enter one that is valid at the given location, and return it."""
+        self.awaiting_action = True
+        text = prompt(f"{MAGENTA}\nEnter action: {RESET}").strip().lower()
+        choice = self.resolve_choice(text, current_location)
+        while choice is None:
+            # Finding suggestions takes longer than anything else in a turn, so it is skipped when no one would see
+            # them
+            if not current_io().renderer.silent:
+                display(
+                    f"Available commands: {list(current_location.available_commands.keys())}")
+                suggestions = current_location.command_table.suggest(text) + MENU_COMMANDS.suggest(text, 1)
+                if text and suggestions:
+                    display(f"Did you mean: {', '.join(suggestions)}?")
+            display_message(INVALID_OPTION)
+            text = prompt("\nEnter action: ").strip().lower()
+            choice = self.resolve_choice(text, current_location)
+
+        self.awaiting_action = False
+        return choice
+
+    @staticmethod
+    def resolve_choice(text: str, current_location: Location) -> Optional[str]:
+        """Return the action that the given text chooses at the given location, or None if it chooses none.
+
+        The text may be a whole action, or an abbreviation of exactly one action that is at least
+        ABBREVIATION_MIN_LENGTH characters long. Menu options win over the location's own actions.
+
+        >>> dorm = Location(1, "Dorm", "", "Your dorm.", {"go outside": 2, "look at desk": 9})
+        >>> AdventureGame.resolve_choice("look", dorm)
+        'look'
+        >>> AdventureGame.resolve_choice("look at", dorm)
+        'look at desk'
+        >>> AdventureGame.resolve_choice("lo", dorm) is None
+        True
+        """
+        choice = MENU_COMMANDS.lookup(text) or current_location.command_table.lookup(text)
+        if choice is None and len(text) >= ABBREVIATION_MIN_LENGTH:
+            matches = MENU_COMMANDS.complete(text) + current_location.command_table.complete(text)
+            if len(matches) == 1:
+                choice = matches[0]
+        return choice
+
+    def handle_choice(self, choice: str, current_location: Location) -> None:
+        """Carry out the given choice at the given location, then update the score and check whether the game
+        has been won or lost.
+
+        Preconditions:
+            - choice in MENU or choice in current_location.available_commands
+        """
+        display_message(decision(choice))
+        if choice in MENU_COMMANDS:
+            self.handle_menu_choice(choice, self)
+        else:
+            self.handle_non_menu_choice(choice, current_location)
+
+        # Add score for each item brought to its target position
+        self.game_state.score.increase(2 * self.inventory.count_targeting(self.current_location_id))
+
+        first_location = self.get_location(self._start_location_id)
+        if first_location and first_location.items is not None:
+            correctly_placed_items = first_location.items.count_targeting(self._start_location_id)
+
+            # Winning condition: Check if all target items have been correctly placed
+            if correctly_placed_items == WINNING_ITEM_COUNT:
+                submit = prompt("Finally, type 'SUBMIT PROJECT' to finalize: ").strip().upper()
+                if submit == "SUBMIT PROJECT":
+                    display(f"{RED}\033[1mCONGRATULATIONS! You've placed all the items correctly and"
+                            f"won the game with {self.game_state.score} points and with"
+                            f"{self.game_state.moves}! Well played!\033[0m{RESET}")
+                    self.ongoing = False  # End the game
+                else:
+                    display("You need to type 'SUBMIT PROJECT' exactly to submit!")
+
+        # Losing condition: Check if moves have run out
+        if self.game_state.moves.moves <= 0:
+            typewriter_effect(f"{RED}\033[1mGAME OVER! You ran out of moves. Please try again!\033[0m{RESET}")
+            self.ongoing = False  # End the game
+
+    def play_turn(self, previous_choice: Optional[str] = None) -> str:
+        """Play one turn of the game at the player's current location and return the action they chose.
+
+        previous_choice is the action that brought the player here, or None if this is the first turn.
+        """
+        current_location = self.get_location()
+        self.add_event_to_log(current_location, previous_choice)
+        self.describe_location(current_location)
+        return self.finish_turn()
+
+    def finish_turn(self) -> str:
+        """Ask the player for their action at their current location, carry it out, and return it."""
+        current_location = self.get_location()
+        choice = self.read_choice(current_location)
+        self.handle_choice(choice, current_location)
+        return choice
+
+    def play(self, resume: bool = False) -> None:
+        """Play the game through this game's GameIO until it ends.
+
+        If resume is True, the game was restored from a snapshot taken while it was awaiting the player's action,
+        so it carries on by asking for that action rather than starting a new turn. If the game has a journal, every
+        line the player types and every reading of its clock is recorded in it.
+        """
+        io = self.io
+        clock = self.clock
+        if self.journal is not None:
+            io = GameIO(read=self.journal.recording(io.read), renderer=io.renderer)
+            self.clock = self.journal.recording_clock(clock)
+
+        try:
+            with use_io(io):
+                choice = self.finish_turn() if resume else None
+                while self.ongoing:
+                    choice = self.play_turn(choice)
+
+                display(f"{RED}\033[1mGAME HAS ENDED.\033[0m{RESET}")
+        finally:
+            self.clock = clock
+
+    # Assign each location object the matching Item objects, if it has any.
+    def assign_location_items(self, locations: dict[int, Location], items: Collection[Item]) -> None:
+        """Make each Location object hold the Item objects in items with the same ids as the items it holds now.
+
+        Locations loaded by _load_game_data already hold the game's Item objects; this is for locations built
+        with items from elsewhere.
+        """
         # Create a dictionary mapping the item.id_num to the corresponding Item object
         dict_items = {item.id_num: item for item in items}
 
         # Iterate over each location and assign the items based on id_num
         for loc in locations.values():
             if loc.items:  # Check if loc.items is not None or empty
-                # Replace item ids with the corresponding Item objects in a single step
-                loc.items = [dict_items[item_id] for item_id in loc.items if item_id in dict_items]
+                # Replace each item with the corresponding Item object in a single step
+                loc.items = ItemCollection(dict_items[item.id_num] for item in loc.items if item.id_num in dict_items)
 
     @staticmethod
-    def _load_game_data(filename: str) -> tuple[dict[int, Location], list[Item]]:
+    def _load_game_data(filename: str) -> tuple[dict[int, Location], Collection[Item]]:
         """Load locations and items from a JSON file with the given filename and
         return a tuple consisting of (1) a dictionary of locations
-        mapping each game location's ID to a Location object, and (2) a list of all Item objects."""
-
-        with open(filename, 'r') as f:
-            data = json.load(f)  # This loads all the data from the JSON file
-
-        locations = {}
-        for loc_data in data['locations']:  # Go through each element associated with the 'locations' key in the file
-            location_obj = Location(loc_data['id_num'], loc_data['name'], loc_data['brief_description'],
-                                    loc_data['long_description'],
-                                    loc_data['available_commands'], loc_data['items'], loc_data['visited'],
-                                    loc_data['sub_locations'])
-            locations[loc_data['id_num']] = location_obj
+        mapping each game location's ID to a Location object, and (2) a collection of all Item objects.
 
-        items = []
-        for item_data in data['items']:  # Go through each element associated with the 'items' key in the file
-            item_object = Item(item_data['name'], item_data['id_num'], item_data['description'],
-                               item_data['start_position'], item_data['target_position'])
-            items.append(item_object)
+        Each location already holds the Item objects that start there. The dictionary creates each Location the
+        first time it is looked up, so it only contains the locations that the game has used so far."""
 
-        return locations, items
+        # Every game started from the same file shares one template of the unchanging parts of the world
+        return load_world(filename).new_game_data()
 
 
 if __name__ == "__main__":
@@ -348,21 +745,13 @@ if __name__ == "__main__":
     #         break
     #     print("Please enter a valid name!")
 
-    MAX_MOVES = 35
-    WINNING_ITEM_COUNT = 4
-
-    # Initialize the game
-    game = AdventureGame('game_data.json', 1, MAX_MOVES)  # Load data, set initial location ID to 1
-    game.assign_location_items(game._locations, game._items)
-
-    # Define menu options available at each location
-    menu = ["look", "inventory", "score", "undo", "log", "quit", "moves", "drop"]
-
-    choice = None
-
-    # Track the first location
-    first_location_id = game.current_location_id
-    first_location = game.get_location(first_location_id)
+    # Initialize the game, profiling it if ADVENTURE_PROFILE names a file to dump the measurements to
+    profile_file = os.environ.get("ADVENTURE_PROFILE")
+    game_profiler = None
+    if profile_file:
+        from profiler import Profiler
+        game_profiler = Profiler(dump_file=profile_file)
+    game = AdventureGame('game_data.json', 1, MAX_MOVES, profiler=game_profiler)  # Set initial location ID to 1
 
     # Print a welcome message to the player
     def start_game(playername: str) -> None:
@@ -393,68 +782,6 @@ if __name__ == "__main__":
         input(f"{MAGENTA}\n\033[1mPress Enter when you're ready!\033[0m{RESET}")
 
     start_game(player_name)
-
-    while game.ongoing:
-
-        location = game.get_location()  # Get current location
-
-        game.add_event_to_log(location, choice)
-
-        # Show location description depending on whether it's been visited before.
-        if location.visited:
-            if location.brief_description != "":
-                print(f"{BLUE}\n{location.brief_description}{RESET}")
-        else:
-            print(f"{BLUE}\n{location.long_description}{RESET}")
-
-        time.sleep(1)
-
-        # Display possible actions at this location
-        print(f"{MAGENTA}\nWhat now? Remember to choose wisely!{RESET}")
-        print("Available actions: look, inventory, score, undo, log, quit, moves, drop")
-        print("At this location, you can also:")
-        for action in location.available_commands:
-            print("-", action)
-
-        # Validate choice
-        choice = input(f"{MAGENTA}\nEnter action: {RESET}").strip().lower()
-        while choice not in [cmd.lower() for cmd in location.available_commands] and choice not in menu:
-            print(
-                f"Available commands: {list(location.available_commands.keys())}")
-            print("That was an invalid option; try again.")
-            choice = input("\nEnter action: ").strip().lower()
-
-        print("========")
-        print(f"{MAGENTA}You decided to: {choice}{RESET}")
-        if choice in menu:
-            if not game.handle_menu_choice(choice, game):
-                pass  # Exit the while loop
-        else:
-            game.handle_non_menu_choice(choice, location)
-
-        # Add score each time an item is brought to its target position
-        for item in game.inventory:
-            if item.target_position == game.current_location_id:
-                game.game_state.score.increase(2)
-
-        if first_location and first_location.items is not None:
-            correctly_placed_items = sum(
-                1 for loc_item in first_location.items if loc_item.target_position == first_location_id)
-
-            # Winning condition: Check if all target items have been correctly placed
-            if correctly_placed_items == WINNING_ITEM_COUNT:
-                submit = input("Finally, type 'SUBMIT PROJECT' to finalize: ").strip().upper()
-                if submit == "SUBMIT PROJECT":
-                    print(f"{RED}\033[1mCONGRATULATIONS! You've placed all the items correctly and"
-                          f"won the game with {game.game_state.score} points and with"
-                          f"{game.game_state.moves}! Well played!\033[0m{RESET}")
-                    game.ongoing = False  # End the game
-                else:
-                    print("You need to type 'SUBMIT PROJECT' exactly to submit!")
-
-        # Losing condition: Check if moves have run out
-        if game.game_state.moves.moves <= 0:
-            typewriter_effect(f"{RED}\033[1mGAME OVER! You ran out of moves. Please try again!\033[0m{RESET}")
-            game.ongoing = False  # End the game
-
-    print(f"{RED}\033[1mGAME HAS ENDED.\033[0m{RESET}")
+    game.play()
+    if game_profiler is not None:
+        game_profiler.dump()
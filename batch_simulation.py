@@ -0,0 +1,151 @@
+"""CSC111 Project 1: Text Adventure Game - Batch Simulator
+
+This module plays a whole corpus of scripted games headlessly (see proj1_simulation.run_headless), spread
+over a pool of worker processes, and streams one JSON result per script to an output file.
+
+A corpus is either a JSONL file, where each line is a JSON list of script lines or an object
+{"id": ..., "script": [...]}, or a plain text file where each line is one script with its lines
+separated by " | ". Results are written in the same order as the corpus.
+
+Usage:
+    python batch_simulation.py corpus.jsonl results.jsonl --workers 32
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
+
+from adventure import AdventureGame, MAX_MOVES
+from proj1_simulation import run_headless
+from simulation_cache import SimulationCache
+
+# Separates the lines of a script in a plain text corpus
+TEXT_SEPARATOR = " | "
+
+# The number of chunks each worker may have queued at once, so a large corpus is never read into memory
+CHUNKS_PER_WORKER = 4
+
+# The settings of the worker process, set once by _init_worker
+_worker_settings = {}
+
+
+def read_corpus(filename: str) -> Iterator[tuple[Any, list[str]]]:
+    """Yield an (id, script) pair for each script in the corpus file with the given filename, in order.
+
+    Scripts without an id are given their line number in the file, starting at 1. Blank lines are skipped.
+    """
+    is_jsonl = filename.endswith(".jsonl") or filename.endswith(".json")
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+
+            if not is_jsonl:
+                yield line_number, line.split(TEXT_SEPARATOR)
+                continue
+
+            entry = json.loads(line)
+            if isinstance(entry, dict):
+                yield entry.get("id", line_number), entry["script"]
+            else:
+                yield line_number, entry
+
+
+def _init_worker(game_data_file: str, initial_location_id: int, moves: int, seed: int, cache_budget: int) -> None:
+    """Store the simulation settings in this worker process and load the game data once, so that every
+    script the worker plays reuses it. If cache_budget is positive, the worker also keeps a simulation cache
+    with that budget, in bytes."""
+    _worker_settings["game_data_file"] = game_data_file
+    _worker_settings["initial_location_id"] = initial_location_id
+    _worker_settings["moves"] = moves
+    _worker_settings["seed"] = seed
+    _worker_settings["cache"] = SimulationCache(cache_budget) if cache_budget > 0 else None
+    AdventureGame(game_data_file, initial_location_id, moves)
+
+
+def _play_script(script_id: Any, script: list[str]) -> dict[str, Any]:
+    """Play the given script in this worker process and return its result as a JSON-friendly dict."""
+    try:
+        result = run_headless(_worker_settings["game_data_file"], script,
+                              _worker_settings["initial_location_id"], _worker_settings["moves"],
+                              _worker_settings["seed"], cache=_worker_settings["cache"])
+    except Exception as error:  # Report the crash and keep playing the rest of the corpus
+        return {"id": script_id, "error": f"{type(error).__name__}: {error}"}
+
+    return {"id": script_id, "score": result.score, "moves_left": result.moves_left,
+            "inventory": result.inventory, "ongoing": result.ongoing, "lines_read": result.lines_read,
+            "id_log": result.events.get_id_log()}
+
+
+def _play_chunk(chunk: list[tuple[Any, list[str]]]) -> list[dict[str, Any]]:
+    """Play each (id, script) pair in the given chunk in this worker process and return their results."""
+    return [_play_script(script_id, script) for script_id, script in chunk]
+
+
+def run_batch(scripts: Iterable[tuple[Any, list[str]]], game_data_file: str = 'game_data.json',
+              initial_location_id: int = 1, moves: int = MAX_MOVES, workers: Optional[int] = None,
+              chunksize: int = 64, seed: int = 0, cache_budget: int = 0) -> Iterator[dict[str, Any]]:
+    """Play every (id, script) pair in scripts on a pool of worker processes, yielding each result in order as
+    soon as it is ready.
+
+    Every script is played from the given seed (see run_headless), so a corpus gives the same results however it
+    is split between the workers. If cache_budget is positive, each worker keeps a simulation cache with that
+    budget, in bytes, so scripts that begin the same way as ones the worker has played before only play the part
+    that is new (see simulation_cache).
+
+    Scripts are sent to the workers chunksize at a time, and only a few chunks per worker are in flight at once,
+    so scripts can be a lazily read corpus of any size. workers defaults to the number of CPUs.
+
+    Preconditions:
+        - workers is None or workers > 0
+        - chunksize > 0
+    """
+    workers = workers or os.cpu_count() or 1
+    scripts = iter(scripts)
+    pending: deque[Future] = deque()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(game_data_file, initial_location_id, moves, seed, cache_budget)) as executor:
+        while True:
+            while len(pending) < workers * CHUNKS_PER_WORKER:
+                chunk = list(islice(scripts, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_play_chunk, chunk))
+
+            if not pending:
+                return
+
+            yield from pending.popleft().result()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the batch simulator from the command line."""
+    parser = argparse.ArgumentParser(description="Play a corpus of scripted games on a pool of processes.")
+    parser.add_argument("corpus", help="a .jsonl file of scripts, or a text file with one ' | '-separated script "
+                                       "per line")
+    parser.add_argument("results", help="the JSONL file to stream the results to")
+    parser.add_argument("--game-data", default="game_data.json", help="the game data file to play")
+    parser.add_argument("--start", type=int, default=1, help="the initial location id")
+    parser.add_argument("--moves", type=int, default=MAX_MOVES, help="the number of moves the player starts with")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=64, help="the number of scripts sent to a worker at once")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the puzzles' random choices")
+    parser.add_argument("--cache-mb", type=int, default=0,
+                        help="the memory budget of each worker's simulation cache, in megabytes, or 0 for none")
+    args = parser.parse_args(argv)
+
+    with open(args.results, 'w', encoding='utf-8') as out:
+        for result in run_batch(read_corpus(args.corpus), args.game_data, args.start, args.moves,
+                                args.workers, args.chunksize, args.seed, args.cache_mb * 1024 * 1024):
+            out.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
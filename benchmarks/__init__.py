@@ -0,0 +1,5 @@
+"""CSC111 Project 1: Text Adventure Game - Benchmarks
+
+Each module in this package is a benchmark that is run from the repository root with
+python -m benchmarks.<module>.
+"""
@@ -0,0 +1,101 @@
+"""CSC111 Project 1: Text Adventure Game - Event Store Benchmark
+
+This module measures the memory and time taken to log many events in an EventList, compared with the linked
+list of Event dataclasses that EventList used to be. The events are like those the game logs: each one is at a
+location from game_data.json, with that location's description and one of its commands, and every fifth one
+is an item being picked up.
+
+Usage:
+    python -m benchmarks.event_store --events 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from game_entities import Item
+from game_world import load_world
+from proj1_event_logger import Event, EventList
+
+
+@dataclass
+class LinkedEvent:
+    """An event node as EventList used to store them: a dataclass with a __dict__, linked to its neighbours."""
+    id_num: Optional[int]
+    description: Optional[str]
+    next_command: Optional[str] = None
+    next: Optional[LinkedEvent] = None
+    prev: Optional[LinkedEvent] = None
+    item: Optional[Item] = None
+
+
+def sample_events(game_data_file: str) -> list[tuple[int, str, str, Optional[Item]]]:
+    """Return (location id, description, command, item) for one event at each command of each location in the
+    given world, with an item on every fifth one."""
+    world = load_world(game_data_file)
+    items = list(world.items.values())
+    samples = []
+    for loc_id in world.locations:
+        template = world.locations[loc_id]
+        for command in template.available_commands:
+            item = items[len(samples) % len(items)] if len(samples) % 5 == 0 else None
+            samples.append((loc_id, template.long_description, command, item))
+    return samples
+
+
+def log_linked(count: int, samples: list[tuple[int, str, str, Optional[Item]]]) -> LinkedEvent:
+    """Log count events as a linked list of LinkedEvents and return the first one."""
+    first = last = None
+    for i in range(count):
+        id_num, description, command, item = samples[i % len(samples)]
+        event = LinkedEvent(id_num, description, command, item=item)
+        if last is None:
+            first = event
+        else:
+            last.next = event
+            event.prev = last
+        last = event
+    return first
+
+
+def log_event_list(count: int, samples: list[tuple[int, str, str, Optional[Item]]]) -> EventList:
+    """Log count events in an EventList and return it."""
+    events = EventList()
+    for i in range(count):
+        id_num, description, command, item = samples[i % len(samples)]
+        events.add_event(Event(id_num, description, command, item=item))
+    return events
+
+
+def measure(log: Callable[[], object]) -> tuple[float, float]:
+    """Return the memory, in bytes, held by the result of log, and the time log took, in seconds."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = log()
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return memory, elapsed
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the event store benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Compare the memory used by linked and array-backed event logs.")
+    parser.add_argument("--events", type=int, default=1_000_000, help="the number of events to log")
+    parser.add_argument("--game-data", default="game_data.json", help="the game data file to take events from")
+    args = parser.parse_args(argv)
+
+    samples = sample_events(args.game_data)
+    print(f"{'store':>12} {'memory (MB)':>12} {'bytes/event':>12} {'time (s)':>9}")
+    for label, log in [("linked", lambda: log_linked(args.events, samples)),
+                       ("EventList", lambda: log_event_list(args.events, samples))]:
+        memory, elapsed = measure(log)
+        print(f"{label:>12} {memory / 2 ** 20:>12.1f} {memory / args.events:>12.1f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""CSC111 Project 1: Text Adventure Game - Hot Path Benchmarks
+
+This module times the parts of the game that run the most, compares each time with a stored baseline, and
+prints a table of the comparison. A benchmark is a regression when it takes longer than its threshold times its
+baseline, and the command exits with status 1 if any benchmark regressed, so it can be run as a check.
+
+Each benchmark is timed against a fixed reference loop of plain Python (reference_loop), with timeit: both are
+run enough times to take at least 0.2 seconds, a few times over, and each timed run of the benchmark follows a
+timed run of the reference loop. A benchmark's result is the median, over its runs, of its time divided by the
+reference loop's time just before, so a machine that is busier or slower than usual slows the reference loop as
+much as the benchmark, and doesn't make it look like a regression. The game's output is discarded while they run.
+
+Baselines are stored in benchmarks/baseline.json as these multiples of the reference loop's time, along with the
+Python version and platform they were measured on, and are shown as the times they stand for in the current run.
+They still only compare well on the same Python version and platform, so record new baselines with
+--save-baseline before changing the code when moving to another one.
+
+Usage:
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --only caesar_encrypt caesar_decrypt
+    python -m benchmarks.hot_paths --save-baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from additional_functions import VirtualClock, headless_io, use_io
+from adventure import AdventureGame, MAX_MOVES
+from benchmarks.event_store import log_event_list, sample_events
+from benchmarks.world_loading import synthetic_world
+from game_entities import CaesarCipher, ItemCollection
+from game_world import WorldTemplate, clear_world_cache
+from proj1_simulation import AdventureGameSimulation, run_headless
+
+# The file that baselines are stored in
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# The format version of baseline files
+BASELINE_VERSION = 2
+
+# How many times slower than its baseline a benchmark may be before it is a regression, unless it has a
+# threshold of its own
+DEFAULT_THRESHOLD = 1.5
+
+# The number of timed runs of each benchmark, of which the median is kept
+DEFAULT_REPEATS = 7
+
+# The sizes of the large inputs
+WORLD_SIZE = 10_000
+EVENT_COUNT = 100_000
+LARGE_LOG_SIZE = 1_000_000
+CIPHER_TEXT_SIZE = 1 << 18
+
+# The winning walkthrough from proj1_simulation
+WIN_WALKTHROUGH = [
+    "look at desk", "pickup note", "pickup phone", "return to dorm", "search cabinet",
+    "pickup starbucks receipt", "go outside", "go east", "go to second floor", "go outside", "go west",
+    "find coach carter", "go outside", "go east", "go to second floor", "go to starbucks", "talk to the barista",
+    "go to common room", "ask the librarian", "go to first floor", "go outside", "go north",
+    "go to the lost and found", "go to cssu lounge", "eavesdrop on the students", "check table light",
+    "go to the lost and found", "unlock door", "go outside", "go outside", "go south", "drop", "drop", "drop",
+    "drop"]
+
+# Every line a player types to win the real game along the shortest route, including the answers to the puzzles'
+# questions, when the treadmill is timed by a VirtualClock with a step of 10 seconds. The game is won with a
+# score of 65 and 19 moves left.
+HEADLESS_WIN_SCRIPT = [
+    "go outside", "go east", "go to second floor", "go to second floor", "go to common room", "ask the librarian", "",
+    "binary, twin, pair, clone", "conclave, wicked, anora, nosferatu",
+    "octopus, arachnids, octagon, medium pizza slices", "way ticket, size fits all, night stand, hit wonder", "212789",
+    "go to starbucks", "talk to the barista", "mug", "7069", "yes", "cat", "green", "pink", "uoft",
+    "go to first floor", "go outside", "go west", "find coach carter", "", "", "", "go outside", "go north",
+    "go to the lost and found", "unlock door", "20", "", "go outside", "go outside", "go south", "drop", "t-card",
+    "drop", "lucky mug", "drop", "laptop charger", "drop", "usb drive", "SUBMIT PROJECT"]
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """A hot path of the game to time.
+
+    Instance Attributes:
+        - name: the name the benchmark is reported and stored under.
+        - description: what one run of the benchmark does.
+        - setup: a function that takes the game data file, prepares everything the benchmark needs, and returns
+                 a function that does one run.
+        - threshold: how many times slower than its baseline the benchmark may be before it is a regression.
+
+    Representation Invariants:
+        - self.threshold >= 1
+    """
+    name: str
+    description: str
+    setup: Callable[[str], Callable[[], Any]]
+    threshold: float = DEFAULT_THRESHOLD
+
+
+def _load_game_data_cold(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that loads the game data from its file, with no world cached."""
+    def run() -> Any:
+        """Forget the cached world and load the game data."""
+        clear_world_cache()
+        return AdventureGame._load_game_data(game_data_file)
+
+    return run
+
+
+def _load_game_data_warm(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that loads the game data for a new game, with the world already cached."""
+    AdventureGame._load_game_data(game_data_file)
+    return lambda: AdventureGame._load_game_data(game_data_file)
+
+
+def _assign_location_items(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that gives every location of a synthetic world its Item objects."""
+    game = AdventureGame(game_data_file, 1, MAX_MOVES)
+    world = WorldTemplate.from_data(synthetic_world(WORLD_SIZE))
+    game_locations, items = world.new_game_data()
+    locations = {loc_id: game_locations[loc_id] for loc_id in world.locations}
+    return lambda: game.assign_location_items(locations, items)
+
+
+def _move(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that moves the player out of the dorm and back with handle_non_menu_choice."""
+    game = AdventureGame(game_data_file, 1, MAX_MOVES)
+    dorm, circle = game.get_location(1), game.get_location(2)
+
+    def run() -> None:
+        """Go outside and back."""
+        game.current_location_id = 1
+        game.handle_non_menu_choice("go outside", dorm)
+        game.handle_non_menu_choice("go south", circle)
+
+    return run
+
+
+def _pickup(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that picks up the phone with handle_non_menu_choice, then puts it back."""
+    game = AdventureGame(game_data_file, 1, MAX_MOVES)
+    desk = game.get_location(9)
+    game.current_location_id = 9
+
+    def run() -> None:
+        """Pick up the phone and put it back."""
+        game.handle_non_menu_choice("pickup phone", desk)
+        phone = game.inventory.pop()
+        desk.items.append(phone)
+
+    return run
+
+
+def _special_action(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that carries out a special action with handle_non_menu_choice."""
+    game = AdventureGame(game_data_file, 1, MAX_MOVES)
+    lounge = game.get_location(11)
+    game.current_location_id = 11
+    return lambda: game.handle_non_menu_choice("eavesdrop on the students", lounge)
+
+
+def _handle_pickup_item(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that picks up the phone with Location.handle_pickup_item, then puts it back."""
+    game = AdventureGame(game_data_file, 1, MAX_MOVES)
+    desk = game.get_location(9)
+    inventory = ItemCollection()
+
+    def run() -> None:
+        """Pick up the phone and put it back."""
+        desk.items.append(desk.handle_pickup_item("pickup phone", inventory))
+        inventory.pop()
+
+    return run
+
+
+def _add_events(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that logs EVENT_COUNT events in a new EventList."""
+    samples = sample_events(game_data_file)
+    return lambda: log_event_list(EVENT_COUNT, samples)
+
+
+def _get_id_log(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that lists the location ids of an EventList of LARGE_LOG_SIZE events."""
+    events = log_event_list(LARGE_LOG_SIZE, sample_events(game_data_file))
+    return events.get_id_log
+
+
+def _caesar_encrypt(_: str) -> Callable[[], Any]:
+    """Return a function that encrypts CIPHER_TEXT_SIZE characters of text with a CaesarCipher."""
+    cipher = CaesarCipher(7, "")
+    text = _cipher_text()
+    return lambda: cipher.encrypt(text)
+
+
+def _caesar_decrypt(_: str) -> Callable[[], Any]:
+    """Return a function that decrypts CIPHER_TEXT_SIZE characters of text with a CaesarCipher."""
+    cipher = CaesarCipher(7, "")
+    text = cipher.encrypt(_cipher_text())
+    return lambda: cipher.decrypt(text, 7)
+
+
+def _caesar_crack(_: str) -> Callable[[], Any]:
+    """Return a function that finds the shift of CIPHER_TEXT_SIZE characters of encrypted text by frequency
+    analysis."""
+    text = CaesarCipher(7, "").encrypt(_cipher_text())
+    return lambda: CaesarCipher.crack(text)
+
+
+def _cipher_text() -> str:
+    """Return CIPHER_TEXT_SIZE characters of text with letters, spaces and punctuation."""
+    sentence = "Hello World, meet me at the Lost and Found at 4 PM! "
+    return (sentence * (CIPHER_TEXT_SIZE // len(sentence) + 1))[:CIPHER_TEXT_SIZE]
+
+
+def _walkthrough_simulation(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that replays the winning walkthrough with AdventureGameSimulation."""
+    return lambda: AdventureGameSimulation(game_data_file, 1, WIN_WALKTHROUGH, MAX_MOVES)
+
+
+def _walkthrough_headless(game_data_file: str) -> Callable[[], Any]:
+    """Return a function that plays the real game headlessly with HEADLESS_WIN_SCRIPT, after checking that the
+    script wins the game in the given file."""
+    result = run_headless(game_data_file, HEADLESS_WIN_SCRIPT, clock=VirtualClock(step=10.0))
+    assert not result.ongoing and result.moves_left > 0, "HEADLESS_WIN_SCRIPT no longer wins the game"
+    return lambda: run_headless(game_data_file, HEADLESS_WIN_SCRIPT, clock=VirtualClock(step=10.0))
+
+
+BENCHMARKS = [
+    Benchmark("load_game_data_cold", "load game_data.json with no world cached", _load_game_data_cold),
+    Benchmark("load_game_data_warm", "load the game data of a new game from the cached world", _load_game_data_warm),
+    Benchmark("assign_location_items", f"give {WORLD_SIZE} locations their items", _assign_location_items),
+    Benchmark("handle_move", "handle_non_menu_choice: go outside and back", _move),
+    Benchmark("handle_pickup", "handle_non_menu_choice: pick up an item and put it back", _pickup),
+    Benchmark("handle_special_action", "handle_non_menu_choice: a special action", _special_action),
+    Benchmark("handle_pickup_item", "Location.handle_pickup_item and put the item back", _handle_pickup_item),
+    Benchmark("event_list_add_event", f"log {EVENT_COUNT} events in an EventList", _add_events),
+    Benchmark("event_list_get_id_log", f"get_id_log of {LARGE_LOG_SIZE} events", _get_id_log),
+    Benchmark("caesar_encrypt", f"encrypt {CIPHER_TEXT_SIZE} characters", _caesar_encrypt),
+    Benchmark("caesar_decrypt", f"decrypt {CIPHER_TEXT_SIZE} characters", _caesar_decrypt),
+    Benchmark("caesar_crack", f"crack the shift of {CIPHER_TEXT_SIZE} characters", _caesar_crack),
+    Benchmark("walkthrough_simulation", "replay the winning walkthrough with AdventureGameSimulation",
+              _walkthrough_simulation),
+    Benchmark("walkthrough_headless", "win the real game with run_headless, answering every puzzle",
+              _walkthrough_headless, threshold=2.0)
+]
+
+
+def reference_loop() -> int:
+    """Do a fixed amount of plain Python work, of the kinds the game does most, that the benchmarks are timed
+    against."""
+    counts = {}
+    for i in range(2_000):
+        word = str(i)
+        counts[word[-1]] = counts.get(word[-1], 0) + len(word)
+    return sum(counts.values())
+
+
+def run_benchmarks(benchmarks: list[Benchmark], game_data_file: str = 'game_data.json',
+                   repeats: int = DEFAULT_REPEATS) -> tuple[dict[str, float], float]:
+    """Return the time of one run of each of the given benchmarks, by name, as a multiple of the time of one
+    run of the reference loop, and the median time of one run of the reference loop, in seconds."""
+    reference = timeit.Timer(reference_loop)
+    reference_number, _ = reference.autorange()
+    reference_times = []
+    results = {}
+    with use_io(headless_io([])):
+        for benchmark in benchmarks:
+            timer = timeit.Timer(benchmark.setup(game_data_file))
+            number, _ = timer.autorange()
+            ratios = []
+            for _ in range(repeats):
+                reference_times.append(reference.timeit(reference_number) / reference_number)
+                ratios.append(timer.timeit(number) / number / reference_times[-1])
+            results[benchmark.name] = statistics.median(ratios)
+    return results, statistics.median(reference_times) if reference_times else 0.0
+
+
+def machine() -> str:
+    """Return a description of the Python version and platform that benchmarks are being run on."""
+    return f"{platform.python_implementation()} {platform.python_version()} on {platform.platform()}"
+
+
+def load_baseline(filename: str = BASELINE_FILE) -> dict[str, Any]:
+    """Return the baseline stored in the file with the given filename, or an empty one if there is no such file.
+
+    Raise a ValueError if the file is not a baseline of this version.
+    """
+    if not os.path.exists(filename):
+        return {'version': BASELINE_VERSION, 'machine': None, 'results': {}}
+    with open(filename, 'r') as f:
+        baseline = json.load(f)
+    if not isinstance(baseline, dict) or baseline.get('version') != BASELINE_VERSION:
+        raise ValueError(f"{filename} is not a benchmark baseline of the current version.")
+    return baseline
+
+
+def save_baseline(results: dict[str, float], filename: str = BASELINE_FILE) -> None:
+    """Store the given results as the baseline in the file with the given filename, keeping the baselines of
+    benchmarks that weren't run."""
+    baseline = load_baseline(filename)
+    baseline['machine'] = machine()
+    baseline['results'].update(results)
+    with open(filename, 'w') as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def compare(benchmarks: list[Benchmark], results: dict[str, float], baseline: dict[str, float],
+            reference: float) -> tuple[list[str], list[str]]:
+    """Return the rows of a table comparing each benchmark's result with its baseline, and the names of the
+    benchmarks that regressed.
+
+    Results and baselines are multiples of the reference loop's time, which was reference seconds in the run that
+    the results are from, and are shown as the times they stand for in that run.
+
+    >>> rows, regressed = compare([Benchmark("b", "", lambda _: None)], {"b": 4.0}, {"b": 2.0}, 0.001)
+    >>> rows[1]
+    'b                                2.000 ms     4.000 ms   2.00x  REGRESSION'
+    >>> regressed
+    ['b']
+    """
+    rows = [f"{'benchmark':<28}{'baseline':>13}{'current':>13}{'ratio':>8}  status"]
+    regressed = []
+    for benchmark in benchmarks:
+        current = results[benchmark.name] * reference
+        if benchmark.name not in baseline:
+            rows.append(f"{benchmark.name:<28}{'-':>13}{_format_time(current):>13}{'-':>8}  new")
+            continue
+        before = baseline[benchmark.name] * reference
+
+        ratio = current / before
+        if ratio > benchmark.threshold:
+            status = "REGRESSION"
+            regressed.append(benchmark.name)
+        elif ratio < 1 / benchmark.threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append(f"{benchmark.name:<28}{_format_time(before):>13}{_format_time(current):>13}{ratio:>7.2f}x  "
+                    f"{status}")
+    return rows, regressed
+
+
+def _format_time(seconds: float) -> str:
+    """Return the given time in the most readable unit."""
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    elif seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.3f} us"
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the hot path benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="Time the game's hot paths and compare them with the baseline.")
+    parser.add_argument("--only", nargs="+", metavar="NAME", choices=[benchmark.name for benchmark in BENCHMARKS],
+                        help="the benchmarks to run, instead of all of them")
+    parser.add_argument("--game-data", default="game_data.json", help="the game data file to play")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help="the number of timed runs of each benchmark, of which the median is kept")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="the file the baselines are stored in")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the new baselines instead of comparing with the old ones")
+    args = parser.parse_args(argv)
+
+    benchmarks = [benchmark for benchmark in BENCHMARKS if args.only is None or benchmark.name in args.only]
+    baseline = load_baseline(args.baseline)
+    results, reference = run_benchmarks(benchmarks, args.game_data, args.repeats)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+
+    rows, regressed = compare(benchmarks, results, baseline['results'], reference)
+    print("\n".join(rows))
+    if baseline['machine'] is not None and baseline['machine'] != machine():
+        print(f"\nThe baselines were measured with {baseline['machine']}, not {machine()}.")
+    if args.save_baseline:
+        print(f"\nStored the results as the baselines in {args.baseline}.")
+    elif regressed:
+        print(f"\n{len(regressed)} benchmark(s) regressed: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
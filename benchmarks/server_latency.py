@@ -0,0 +1,117 @@
+"""CSC111 Project 1: Text Adventure Game - Server Latency Benchmark
+
+This module contains a load-generating client for game_server, and a benchmark that starts a server in a
+separate process, connects a given number of simulated players to it, and reports the 50th and 99th
+percentile time between a player sending a command and receiving their next prompt. The server's own output is
+discarded; the benchmark knows the server is ready once it accepts a connection.
+
+Usage:
+    python -m benchmarks.server_latency --sessions 1000 5000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional
+
+# Every prompt for a new command ends with this, so a client knows the server has finished answering
+ACTION_PROMPT = b"Enter action: "
+
+# The longest time, in seconds, to wait for the server to start listening
+STARTUP_TIMEOUT = 30.0
+
+# The commands each simulated player cycles through. Menu commands don't use up moves, so a player can keep
+# sending them for as long as the benchmark runs.
+LOAD_COMMANDS = ["look", "score", "inventory", "moves"]
+
+
+async def run_player(host: str, port: int, turns: int, latencies: list[float],
+                     connected: asyncio.Semaphore) -> None:
+    """Connect one simulated player to the server, send it turns commands, and record the latency of each one
+    in latencies, in seconds.
+
+    connected limits how many players may be opening their connections at once.
+    """
+    async with connected:
+        reader, writer = await asyncio.open_connection(host, port)
+        await reader.readuntil(ACTION_PROMPT)
+
+    try:
+        for turn in range(turns):
+            command = LOAD_COMMANDS[turn % len(LOAD_COMMANDS)]
+            start = time.perf_counter()
+            writer.write(command.encode("utf-8") + b"\n")
+            await reader.readuntil(ACTION_PROMPT)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, sessions: int, turns: int) -> list[float]:
+    """Run the given number of simulated players against the server at once, and return every latency."""
+    latencies = []
+    connected = asyncio.Semaphore(256)
+    await asyncio.gather(*(run_player(host, port, turns, latencies, connected) for _ in range(sessions)))
+    return latencies
+
+
+def wait_for_server(host: str, port: int, server: subprocess.Popen, timeout: float = STARTUP_TIMEOUT) -> None:
+    """Wait until the given server process accepts connections on the given host and port.
+
+    Raise a RuntimeError if the server exits, or doesn't start listening within timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=1.0):
+                return
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError(f"The server exited with status {server.returncode} before it was listening.")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"The server wasn't listening on {host}:{port} after {timeout} seconds.")
+            time.sleep(0.1)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the value at the given fraction of the way through the sorted values.
+
+    Preconditions:
+        - values != []
+        - 0 <= fraction <= 1
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the server latency benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Measure game_server command latency under load.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 5000, 10000],
+                        help="the numbers of concurrent players to measure")
+    parser.add_argument("--turns", type=int, default=20, help="the number of commands each player sends")
+    parser.add_argument("--port", type=int, default=4765, help="the port to run the server on")
+    args = parser.parse_args(argv)
+
+    server = subprocess.Popen([sys.executable, "game_server.py", "--port", str(args.port)],
+                              stdout=subprocess.DEVNULL)
+    try:
+        wait_for_server("127.0.0.1", args.port, server)
+
+        print(f"{'sessions':>10} {'commands':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'mean (ms)':>10}")
+        for sessions in args.sessions:
+            latencies = asyncio.run(run_load("127.0.0.1", args.port, sessions, args.turns))
+            print(f"{sessions:>10} {len(latencies):>10} {percentile(latencies, 0.5) * 1000:>10.2f} "
+                  f"{percentile(latencies, 0.99) * 1000:>10.2f} {statistics.mean(latencies) * 1000:>10.2f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""CSC111 Project 1: Text Adventure Game - World Loading Benchmark
+
+This module compares how long it takes to start a game from a JSON game data file and from the same world
+compiled with compiled_world, for game_data.json and for synthetic worlds with many locations.
+
+Usage:
+    python -m benchmarks.world_loading --sizes 1000 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+from adventure import AdventureGame, MAX_MOVES
+from compiled_world import compile_world
+from game_world import clear_world_cache
+
+
+def synthetic_world(size: int) -> dict[str, Any]:
+    """Return game data for a world of the given number of locations, joined in a ring, each with a few
+    paragraphs of description and one item.
+
+    Preconditions:
+        - size >= 2
+    """
+    locations = []
+    for loc_id in range(1, size + 1):
+        locations.append({
+            "id_num": loc_id,
+            "name": f"Room {loc_id}",
+            "brief_description": f"You are back in room {loc_id}.",
+            "long_description": f"Room {loc_id} is one of many identical rooms. " * 8,
+            "available_commands": {"go forward": loc_id % size + 1, "go back": (loc_id - 2) % size + 1,
+                                   f"pickup token {loc_id}": None},
+            "items": [loc_id],
+            "visited": False,
+            "sub_locations": None
+        })
+
+    items = [{"name": f"token {loc_id}", "id_num": loc_id, "description": f"A token from room {loc_id}.",
+              "start_position": loc_id, "target_position": 1} for loc_id in range(1, size + 1)]
+    return {"locations": locations, "items": items}
+
+
+def time_startup(filename: str, repeats: int) -> float:
+    """Return the best time, in seconds, of repeats attempts to load the given file from scratch, start a game
+    in it and show its first location."""
+    best = float("inf")
+    for _ in range(repeats):
+        clear_world_cache()
+        start = time.perf_counter()
+        game = AdventureGame(filename, 1, MAX_MOVES)
+        _ = game.get_location().long_description
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the world loading benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Compare game startup from JSON and compiled worlds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000],
+                        help="the numbers of locations in the synthetic worlds to measure")
+    parser.add_argument("--repeats", type=int, default=5, help="the number of times to measure each world")
+    args = parser.parse_args(argv)
+
+    print(f"{'world':>20} {'json (ms)':>12} {'compiled (ms)':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        worlds = [("game_data.json", "game_data.json")]
+        for size in args.sizes:
+            filename = os.path.join(directory, f"synthetic_{size}.json")
+            with open(filename, 'w') as f:
+                json.dump(synthetic_world(size), f)
+            worlds.append((f"{size} locations", filename))
+
+        for label, json_filename in worlds:
+            compiled_filename = os.path.join(directory, os.path.basename(json_filename) + ".world")
+            compile_world(json_filename, compiled_filename)
+
+            json_time = time_startup(json_filename, args.repeats)
+            compiled_time = time_startup(compiled_filename, args.repeats)
+            print(f"{label:>20} {json_time * 1000:>12.3f} {compiled_time * 1000:>14.3f} "
+                  f"{json_time / compiled_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
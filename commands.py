@@ -0,0 +1,98 @@
+"""CSC111 Project 1: Text Adventure Game - Commands
+
+This module compiles the commands available at a location into a CommandTable, which finds the command that
+the player typed in constant time. Tables are built once per location in each world and shared by every game
+(see game_world.LocationTemplate.command_table), so reading a command never rebuilds anything.
+
+Besides exact matches, a table knows every prefix of its commands, so the player can abbreviate a command as
+long as the abbreviation is unambiguous, and can be told which commands they may have meant.
+"""
+from __future__ import annotations
+
+import difflib
+from typing import Iterable, Optional
+
+
+def normalize_command(text: str) -> str:
+    """Return the given command in the form used to look it up.
+
+    >>> normalize_command("  Go   North ")
+    'go north'
+    """
+    return " ".join(text.lower().split())
+
+
+class CommandTable:
+    """The commands available somewhere in the game, compiled for fast lookup.
+
+    Instance Attributes:
+        - commands: the commands in this table, in their original form and order.
+
+    Representation Invariants:
+        - all(self.lookup(command) == command for command in self.commands)
+
+    >>> table = CommandTable(["go north", "go south", "look at desk"])
+    >>> table.lookup("Go North")
+    'go north'
+    >>> table.complete("go")
+    ('go north', 'go south')
+    >>> table.complete("look")
+    ('look at desk',)
+    """
+    # Private Instance Attributes:
+    #   - _exact: each command in this table by its normalized form.
+    #   - _prefixes: the commands that start with each prefix of a normalized command in this table. This is a
+    #                prefix trie flattened into a single dictionary, so a prefix is found with one lookup.
+    commands: tuple[str, ...]
+    _exact: dict[str, str]
+    _prefixes: dict[str, tuple[str, ...]]
+
+    def __init__(self, commands: Iterable[str]) -> None:
+        """Initialize a new table of the given commands."""
+        self.commands = tuple(commands)
+        self._exact = {}
+        prefixes = {}
+        for command in self.commands:
+            normalized = normalize_command(command)
+            if normalized in self._exact:
+                continue
+            self._exact[normalized] = command
+            for end in range(1, len(normalized) + 1):
+                prefixes.setdefault(normalized[:end], []).append(command)
+
+        self._prefixes = {prefix: tuple(matches) for prefix, matches in prefixes.items()}
+
+    def __contains__(self, text: str) -> bool:
+        """Return whether the given text is exactly one of the commands in this table, ignoring case and spacing."""
+        return normalize_command(text) in self._exact
+
+    def __len__(self) -> int:
+        """Return the number of commands in this table."""
+        return len(self.commands)
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Return the command that the given text is, ignoring case and spacing, or None if it is none of them."""
+        return self._exact.get(normalize_command(text))
+
+    def complete(self, text: str) -> tuple[str, ...]:
+        """Return the commands in this table that start with the given text, ignoring case and spacing."""
+        return self._prefixes.get(normalize_command(text), ())
+
+    def suggest(self, text: str, limit: int = 3) -> list[str]:
+        """Return up to limit commands in this table that the given text may have been meant to be, closest first.
+
+        Commands that start with the text come first, followed by commands that are spelled similarly.
+        """
+        matches = list(self.complete(text)[:limit])
+        if len(matches) < limit:
+            similar = difflib.get_close_matches(normalize_command(text), self._exact, n=limit)
+            matches.extend(self._exact[match] for match in similar if self._exact[match] not in matches)
+        return matches[:limit]
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
@@ -0,0 +1,471 @@
+"""CSC111 Project 1: Text Adventure Game - Compiled Worlds
+
+This module compiles game data JSON files into a compact binary format that starts up much faster, since it is
+memory-mapped rather than parsed and only the locations a game actually uses are ever decoded. A compiled file
+can be used anywhere a JSON game data file can (see game_world.load_world).
+
+The file is made up of, in order:
+    - a header (HEADER), giving the number of records in each of the sections below and where each one starts
+    - one fixed-width LOCATION record per location, sorted by id so that a location can be found by binary search
+    - one fixed-width ITEM record per item, sorted by id
+    - one fixed-width COMMAND record per command; each location's commands are consecutive and in their
+      original order
+    - an array of 4-byte ids, holding the item ids and sublocation ids of every location
+    - a string table of UTF-8 text; every string above is stored as an (offset, length) pair into it, and
+      repeated strings are stored only once (in very large worlds, only the most recent million are checked
+      for repeats). The header also points into it for the world's "puzzles" list, stored as JSON text, which
+      is null if the world declares no puzzles (see puzzle_registry)
+
+All numbers are little-endian. A missing (null) value is marked with the NONE sentinel. Since string offsets and
+lengths are 4 bytes, a string table holds at most MAX_TEXT_SIZE bytes of text, and worlds with more can't be
+compiled.
+
+Usage:
+    python compiled_world.py game_data.json game_data.world
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+from types import MappingProxyType
+from typing import Any, BinaryIO, Iterator, Mapping, Optional
+
+from descriptions import TextBlob
+from game_entities import Item
+from game_world import LocationTemplate, WorldTemplate
+from puzzle_registry import puzzles_from_data
+
+MAGIC = b"ADVW"
+VERSION = 2
+
+# The most bytes of text that a string table can hold, since its offsets and lengths are unsigned 4-byte numbers
+MAX_TEXT_SIZE = 2 ** 32 - 1
+
+# Stands in for a missing id, destination or list
+NONE = -(2 ** 31)
+
+# magic, version, location count, item count, command count, id count,
+# the offsets of the location, item, command, id and string sections, and the puzzles (offset and length)
+HEADER = struct.Struct("<4sHIIIIQQQQQII")
+
+# id, name, brief description, long description (each an offset and length), first command, command count,
+# first item id, item id count, first sublocation id, sublocation id count, visited
+LOCATION = struct.Struct("<iIIIIIIIIiIiI?")
+
+# id, name, description (each an offset and length), start position, target position
+ITEM = struct.Struct("<iIIIIii")
+
+# command name (offset and length), destination
+COMMAND = struct.Struct("<IIi")
+
+ID = struct.Struct("<i")
+
+
+class _StringTable:
+    """The string table of a world being compiled.
+
+    Instance Attributes:
+        - file: the file that the table's text is written to.
+        - size: the number of bytes of text written to the table so far.
+        - max_refs: the most strings whose place in the table is remembered, so that repeats of them are not
+                    written again. When there are more, they are forgotten and the table starts remembering anew.
+    """
+    # Private Instance Attributes:
+    #   - _refs: the (offset, length) of the strings written to the table that are remembered.
+    file: BinaryIO
+    size: int
+    max_refs: int
+    _refs: dict[str, tuple[int, int]]
+
+    def __init__(self, f: BinaryIO, max_refs: int) -> None:
+        """Initialize a new empty string table that writes its text to the given file."""
+        self.size = 0
+        self.max_refs = max_refs
+        self.file = f
+        self._refs = {}
+
+    def add(self, text: str) -> tuple[int, int]:
+        """Add the given string to the table if it is not there already, and return its (offset, length).
+
+        Raise a ValueError if the table would then hold more than MAX_TEXT_SIZE bytes of text.
+        """
+        if text not in self._refs:
+            if len(self._refs) >= self.max_refs:
+                self._refs.clear()
+            encoded = text.encode("utf-8")
+            if self.size + len(encoded) > MAX_TEXT_SIZE:
+                raise ValueError(f"This world has more than {MAX_TEXT_SIZE} bytes of text, the most that a "
+                                 f"compiled world can hold.")
+            self._refs[text] = (self.size, len(encoded))
+            self.file.write(encoded)
+            self.size += len(encoded)
+        return self._refs[text]
+
+
+def _optional(value: Optional[int]) -> int:
+    """Return the given value, or NONE if it is None."""
+    return NONE if value is None else value
+
+
+class CompiledWorldWriter:
+    """A writer of a compiled world, which takes its locations and items one at a time.
+
+    Only the strings that the writer remembers (see _StringTable) are held in memory; every section of the
+    file is written to a temporary file as it is built, and they are all copied into the compiled file when the
+    writer is closed. So a world can be compiled as it is generated, however large it is.
+
+    Instance Attributes:
+        - location_count, item_count, command_count, id_count: the number of records written to each section
+          so far.
+    """
+    # Private Instance Attributes:
+    #   - _file: the compiled file being written.
+    #   - _locations, _items, _commands, _ids: the temporary files that each section is written to.
+    #   - _strings: the string table.
+    #   - _last_location_id, _last_item_id: the ids of the last location and item added, or None if there are
+    #                                       none yet.
+    #   - _puzzles: the world's "puzzles" list, or None if it declares no puzzles.
+    location_count: int
+    item_count: int
+    command_count: int
+    id_count: int
+    _file: BinaryIO
+    _locations: BinaryIO
+    _items: BinaryIO
+    _commands: BinaryIO
+    _ids: BinaryIO
+    _strings: _StringTable
+    _last_location_id: Optional[int]
+    _last_item_id: Optional[int]
+    _puzzles: Optional[list[dict[str, Any]]]
+
+    def __init__(self, f: BinaryIO, max_strings: int = 1_000_000) -> None:
+        """Initialize a writer of a compiled world to the given binary file, which remembers up to max_strings
+        strings so that repeats of them are stored only once."""
+        self._file = f
+        self._locations, self._items, self._commands, self._ids = (tempfile.TemporaryFile() for _ in range(4))
+        self._strings = _StringTable(tempfile.TemporaryFile(), max_strings)
+        self.location_count = self.item_count = self.command_count = self.id_count = 0
+        self._last_location_id = self._last_item_id = None
+        self._puzzles = None
+
+    def add_location(self, loc_data: dict[str, Any]) -> None:
+        """Add the location with the given game data to the world.
+
+        Raise a ValueError if its id is not greater than the id of every location added before it, since
+        compiled locations are sorted by id, or if its text doesn't fit in the string table (see MAX_TEXT_SIZE).
+        """
+        if self._last_location_id is not None and loc_data['id_num'] <= self._last_location_id:
+            raise ValueError("Locations must be added in increasing order of id.")
+        self._last_location_id = loc_data['id_num']
+
+        first_command = self.command_count
+        for command, destination in loc_data['available_commands'].items():
+            self._commands.write(COMMAND.pack(*self._strings.add(command), _optional(destination)))
+            self.command_count += 1
+
+        self._locations.write(LOCATION.pack(loc_data['id_num'], *self._strings.add(loc_data['name']),
+                                            *self._strings.add(loc_data['brief_description']),
+                                            *self._strings.add(loc_data['long_description']),
+                                            first_command, self.command_count - first_command,
+                                            *self._add_ids(loc_data['items']),
+                                            *self._add_ids(loc_data['sub_locations']), loc_data['visited']))
+        self.location_count += 1
+
+    def add_item(self, item_data: dict[str, Any]) -> None:
+        """Add the item with the given game data to the world.
+
+        Raise a ValueError if its id is not greater than the id of every item added before it, or if its text
+        doesn't fit in the string table.
+        """
+        if self._last_item_id is not None and item_data['id_num'] <= self._last_item_id:
+            raise ValueError("Items must be added in increasing order of id.")
+        self._last_item_id = item_data['id_num']
+
+        self._items.write(ITEM.pack(item_data['id_num'], *self._strings.add(item_data['name']),
+                                    *self._strings.add(item_data['description']), item_data['start_position'],
+                                    _optional(item_data['target_position'])))
+        self.item_count += 1
+
+    def set_puzzles(self, puzzles: Optional[list[dict[str, Any]]]) -> None:
+        """Declare the given "puzzles" list as the world's puzzles, or declare none if puzzles is None."""
+        self._puzzles = puzzles
+
+    def close(self) -> None:
+        """Write the compiled world to its file and discard the temporary files."""
+        puzzles = self._strings.add(json.dumps(self._puzzles))
+        sections = [self._locations, self._items, self._commands, self._ids, self._strings.file]
+        offsets = []
+        offset = HEADER.size
+        for section in sections:
+            offsets.append(offset)
+            offset += section.tell()
+
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.location_count, self.item_count, self.command_count,
+                                     self.id_count, *offsets, *puzzles))
+        for section in sections:
+            section.seek(0)
+            shutil.copyfileobj(section, self._file)
+            section.close()
+
+    def _add_ids(self, values: Optional[list[int]]) -> tuple[int, int]:
+        """Append the given ids to the id array and return (first, count), with first NONE if values is None."""
+        if values is None:
+            return NONE, 0
+        for value in values:
+            self._ids.write(ID.pack(value))
+        self.id_count += len(values)
+        return self.id_count - len(values), len(values)
+
+
+def compile_data(data: dict[str, Any]) -> bytes:
+    """Return the compiled form of the given parsed game data."""
+    f = io.BytesIO()
+    writer = CompiledWorldWriter(f)
+    for loc_data in sorted(data['locations'], key=lambda loc: loc['id_num']):
+        writer.add_location(loc_data)
+    for item_data in sorted(data['items'], key=lambda item: item['id_num']):
+        writer.add_item(item_data)
+    writer.set_puzzles(data.get('puzzles'))
+    writer.close()
+    return f.getvalue()
+
+
+def compile_world(json_filename: str, compiled_filename: str) -> None:
+    """Compile the game data JSON file with the given name into a compiled world file with the given name."""
+    with open(json_filename, 'r') as f:
+        data = json.load(f)
+
+    with open(compiled_filename, 'wb') as f:
+        f.write(compile_data(data))
+
+
+def is_compiled(filename: str) -> bool:
+    """Return whether the file with the given name is a compiled world."""
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class CompiledLocations(Mapping[int, LocationTemplate]):
+    """The location templates of a compiled world, read from its memory-mapped file.
+
+    A location's record is only decoded the first time it is looked up, and found by binary search, so opening
+    a world costs the same however many locations it has.
+    """
+    # Private Instance Attributes:
+    #   - _data: the contents of the compiled file.
+    #   - _count: the number of locations in the world.
+    #   - _location_offset, _command_offset, _id_offset, _string_offset: where each section of the file starts.
+    #   - _text: the string table, as a blob that the locations' descriptions are read from.
+    #   - _decoded: the templates of every location looked up so far, by id.
+    _data: mmap.mmap
+    _count: int
+    _location_offset: int
+    _command_offset: int
+    _id_offset: int
+    _string_offset: int
+    _text: TextBlob
+    _decoded: dict[int, LocationTemplate]
+
+    def __init__(self, data: mmap.mmap, count: int, location_offset: int, command_offset: int, id_offset: int,
+                 string_offset: int) -> None:
+        """Initialize the locations of the compiled world with the given contents and layout."""
+        self._data = data
+        self._count = count
+        self._location_offset = location_offset
+        self._command_offset = command_offset
+        self._id_offset = id_offset
+        self._string_offset = string_offset
+        self._text = TextBlob(data, string_offset)
+        self._decoded = {}
+
+    def __getitem__(self, loc_id: int) -> LocationTemplate:
+        """Return the template of the location with the given id, or raise a KeyError if there is none."""
+        if loc_id in self._decoded:
+            return self._decoded[loc_id]
+
+        index = _find_record(self._data, self._location_offset, LOCATION.size, self._count, loc_id)
+        if index is None:
+            raise KeyError(loc_id)
+
+        template = self._decode(index)
+        self._decoded[loc_id] = template
+        return template
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the ids of every location in the world, in increasing order."""
+        for index in range(self._count):
+            yield ID.unpack_from(self._data, self._location_offset + index * LOCATION.size)[0]
+
+    def __len__(self) -> int:
+        """Return the number of locations in the world."""
+        return self._count
+
+    def outlines(self) -> Iterator[tuple[int, dict[str, Optional[int]], Optional[tuple[int, ...]],
+                                         Optional[tuple[int, ...]]]]:
+        """Iterate over the id, commands, item ids and sublocation ids of every location in the world, in
+        increasing order of id.
+
+        Every record is read in one pass, without binary searches or making templates, and each command's text is
+        decoded only once however many locations have it, so this is how to go over a whole world (see
+        world_validator).
+        """
+        strings = {}
+        unpack_command = COMMAND.unpack_from
+        with memoryview(self._data) as view:
+            records = view[self._location_offset:self._location_offset + self._count * LOCATION.size]
+            for (loc_id, _, _, _, _, _, _, first_command, command_count, first_item, item_count, first_sub,
+                 sub_count, _) in LOCATION.iter_unpack(records):
+                commands = {}
+                command_offset = self._command_offset + first_command * COMMAND.size
+                for _ in range(command_count):
+                    text_offset, text_length, destination = unpack_command(view, command_offset)
+                    command_offset += COMMAND.size
+                    text = strings.get((text_offset, text_length))
+                    if text is None:
+                        text = strings[text_offset, text_length] = self._string(text_offset, text_length)
+                    commands[text] = None if destination == NONE else destination
+                yield (loc_id, commands, None if first_item == NONE else self._ids(first_item, item_count),
+                       None if first_sub == NONE else self._ids(first_sub, sub_count))
+            records.release()
+
+    def _decode(self, index: int) -> LocationTemplate:
+        """Decode the location record at the given index."""
+        (loc_id, name_offset, name_length, brief_offset, brief_length, long_offset, long_length, first_command,
+         command_count, first_item, item_count, first_sub, sub_count,
+         visited) = LOCATION.unpack_from(self._data, self._location_offset + index * LOCATION.size)
+
+        commands = {}
+        for command_index in range(first_command, first_command + command_count):
+            command_offset, command_length, destination = COMMAND.unpack_from(
+                self._data, self._command_offset + command_index * COMMAND.size)
+            commands[self._string(command_offset, command_length)] = None if destination == NONE else destination
+
+        return LocationTemplate(loc_id, self._string(name_offset, name_length), self._text,
+                                (brief_offset, brief_length), (long_offset, long_length), MappingProxyType(commands),
+                                self._ids(first_item, item_count), visited, self._ids(first_sub, sub_count))
+
+    def _string(self, offset: int, length: int) -> str:
+        """Return the string at the given offset and length in the string table."""
+        return _read_string(self._data, self._string_offset + offset, length)
+
+    def _ids(self, first: int, count: int) -> Optional[tuple[int, ...]]:
+        """Return the count ids starting at index first in the id array, or None if first is NONE."""
+        if first == NONE:
+            return None
+        start = self._id_offset + first * ID.size
+        return struct.unpack_from(f"<{count}i", self._data, start)
+
+
+class CompiledItems(Mapping[int, Item]):
+    """The items of a compiled world, by id, read from its memory-mapped file.
+
+    Like CompiledLocations, an item's record is only decoded the first time it is looked up.
+    """
+    # Private Instance Attributes:
+    #   - _data: the contents of the compiled file.
+    #   - _count: the number of items in the world.
+    #   - _item_offset, _string_offset: where the item and string sections of the file start.
+    #   - _decoded: every item looked up so far, by id.
+    _data: mmap.mmap
+    _count: int
+    _item_offset: int
+    _string_offset: int
+    _decoded: dict[int, Item]
+
+    def __init__(self, data: mmap.mmap, count: int, item_offset: int, string_offset: int) -> None:
+        """Initialize the items of the compiled world with the given contents and layout."""
+        self._data = data
+        self._count = count
+        self._item_offset = item_offset
+        self._string_offset = string_offset
+        self._decoded = {}
+
+    def __getitem__(self, item_id: int) -> Item:
+        """Return the item with the given id, or raise a KeyError if there is none."""
+        if item_id in self._decoded:
+            return self._decoded[item_id]
+
+        index = _find_record(self._data, self._item_offset, ITEM.size, self._count, item_id)
+        if index is None:
+            raise KeyError(item_id)
+
+        (_, name_offset, name_length, description_offset, description_length, start_position,
+         target_position) = ITEM.unpack_from(self._data, self._item_offset + index * ITEM.size)
+        item = Item(_read_string(self._data, self._string_offset + name_offset, name_length), item_id,
+                    _read_string(self._data, self._string_offset + description_offset, description_length),
+                    start_position, None if target_position == NONE else target_position)
+        self._decoded[item_id] = item
+        return item
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the ids of every item in the world, in increasing order."""
+        for index in range(self._count):
+            yield ID.unpack_from(self._data, self._item_offset + index * ITEM.size)[0]
+
+    def __len__(self) -> int:
+        """Return the number of items in the world."""
+        return self._count
+
+
+def _find_record(data: mmap.mmap, offset: int, size: int, count: int, record_id: int) -> Optional[int]:
+    """Return the index of the record with the given id among the count records of the given size starting at
+    offset in data, or None if there is none.
+
+    Preconditions:
+        - the records are sorted by id, which is their first field
+    """
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        middle_id = ID.unpack_from(data, offset + middle * size)[0]
+        if middle_id < record_id:
+            low = middle + 1
+        elif middle_id > record_id:
+            high = middle
+        else:
+            return middle
+    return None
+
+
+def _read_string(data: mmap.mmap, start: int, length: int) -> str:
+    """Return the UTF-8 string of the given length starting at the given position in data."""
+    return data[start:start + length].decode("utf-8")
+
+
+def load_compiled_world(filename: str) -> WorldTemplate:
+    """Return the world template for the compiled world file with the given name.
+
+    Raise a ValueError if the file is not a compiled world of this version.
+    """
+    with open(filename, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    (magic, version, location_count, item_count, _, _, location_offset, item_offset, command_offset, id_offset,
+     string_offset, puzzles_offset, puzzles_length) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{filename} is not a version {VERSION} compiled world.")
+
+    puzzles = json.loads(_read_string(data, string_offset + puzzles_offset, puzzles_length))
+    return WorldTemplate(
+        CompiledLocations(data, location_count, location_offset, command_offset, id_offset, string_offset),
+        CompiledItems(data, item_count, item_offset, string_offset), puzzles_from_data(puzzles))
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Compile a game data file from the command line."""
+    parser = argparse.ArgumentParser(description="Compile a game data JSON file into a compiled world file.")
+    parser.add_argument("source", help="the game data JSON file to compile")
+    parser.add_argument("target", help="the compiled world file to write")
+    args = parser.parse_args(argv)
+
+    compile_world(args.source, args.target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""CSC111 Project 1: Text Adventure Game - Connections Board Generator
+
+This module generates boards for the Connections puzzle (see game_entities.ConnectionsPuzzle) from a word bank,
+and checks that each one can only be solved one way.
+
+A word bank maps categories to more words than a board needs, and a word may belong to more than one category,
+like "Python", which is both a programming language and a snake. A board is made by choosing some categories and
+some words from each. A player may group a board's words by any category of the bank, so a board is only kept
+if there is exactly one way to split all its words into groups of one category each (see count_solutions).
+
+Boards are written as a JSON list, with each board mapping its categories to their words, and can be read back
+with load_boards.
+
+Usage:
+    python connections_generator.py boards.json --count 5000 --seed 1
+    python connections_generator.py boards.json --categories 5 --size 3 --bank connections_words.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from typing import Iterator, Mapping, Optional
+
+from game_entities import ConnectionsBoard
+
+# The word bank that boards are generated from, unless another is given
+WORD_BANK_FILE = "connections_words.json"
+
+# The number of boards that may be rejected in a row before generating gives up
+MAX_REJECTIONS = 10_000
+
+
+def load_word_bank(filename: str = WORD_BANK_FILE) -> dict[str, tuple[str, ...]]:
+    """Return the word bank in the JSON file with the given filename, mapping each category to its words."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return {category: tuple(words) for category, words in json.load(f).items()}
+
+
+def load_boards(filename: str) -> list[ConnectionsBoard]:
+    """Return the boards in the JSON file with the given filename, as written by this module.
+
+    Raise a ValueError if any of them is not a valid board (see ConnectionsBoard.from_data).
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        return [ConnectionsBoard.from_data(categories) for categories in json.load(f)]
+
+
+def memberships(bank: Mapping[str, tuple[str, ...]]) -> dict[str, frozenset[str]]:
+    """Return the categories of the given word bank that each of its words, in lowercase, belongs to.
+
+    >>> sorted(memberships({"Snakes": ("Python", "Boa"), "Languages": ("Python", "Java")})["python"])
+    ['Languages', 'Snakes']
+    """
+    result = {}
+    for category, words in bank.items():
+        for word in words:
+            result.setdefault(word.lower(), set()).add(category)
+    return {word: frozenset(categories) for word, categories in result.items()}
+
+
+def count_solutions(board: ConnectionsBoard, membership: Mapping[str, frozenset[str]], limit: int = 2) -> int:
+    """Return the number of ways to split the words of the given board into groups of board.size words that all
+    belong to the same category, with no category used twice, counting no further than limit.
+
+    Each word belongs to the categories that membership gives it, and to its own category on the board.
+
+    >>> bank = {"Snakes": ("Python", "Boa", "Cobra"), "Languages": ("Python", "Java", "Rust"),
+    ...         "Coffee": ("Java", "Latte", "Mocha")}
+    >>> board = ConnectionsBoard.from_data({"Snakes": ["Python", "Boa"], "Languages": ["Java", "Rust"]})
+    >>> count_solutions(board, memberships(bank))
+    1
+    >>> board = ConnectionsBoard.from_data({"Snakes": ["Python"], "Languages": ["Java"]})
+    >>> count_solutions(board, memberships(bank))  # Python the language and Java the coffee work too
+    2
+    """
+    words = sorted(board.word_categories)
+    belongs = {word: membership.get(word, frozenset()) | {board.word_categories[word]} for word in words}
+    return _count_splits(words, belongs, board.size, frozenset(), limit)
+
+
+def _count_splits(words: list[str], belongs: Mapping[str, frozenset[str]], size: int, used: frozenset[str],
+                  limit: int) -> int:
+    """Return the number of ways to split words into groups of size words of one category each, using none of the
+    categories in used, counting no further than limit."""
+    if not words:
+        return 1
+
+    first, rest = words[0], words[1:]
+    found = 0
+    for category in belongs[first] - used:
+        candidates = [word for word in rest if category in belongs[word]]
+        for group in _combinations(candidates, size - 1):
+            remaining = [word for word in rest if word not in group]
+            found += _count_splits(remaining, belongs, size, used | {category}, limit - found)
+            if found >= limit:
+                return found
+    return found
+
+
+def _combinations(words: list[str], count: int) -> Iterator[set[str]]:
+    """Yield every set of count of the given words."""
+    if count == 0:
+        yield set()
+        return
+    for i in range(len(words) - count + 1):
+        for group in _combinations(words[i + 1:], count - 1):
+            yield group | {words[i]}
+
+
+def generate_board(bank: Mapping[str, tuple[str, ...]], rng: random.Random, categories: int = 4,
+                   size: int = 4) -> Optional[ConnectionsBoard]:
+    """Return a board of the given number of categories chosen from bank, each with size of its words, or None
+    if the words chosen for two categories overlap.
+
+    Preconditions:
+        - 0 < categories <= len(bank)
+        - at least categories of the bank's categories have size words or more
+    """
+    eligible = sorted(category for category, words in bank.items() if len(words) >= size)
+    chosen = rng.sample(eligible, categories)
+    try:
+        return ConnectionsBoard.from_data({category: rng.sample(bank[category], size) for category in chosen})
+    except ValueError:
+        return None
+
+
+def generate_boards(bank: Mapping[str, tuple[str, ...]], count: int, rng: random.Random, categories: int = 4,
+                    size: int = 4) -> Iterator[ConnectionsBoard]:
+    """Yield count different boards generated from bank that each have exactly one solution.
+
+    Stop early if MAX_REJECTIONS boards in a row are rejected, since the bank may not have enough boards left.
+    """
+    membership = memberships(bank)
+    seen = set()
+    rejections = 0
+    while len(seen) < count and rejections < MAX_REJECTIONS:
+        board = generate_board(bank, rng, categories, size)
+        if board is None or count_solutions(board, membership) != 1:
+            rejections += 1
+            continue
+
+        key = frozenset(board.category_words.values())
+        if key in seen:
+            rejections += 1
+            continue
+        seen.add(key)
+        rejections = 0
+        yield board
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the Connections board generator from the command line."""
+    parser = argparse.ArgumentParser(description="Generate Connections boards that have exactly one solution.")
+    parser.add_argument("output", help="the JSON file to write the boards to")
+    parser.add_argument("--count", type=int, default=1000, help="the number of boards to generate")
+    parser.add_argument("--categories", type=int, default=4, help="the number of categories on each board")
+    parser.add_argument("--size", type=int, default=4, help="the number of words in each category")
+    parser.add_argument("--bank", default=WORD_BANK_FILE, help="the word bank to choose categories and words from")
+    parser.add_argument("--seed", type=int, default=None, help="the seed of the generator")
+    args = parser.parse_args(argv)
+
+    boards = list(generate_boards(load_word_bank(args.bank), args.count, random.Random(args.seed),
+                                  args.categories, args.size))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump([{category: list(words) for category, words in board.categories.items()} for board in boards],
+                  f, indent=1, ensure_ascii=False)
+    print(f"Wrote {len(boards)} board(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""CSC111 Project 1: Text Adventure Game - Descriptions
+
+This module keeps the descriptions of a world's locations out of memory until they are needed. A world's
+descriptions are stored together in a TextBlob, a single block of UTF-8 text, and each location only holds the
+(offset, length) of its own descriptions in it. For compiled worlds the blob is the memory-mapped string table
+itself, so descriptions are read straight from the file; for JSON worlds, the descriptions are packed into a
+blob when the world is loaded, so the parsed strings can be freed.
+
+Descriptions are decoded from their blob, and coloured for display, through two LRU caches shared by every game
+in the process, so a description that many players are looking at is decoded and coloured once and shared, and
+one that nobody has looked at in a while takes up no memory at all.
+"""
+from __future__ import annotations
+
+import mmap
+from functools import lru_cache
+from typing import Iterable, Union
+
+# The number of decoded descriptions, and of coloured descriptions, kept in each cache
+DESCRIPTION_CACHE_SIZE = 1024
+
+RESET = "\033[0m"
+
+
+class TextBlob:
+    """A block of UTF-8 text that strings are read from by their (offset, length) in it.
+
+    Blobs are compared and hashed by identity, so a blob can be part of a cache key.
+    """
+    # Private Instance Attributes:
+    #   - _data: the bytes that hold the blob's text.
+    #   - _base: the position in _data where the blob's text starts.
+    _data: Union[bytes, mmap.mmap]
+    _base: int
+
+    def __init__(self, data: Union[bytes, mmap.mmap], base: int = 0) -> None:
+        """Initialize a blob of the text in data from position base on."""
+        self._data = data
+        self._base = base
+
+    @staticmethod
+    def pack(strings: Iterable[str]) -> tuple[TextBlob, list[tuple[int, int]]]:
+        """Return a new blob holding the given strings, and the (offset, length) of each of them in it, in order.
+        Repeated strings are stored only once.
+
+        >>> blob, refs = TextBlob.pack(["Dorm", "Café", "Dorm"])
+        >>> refs
+        [(0, 4), (4, 5), (0, 4)]
+        >>> blob.text(*refs[1])
+        'Café'
+        """
+        data = bytearray()
+        seen = {}
+        refs = []
+        for text in strings:
+            if text not in seen:
+                encoded = text.encode("utf-8")
+                seen[text] = (len(data), len(encoded))
+                data += encoded
+            refs.append(seen[text])
+        return TextBlob(bytes(data)), refs
+
+    def text(self, offset: int, length: int) -> str:
+        """Return the string at the given offset and length in this blob."""
+        start = self._base + offset
+        return self._data[start:start + length].decode("utf-8")
+
+
+@lru_cache(maxsize=DESCRIPTION_CACHE_SIZE)
+def read_description(blob: TextBlob, offset: int, length: int) -> str:
+    """Return the description at the given offset and length in the given blob.
+
+    Recently read descriptions are cached, so games looking at the same location share one string.
+    """
+    return blob.text(offset, length)
+
+
+@lru_cache(maxsize=DESCRIPTION_CACHE_SIZE)
+def render_description(description: str, colour: str) -> str:
+    """Return the given description as it is displayed, on a new line in the given ANSI colour.
+
+    Recently rendered descriptions are cached, so each is coloured once and shared by every game showing it.
+
+    >>> render_description("You are in your dorm.", "\\033[34m") == "\\033[34m\\nYou are in your dorm.\\033[0m"
+    True
+    """
+    return f"{colour}\n{description}{RESET}"
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
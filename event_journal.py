@@ -0,0 +1,378 @@
+"""CSC111 Project 1: Text Adventure Game - Event Journal
+
+This module keeps an append-only journal of a game on disk, so that a game survives its process crashing and
+finished games can be audited later without holding them in memory.
+
+An EventJournal is attached to a game's EventList (and to the game itself, by AdventureGame), and appends a
+record for everything that happens:
+    - START: the game data file, starting location and moves the game began with
+    - SEED: the seed of the game's random choices, right after START
+    - INPUT: a line the player typed, in answer to any of the game's prompts
+    - CLOCK: a reading of the clock the game's puzzles time the player with
+    - EVENT: an event added to the game's log
+    - REMOVE: the last event removed from the game's log, as by undo
+    - RESET: the game's log replaced, as by loading a saved game
+
+Every record is a 4-byte length followed by that many bytes, whose first byte is the kind of record. Strings
+are written once, in a STRING record, and referred to by their index after that, so repeated descriptions and
+commands cost four bytes each. All numbers are little-endian.
+
+Records are buffered and only forced to disk (with fsync) every sync_every records or sync_interval seconds,
+and when the journal is closed. A crash can lose at most those last few records, and a record that was only
+partly written is ignored when the journal is read.
+
+Since the journal holds every line the player typed and every reading of the game's clock, replay_journal
+rebuilds the game by playing those lines again, against a clock that shows the same readings (see ReplayClock).
+read_event_list rebuilds just the game's log, straight from its EVENT records.
+
+Usage:
+    python event_journal.py game.journal
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+import time
+from collections import deque
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Mapping, Optional
+
+from game_entities import Item
+from proj1_event_logger import Event, EventList
+
+START = b"S"
+SEED = b"D"
+STRING = b"T"
+INPUT = b"I"
+CLOCK = b"K"
+EVENT = b"E"
+REMOVE = b"R"
+RESET = b"C"
+
+# Stands in for a missing string or item
+NONE = -1
+
+LENGTH = struct.Struct("<I")
+
+# initial location id, moves, game data file (string index)
+START_RECORD = struct.Struct("<iii")
+
+# location id, next command, description, command (string indexes), item id
+EVENT_RECORD = struct.Struct("<iiiii")
+
+# seed
+SEED_RECORD = struct.Struct("<q")
+
+# line (string index)
+INPUT_RECORD = struct.Struct("<i")
+
+# time, in seconds
+CLOCK_RECORD = struct.Struct("<d")
+
+# whether the new last event's next_command was cleared
+REMOVE_RECORD = struct.Struct("<?")
+
+
+class EventJournal:
+    """An append-only journal of one game on disk.
+
+    Instance Attributes:
+        - filename: the name of the journal file.
+        - sync_every: the number of records after which the journal is forced to disk.
+        - sync_interval: the number of seconds after which the journal is forced to disk at the next record.
+
+    Representation Invariants:
+        - self.sync_every > 0
+    """
+    # Private Instance Attributes:
+    #   - _file: the journal file, opened for appending.
+    #   - _strings: the index of every string written to the journal so far.
+    #   - _unsynced: the number of records written since the journal was last forced to disk.
+    #   - _last_sync: the time the journal was last forced to disk, from time.monotonic.
+    filename: str
+    sync_every: int
+    sync_interval: float
+    _file: BinaryIO
+    _strings: dict[str, int]
+    _unsynced: int
+    _last_sync: float
+
+    def __init__(self, filename: str, sync_every: int = 64, sync_interval: float = 1.0) -> None:
+        """Open the journal with the given filename, creating it if it does not exist.
+
+        New records are appended after any that the file already holds, and any record at its end that was
+        only partly written is cut off.
+        """
+        self.filename = filename
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._strings = {}
+
+        end = 0
+        if os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                for kind, payload, end in _read_raw_records(f):
+                    if kind == STRING:
+                        self._strings[payload.decode("utf-8")] = len(self._strings)
+
+        self._file = open(filename, 'ab')
+        self._file.truncate(end)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __enter__(self) -> EventJournal:
+        """Return this journal, to be closed at the end of a with statement."""
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """Close this journal at the end of a with statement."""
+        self.close()
+
+    def record_start(self, game_data_file: str, initial_location_id: int, moves: int,
+                     seed: Optional[int] = None) -> None:
+        """Record that a game began from the given game data file, at the given location, with the given moves,
+        making its random choices from the given seed if it is not None."""
+        self._append(START, START_RECORD.pack(initial_location_id, moves, self._string(game_data_file)))
+        if seed is not None:
+            self._append(SEED, SEED_RECORD.pack(seed))
+
+    def record_input(self, line: str) -> None:
+        """Record that the player typed the given line."""
+        self._append(INPUT, INPUT_RECORD.pack(self._string(line)))
+
+    def record_clock(self, reading: float) -> None:
+        """Record that the game's clock was read and showed the given time."""
+        self._append(CLOCK, CLOCK_RECORD.pack(reading))
+
+    def record_event(self, event: Event, command: Optional[str] = None) -> None:
+        """Record that the given event was added to the game's log with the given command (see
+        EventList.add_event)."""
+        self._append(EVENT, EVENT_RECORD.pack(event.id_num, self._optional_string(event.next_command),
+                                              self._optional_string(event.description),
+                                              self._optional_string(command),
+                                              NONE if event.item is None else event.item.id_num))
+
+    def record_removal(self, clear_command: bool) -> None:
+        """Record that the last event was removed from the game's log (see EventList.remove_last_event)."""
+        self._append(REMOVE, REMOVE_RECORD.pack(clear_command))
+
+    def record_reset(self) -> None:
+        """Record that the game's log was replaced by a new, empty one."""
+        self._append(RESET, b"")
+
+    def recording(self, read: Callable[[str], str]) -> Callable[[str], str]:
+        """Return a version of the given GameIO read function that records every line it returns."""
+        def read_and_record(message: str) -> str:
+            """Read a line with the wrapped function, record it, and return it."""
+            line = read(message)
+            self.record_input(line)
+            return line
+
+        return read_and_record
+
+    def recording_clock(self, clock: Callable[[], float]) -> Callable[[], float]:
+        """Return a version of the given clock that records every reading it returns."""
+        def read_and_record() -> float:
+            """Read the wrapped clock, record the reading, and return it."""
+            reading = clock()
+            self.record_clock(reading)
+            return reading
+
+        return read_and_record
+
+    def sync(self) -> None:
+        """Force every record written so far to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Force every record written so far to disk and close the journal."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _append(self, kind: bytes, payload: bytes) -> None:
+        """Append a record of the given kind and payload, forcing the journal to disk if it is due."""
+        self._file.write(LENGTH.pack(len(kind) + len(payload)) + kind + payload)
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def _string(self, text: str) -> int:
+        """Return the index of the given string, writing it to the journal first if it is new."""
+        if text not in self._strings:
+            self._strings[text] = len(self._strings)
+            self._append(STRING, text.encode("utf-8"))
+        return self._strings[text]
+
+    def _optional_string(self, text: Optional[str]) -> int:
+        """Return the index of the given string, or NONE if it is None."""
+        return NONE if text is None else self._string(text)
+
+
+def _read_raw_records(f: BinaryIO) -> Iterator[tuple[bytes, bytes, int]]:
+    """Yield the kind and payload of each complete record in the given journal file, along with the position in
+    the file where the record ends."""
+    position = 0
+    while True:
+        header = f.read(LENGTH.size)
+        if len(header) < LENGTH.size:
+            return
+        (length,) = LENGTH.unpack(header)
+        record = f.read(length)
+        if length == 0 or len(record) < length:
+            return
+        position += LENGTH.size + length
+        yield record[:1], record[1:], position
+
+
+def read_records(filename: str) -> Iterator[tuple[bytes, tuple]]:
+    """Yield the kind and the decoded fields of each record in the journal with the given filename, in order.
+
+    STRING records are resolved, so every string index in the other records is replaced by its string (or None
+    for NONE), and are not yielded themselves.
+    """
+    strings = []
+
+    def string(index: int) -> Optional[str]:
+        """Return the string with the given index, or None if it is NONE."""
+        return None if index == NONE else strings[index]
+
+    with open(filename, 'rb') as f:
+        for kind, payload, _ in _read_raw_records(f):
+            if kind == STRING:
+                strings.append(payload.decode("utf-8"))
+            elif kind == START:
+                initial_location_id, moves, game_data_file = START_RECORD.unpack(payload)
+                yield kind, (string(game_data_file), initial_location_id, moves)
+            elif kind == SEED:
+                yield kind, SEED_RECORD.unpack(payload)
+            elif kind == INPUT:
+                yield kind, (string(INPUT_RECORD.unpack(payload)[0]),)
+            elif kind == CLOCK:
+                yield kind, CLOCK_RECORD.unpack(payload)
+            elif kind == EVENT:
+                id_num, next_command, description, command, item_id = EVENT_RECORD.unpack(payload)
+                yield kind, (id_num, string(next_command), string(description), string(command),
+                             None if item_id == NONE else item_id)
+            elif kind == REMOVE:
+                yield kind, REMOVE_RECORD.unpack(payload)
+            else:
+                yield kind, ()
+
+
+def read_event_list(filename: str, items: Optional[Mapping[int, Item]] = None) -> EventList:
+    """Return the game log recorded in the journal with the given filename.
+
+    Items are looked up by id in items, or, if items is None, in the world of the game data file that the journal
+    started with.
+    """
+    events = EventList()
+    for kind, fields in read_records(filename):
+        if kind == START and items is None:
+            # Imported here, since game_world builds on the modules that use this one
+            from game_world import load_world
+            items = load_world(fields[0]).items
+        elif kind == EVENT:
+            id_num, next_command, description, command, item_id = fields
+            item = None if item_id is None else items[item_id]
+            events.add_event(Event(id_num, description, next_command, item=item), command)
+        elif kind == REMOVE:
+            events.remove_last_event(fields[0])
+        elif kind == RESET:
+            events = EventList()
+    return events
+
+
+class ReplayClock:
+    """A clock that shows the readings recorded in a journal, in order, and then the time of another clock, so a
+    replayed game's puzzles see the same times they did the first time.
+
+    Instance Attributes:
+        - readings: the recorded readings not shown yet, in the order they are shown.
+        - then: the clock that is read once every recorded reading has been shown.
+
+    >>> clock = ReplayClock([100.0, 110.5], then=lambda: 7.0)
+    >>> clock(), clock(), clock()
+    (100.0, 110.5, 7.0)
+    """
+    readings: deque[float]
+    then: Callable[[], float]
+
+    def __init__(self, readings: Iterable[float], then: Callable[[], float] = time.time) -> None:
+        """Initialize a clock that shows the given readings and then the time of the clock then."""
+        self.readings = deque(readings)
+        self.then = then
+
+    def __call__(self) -> float:
+        """Return the next recorded reading, or the time of the clock then if there are none left."""
+        return self.readings.popleft() if self.readings else self.then()
+
+
+def replay_journal(filename: str, journal: Optional[EventJournal] = None) -> Any:
+    """Return the AdventureGame recorded in the journal with the given filename, rebuilt by playing every line the
+    player typed again, without any output. The game is given the seed recorded with its start and a ReplayClock of
+    the clock readings recorded, so its puzzles make the same random choices and see the same times they did the
+    first time.
+
+    The game is left where the journal ends. If it was waiting for the player's next action, it can be carried on
+    with play(resume=True) once it is given a GameIO that talks to the player. If journal is given, the rebuilt
+    game appends everything it does from then on to it.
+
+    Raise a ValueError if the journal does not record the start of a game.
+    """
+    # Imported here, since adventure builds on this module
+    from additional_functions import ScriptExhausted, headless_io
+    from adventure import AdventureGame
+
+    start = None
+    seed = None
+    lines = []
+    readings = []
+    for kind, fields in read_records(filename):
+        if kind == START and start is None:
+            start = fields
+        elif kind == SEED and seed is None:
+            seed = fields[0]
+        elif kind == INPUT:
+            lines.append(fields[0])
+        elif kind == CLOCK:
+            readings.append(fields[0])
+
+    if start is None:
+        raise ValueError(f"{filename} does not record the start of a game.")
+
+    game = AdventureGame(*start, io=headless_io(lines), seed=seed, clock=ReplayClock(readings))
+    try:
+        game.play()
+    except ScriptExhausted:
+        pass
+
+    if journal is not None:
+        game.attach_journal(journal)
+    return game
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Replay a journal from the command line and report the game it rebuilds."""
+    parser = argparse.ArgumentParser(description="Rebuild a game from its journal and report on it.")
+    parser.add_argument("journal", help="the journal file to replay")
+    args = parser.parse_args(argv)
+
+    game = replay_journal(args.journal)
+    replayed_log = game.get_game_log().get_id_log()
+    journaled_log = read_event_list(args.journal).get_id_log()
+
+    print(f"Location: {game.current_location_id}")
+    print(f"Score: {game.game_state.score.score}")
+    print(f"Moves left: {game.game_state.moves.moves}")
+    print(f"Inventory: {', '.join(item.name for item in game.inventory) or '(empty)'}")
+    print(f"Ongoing: {game.ongoing}")
+    print(f"Events: {len(journaled_log)}")
+    print(f"Replay matches journal: {replayed_log == journaled_log}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""CSC111 Project 1: Text Adventure Game - Fuzzer
+
+This module looks for crashes in the real game by playing it headlessly (see proj1_simulation.run_headless)
+with command sequences made up as it goes, on a pool of worker processes.
+
+Each time the game asks for the player's next action, the fuzzer answers with a command available at the
+player's location or one of the menu commands, and each time a puzzle asks a question, it answers with a word
+from a dictionary of the answers the game's code compares against (see fuzz_dictionary). Every line it answers
+with is recorded, so each case is a script that run_headless plays out the same way again.
+
+The fuzzer is coverage-guided. Each case covers a set of features: the (location, command, inventory) of every
+action chosen and the (location, question) of every puzzle question asked. A case that covers a feature no case
+covered before is added to the corpus, and new cases are made by mutating cases from the corpus (cutting them
+short, dropping a line or splicing two together) and carrying on from where the mutated script ends with new
+lines. So the fuzzer keeps pushing further into the parts of the game it has only just reached.
+
+Every exception that escapes the game is a crash. Crashes are grouped by the exception's type and the line of
+code it was raised at, and the shortest script that causes each one is reported, along with the seed and the
+step of the virtual clock needed to play it again.
+
+Usage:
+    python fuzzer.py --rounds 20 --crashes crashes.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import importlib
+import json
+import os
+import random
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from additional_functions import GameIO, NullRenderer, ScriptExhausted, VirtualClock
+from adventure import AdventureGame, MAX_MOVES, MENU
+
+# The menu commands the fuzzer never chooses, since they read and write files
+FILE_COMMANDS = ("save", "load")
+
+# The modules whose comparisons the fuzzer takes the answers to puzzle questions from
+DICTIONARY_MODULES = ("game_entities", "adventure")
+
+# The longest string the game's code compares against that is taken as an answer
+MAX_ANSWER_LENGTH = 40
+
+# The steps of the virtual clocks that cases are timed with, in seconds. A clock that stands still fails every
+# timed puzzle, and one that moves 10 seconds at a time passes the treadmill.
+CLOCK_STEPS = (0.0, 10.0)
+
+# The number of lines at most that a case plays
+DEFAULT_MAX_LINES = 64
+
+# The number of corpus cases sent to a worker with each task, to mutate
+CORPUS_SAMPLE = 256
+
+# The settings and coverage of the worker process, set once by _init_worker
+_worker_settings = {}
+
+
+@dataclass
+class Crash:
+    """An exception that escaped the game, and the shortest script found that causes it.
+
+    Instance Attributes:
+        - error: the type and message of the exception.
+        - where: the file, line and function the exception was raised at.
+        - trace: the last lines of the exception's traceback.
+        - script: the lines that cause the crash when played with run_headless.
+        - step: the step of the VirtualClock the script must be played with.
+        - seed: the seed the script must be played with.
+    """
+    error: str
+    where: str
+    trace: str
+    script: list[str]
+    step: float
+    seed: int
+
+    def signature(self) -> tuple[str, str]:
+        """Return the type of this crash's exception and where it was raised, which crashes are grouped by."""
+        return self.error.split(":", 1)[0], self.where
+
+
+@dataclass
+class FuzzReport:
+    """The outcome of a fuzzing campaign.
+
+    Instance Attributes:
+        - runs: the number of cases played.
+        - steps: the number of lines the cases' games read.
+        - coverage: every feature covered by a case.
+        - corpus: the (clock step, script) of each case that covered a new feature.
+        - crashes: the shortest crash found of each kind, by its signature.
+    """
+    runs: int = 0
+    steps: int = 0
+    coverage: set[tuple] = field(default_factory=set)
+    corpus: list[tuple[float, list[str]]] = field(default_factory=list)
+    crashes: dict[tuple[str, str], Crash] = field(default_factory=dict)
+
+    def add_crash(self, crash: Crash) -> bool:
+        """Record the given crash, keeping only the shortest script of each kind, and return whether it is a kind
+        not seen before."""
+        known = self.crashes.get(crash.signature())
+        if known is None or len(crash.script) < len(known.script):
+            self.crashes[crash.signature()] = crash
+        return known is None
+
+
+class FuzzInput:
+    """A GameIO read function that makes up the player's lines, replaying a prefix first, and records the lines
+    it answers with and the features the game covers.
+
+    Instance Attributes:
+        - game: the game reading from this input, or None if it has not been given yet.
+        - script: every line answered so far.
+        - features: the features covered so far.
+    """
+    # Private Instance Attributes:
+    #   - _prefix: the lines to answer with before making any up.
+    #   - _rng: the random number generator the lines are chosen with.
+    #   - _max_lines: the number of lines after which ScriptExhausted is raised.
+    #   - _dictionary: the answers to puzzle questions to choose from.
+    game: Optional[AdventureGame]
+    script: list[str]
+    features: set[tuple]
+    _prefix: list[str]
+    _rng: random.Random
+    _max_lines: int
+    _dictionary: tuple[str, ...]
+
+    def __init__(self, prefix: list[str], rng: random.Random, max_lines: int, dictionary: tuple[str, ...]) -> None:
+        """Initialize a new input that answers with the lines of prefix, then makes up lines with rng until it
+        has answered max_lines lines."""
+        self.game = None
+        self.script = []
+        self.features = set()
+        self._prefix = prefix
+        self._rng = rng
+        self._max_lines = max_lines
+        self._dictionary = dictionary
+
+    def __call__(self, message: str = "") -> str:
+        """Return the next line for the game, recording it and the feature it covers, or raise ScriptExhausted
+        if max_lines lines have been answered."""
+        position = len(self.script)
+        if position >= self._max_lines:
+            raise ScriptExhausted
+
+        location = self.game.get_location()
+        if self.game.awaiting_action:
+            # A mutated prefix may have moved an answer to where an action goes, so file commands are skipped here too
+            if (position < len(self._prefix)
+                    and self.game.resolve_choice(self._prefix[position], location) not in FILE_COMMANDS):
+                line = self._prefix[position]
+            else:
+                line = self._rng.choice(_menu_commands() + list(location.available_commands))
+            inventory = tuple(sorted(item.id_num for item in self.game.inventory))
+            self.features.add((location.id_num, line, inventory))
+        else:
+            line = self._prefix[position] if position < len(self._prefix) else self._rng.choice(self._dictionary)
+            self.features.add((location.id_num, message))
+
+        self.script.append(line)
+        return line
+
+
+def play_case(game_data_file: str, prefix: list[str], rng: random.Random, initial_location_id: int = 1,
+              moves: int = MAX_MOVES, seed: int = 0, step: float = 0.0,
+              max_lines: int = DEFAULT_MAX_LINES) -> tuple[list[str], set[tuple], Optional[Crash]]:
+    """Play one case headlessly, answering with the lines of prefix and then lines made up with rng, and return
+    the lines answered, the features covered and the crash, or None if the game didn't crash.
+
+    The game's puzzles make their random choices from seed and are timed by a VirtualClock with the given step,
+    so run_headless(game_data_file, script, initial_location_id, moves, seed, VirtualClock(step=step)) plays the
+    case out the same way again.
+
+    >>> script, features, crash = play_case('game_data.json', ["look at desk", "pickup phone"], random.Random(1),
+    ...                                     max_lines=2)
+    >>> script, (1, 'look at desk', ()) in features, crash
+    (['look at desk', 'pickup phone'], True, None)
+    """
+    read = FuzzInput(prefix, rng, max_lines, fuzz_dictionary())
+    game = AdventureGame(game_data_file, initial_location_id, moves, GameIO(read=read, renderer=NullRenderer()),
+                         seed=seed, clock=VirtualClock(step=step))
+    read.game = game
+    try:
+        game.play()
+    except ScriptExhausted:
+        pass
+    except Exception as error:  # Any other exception that escapes the game is a crash
+        frames = traceback.extract_tb(error.__traceback__)
+        frame = frames[-1]
+        crash = Crash(f"{type(error).__name__}: {error}", f"{os.path.basename(frame.filename)}:{frame.lineno} in "
+                                                          f"{frame.name}",
+                      "".join(traceback.format_list(frames[-3:])), read.script, step, seed)
+        return read.script, read.features, crash
+    return read.script, read.features, None
+
+
+def mutate(corpus: list[tuple[float, list[str]]], rng: random.Random) -> tuple[float, list[str]]:
+    """Return the clock step and the prefix of a new case, made by mutating a case chosen from corpus.
+
+    The case is cut short, has one of its lines dropped, or has the end of another case spliced onto its start.
+    """
+    step, script = rng.choice(corpus)
+    if not script:
+        return step, []
+
+    cut = rng.randrange(len(script) + 1)
+    mutation = rng.randrange(3)
+    if mutation == 0:
+        return step, script[:cut]
+    elif mutation == 1:
+        return step, script[:cut] + script[cut + 1:]
+    else:
+        other_step, other = rng.choice(corpus)
+        if other_step != step:
+            return step, script[:cut]
+        return step, script[:cut] + other[rng.randrange(len(other) + 1):]
+
+
+@lru_cache(maxsize=None)
+def fuzz_dictionary(modules: tuple[str, ...] = DICTIONARY_MODULES) -> tuple[str, ...]:
+    """Return the answers to puzzle questions that the fuzzer chooses from: every short string that the code of
+    the given modules compares against, the strings in the lists it compares against, and a few words of its own.
+    """
+    answers = {"", "yes", "no", "0", "-1", "not a number"}
+    for name in modules:
+        with open(importlib.import_module(name).__file__, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Compare):
+                for operand in [node.left] + node.comparators:
+                    answers.update(_strings(operand))
+            elif isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+                answers.update(_strings(node))
+    return tuple(sorted(answer for answer in answers
+                        if len(answer) <= MAX_ANSWER_LENGTH and "\n" not in answer and "\033" not in answer))
+
+
+def _strings(node: ast.AST) -> list[str]:
+    """Return the string constants in the given expression, if it is a constant or a collection of them."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value, node.value.lower()]
+    elif isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [string for element in node.elts for string in _strings(element)]
+    return []
+
+
+@lru_cache(maxsize=None)
+def _menu_commands() -> list[str]:
+    """Return the menu commands the fuzzer chooses from."""
+    return [command for command in MENU if command not in FILE_COMMANDS]
+
+
+def _init_worker(game_data_file: str, initial_location_id: int, moves: int, seed: int, max_lines: int) -> None:
+    """Store the fuzzing settings in this worker process, with no coverage yet, and load the game data once, so
+    that every case the worker plays reuses it.
+    """
+    _worker_settings["game_data_file"] = game_data_file
+    _worker_settings["initial_location_id"] = initial_location_id
+    _worker_settings["moves"] = moves
+    _worker_settings["seed"] = seed
+    _worker_settings["max_lines"] = max_lines
+    _worker_settings["coverage"] = set()
+    AdventureGame(game_data_file, initial_location_id, moves)
+    fuzz_dictionary()
+
+
+def _fuzz_task(corpus: list[tuple[float, list[str]]], runs: int, task_seed: int) -> dict[str, Any]:
+    """Play the given number of cases mutated from corpus in this worker process, and return the cases that
+    covered features new to the worker, with those features, the crashes, and the number of lines read."""
+    rng = random.Random(task_seed)
+    coverage = _worker_settings["coverage"]
+    entries, crashes, steps = [], [], 0
+    for _ in range(runs):
+        step, prefix = mutate(corpus, rng)
+        script, features, crash = play_case(_worker_settings["game_data_file"], prefix, rng,
+                                            _worker_settings["initial_location_id"], _worker_settings["moves"],
+                                            _worker_settings["seed"], step, _worker_settings["max_lines"])
+        steps += len(script)
+        new_features = features - coverage
+        if new_features:
+            coverage.update(new_features)
+            entries.append((step, script, new_features))
+        if crash is not None:
+            crashes.append(crash)
+    return {"entries": entries, "crashes": crashes, "steps": steps}
+
+
+def fuzz(game_data_file: str = 'game_data.json', initial_location_id: int = 1, moves: int = MAX_MOVES,
+         rounds: int = 10, runs_per_task: int = 500, workers: Optional[int] = None, seed: int = 0,
+         max_lines: int = DEFAULT_MAX_LINES, report: Optional[FuzzReport] = None,
+         on_round: Optional[Callable[[int, FuzzReport], None]] = None) -> FuzzReport:
+    """Fuzz the game in the given file for the given number of rounds on a pool of worker processes, and return
+    the report.
+
+    In each round, every worker plays runs_per_task cases mutated from a sample of the corpus, and the cases that
+    cover new features are added to the corpus for the next round. A report from an earlier campaign can be
+    given to carry on from its corpus and coverage. If on_round is given, it is called with the number of each
+    round and the report once the round is over. workers defaults to the number of CPUs.
+
+    Preconditions:
+        - rounds >= 0 and runs_per_task > 0
+        - workers is None or workers > 0
+    """
+    workers = workers or os.cpu_count() or 1
+    report = FuzzReport() if report is None else report
+    if not report.corpus:
+        report.corpus.extend((step, []) for step in CLOCK_STEPS)
+    rng = random.Random(seed)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(game_data_file, initial_location_id, moves, seed, max_lines)) as executor:
+        for round_number in range(1, rounds + 1):
+            tasks = [executor.submit(_fuzz_task, rng.sample(report.corpus, min(len(report.corpus), CORPUS_SAMPLE)),
+                                     runs_per_task, rng.getrandbits(64))
+                     for _ in range(workers)]
+            for task in tasks:
+                result = task.result()
+                report.runs += runs_per_task
+                report.steps += result["steps"]
+                for step, script, features in result["entries"]:
+                    if not features <= report.coverage:
+                        report.coverage.update(features)
+                        report.corpus.append((step, script))
+                for crash in result["crashes"]:
+                    report.add_crash(crash)
+            if on_round is not None:
+                on_round(round_number, report)
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the fuzzer from the command line."""
+    parser = argparse.ArgumentParser(description="Fuzz the game with coverage-guided command sequences.")
+    parser.add_argument("--game-data", default="game_data.json", help="the game data file to play")
+    parser.add_argument("--start", type=int, default=1, help="the initial location id")
+    parser.add_argument("--moves", type=int, default=MAX_MOVES, help="the number of moves the player starts with")
+    parser.add_argument("--rounds", type=int, default=10, help="the number of rounds to fuzz for")
+    parser.add_argument("--runs", type=int, default=500, help="the number of cases each worker plays per round")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the fuzzer and of the puzzles")
+    parser.add_argument("--max-lines", type=int, default=DEFAULT_MAX_LINES,
+                        help="the number of lines at most that each case plays")
+    parser.add_argument("--crashes", help="the JSONL file to write the shortest script of each crash to")
+    args = parser.parse_args(argv)
+
+    def show_progress(round_number: int, report: FuzzReport) -> None:
+        """Print how far the campaign has got."""
+        print(f"round {round_number}: {report.runs} cases, {report.steps} lines, {len(report.coverage)} features, "
+              f"{len(report.corpus)} in corpus, {len(report.crashes)} crash(es)", flush=True)
+
+    report = fuzz(args.game_data, args.start, args.moves, args.rounds, args.runs, args.workers, args.seed,
+                  args.max_lines, on_round=show_progress)
+
+    for crash in sorted(report.crashes.values(), key=lambda c: c.where):
+        print(f"\n{crash.error}\n  at {crash.where}\n  after {len(crash.script)} line(s): {crash.script}")
+
+    if args.crashes:
+        with open(args.crashes, 'w', encoding='utf-8') as out:
+            for crash in report.crashes.values():
+                out.write(json.dumps(vars(crash)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
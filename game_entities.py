@@ -21,11 +21,19 @@ This file is Copyright (c) 2025 CSC111 Teaching Team
 # Standard library imports
 import time
 import random
-from typing import Optional
-from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType, ModuleType
+from typing import Callable, Iterable, Iterator, Mapping, Optional, TYPE_CHECKING
+from dataclasses import dataclass, field
 
 # Local module imports
-from additional_functions import typewriter_effect
+from additional_functions import typewriter_effect, display, display_message, prompt, pause
+from commands import CommandTable
+from descriptions import read_description
+from messages import moves_earned, points_earned
+
+if TYPE_CHECKING:
+    from game_world import LocationTemplate
 
 # Global variables for text colors
 RED = "\033[31m"
@@ -34,6 +42,26 @@ BLUE = "\033[34m"
 YELLOW = "\033[33m"
 RESET = "\033[0m"
 
+# The location, command and destination of the way to Robarts' second floor, and the item that keeps it shut
+GATE_LOCATION = 3
+GATE_COMMAND = "go to second floor"
+GATE_DESTINATION = 4
+GATE_ITEM = 1
+
+# The alphabet of the Caesar cipher
+CIPHER_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# The message that unlocks the Lost and Found door once the player decrypts it
+CIPHER_PLAINTEXT = "HELLO WORLD"
+
+# The share of each letter of CIPHER_ALPHABET in English text, for breaking ciphers by frequency analysis
+ENGLISH_LETTER_FREQUENCIES = (
+    0.0817, 0.0149, 0.0278, 0.0425, 0.1270, 0.0223, 0.0202, 0.0609, 0.0697, 0.0015, 0.0077, 0.0403, 0.0241,
+    0.0675, 0.0751, 0.0193, 0.0010, 0.0599, 0.0633, 0.0906, 0.0276, 0.0098, 0.0236, 0.0015, 0.0197, 0.0007)
+
+# The length of text from which letters are counted with NumPy, if it is installed
+NUMPY_MIN_LENGTH = 1 << 16
+
 
 @dataclass
 class Item:
@@ -63,6 +91,122 @@ class Item:
         self.target_position = target_position
 
 
+def normalize_item_name(name: str) -> str:
+    """Return the given item name in the form used to look items up by name.
+
+    >>> normalize_item_name("  Lucky Mug ")
+    'lucky mug'
+    """
+    return name.strip().lower()
+
+
+class ItemCollection:
+    """A collection of items, such as those at a location or in the player's inventory.
+
+    Items are kept in the order they were added, like a list, but are indexed by id and by normalized name, so
+    checking for, adding, removing and finding an item all take constant time. The collection also counts its
+    items by target position, so the number of items that belong at a location is always at hand.
+
+    An item can be in a collection at most once; adding an item that is already there does nothing.
+    """
+    # Private Instance Attributes:
+    #   - _by_id: the items in this collection by id, in the order they were added.
+    #   - _by_name: the items in this collection by normalized name.
+    #   - _target_counts: the number of items in this collection with each target position.
+    _by_id: dict[int, Item]
+    _by_name: dict[str, Item]
+    _target_counts: dict[Optional[int], int]
+
+    def __init__(self, items: Iterable[Item] = ()) -> None:
+        """Initialize a new collection holding the given items, in order."""
+        self._by_id = {}
+        self._by_name = {}
+        self._target_counts = {}
+        for item in items:
+            self.append(item)
+
+    def __contains__(self, item: object) -> bool:
+        """Return whether the given item is in this collection."""
+        return isinstance(item, Item) and item.id_num in self._by_id
+
+    def __iter__(self) -> Iterator[Item]:
+        """Iterate over the items in this collection in the order they were added."""
+        return iter(self._by_id.values())
+
+    def __len__(self) -> int:
+        """Return the number of items in this collection."""
+        return len(self._by_id)
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether other is a collection of the same items in the same order."""
+        return isinstance(other, ItemCollection) and list(self._by_id.items()) == list(other._by_id.items())
+
+    def __repr__(self) -> str:
+        """Return a string representation of this collection."""
+        return f"ItemCollection({list(self._by_id.values())!r})"
+
+    def append(self, item: Item) -> None:
+        """Add the given item to the end of this collection, unless it is already here."""
+        if item.id_num in self._by_id:
+            return
+        self._by_id[item.id_num] = item
+        self._by_name[normalize_item_name(item.name)] = item
+        self._target_counts[item.target_position] = self._target_counts.get(item.target_position, 0) + 1
+
+    def remove(self, item: Item) -> None:
+        """Remove the given item from this collection.
+
+        Raise a ValueError if the item is not in this collection.
+        """
+        if item not in self:
+            raise ValueError(f"{item.name} is not in this collection")
+        self._discard(self._by_id[item.id_num])
+
+    def pop(self) -> Item:
+        """Remove and return the item most recently added to this collection.
+
+        Raise an IndexError if this collection is empty.
+        """
+        if not self._by_id:
+            raise IndexError("pop from an empty ItemCollection")
+        item = next(reversed(self._by_id.values()))
+        self._discard(item)
+        return item
+
+    def get(self, item_id: int) -> Optional[Item]:
+        """Return the item in this collection with the given id, or None if there is none."""
+        return self._by_id.get(item_id)
+
+    def find(self, name: str) -> Optional[Item]:
+        """Return the item in this collection with the given name, ignoring case and surrounding whitespace, or
+        None if there is none."""
+        return self._by_name.get(normalize_item_name(name))
+
+    def find_in(self, text: str) -> Optional[Item]:
+        """Return an item in this collection whose name appears in the given text, or None if there is none.
+
+        Commands name their item at the end (as in "pickup note"), so each ending of the text is looked up first,
+        one word at a time; only if none of them is an item's name are the items searched.
+        """
+        words = normalize_item_name(text).split()
+        for i in range(len(words)):
+            item = self._by_name.get(" ".join(words[i:]))
+            if item is not None:
+                return item
+        return next((item for item in self._by_id.values() if item.name in text), None)
+
+    def count_targeting(self, location_id: int) -> int:
+        """Return the number of items in this collection whose target position is the given location."""
+        return self._target_counts.get(location_id, 0)
+
+    def _discard(self, item: Item) -> None:
+        """Remove the given item, which is in this collection, from every index."""
+        del self._by_id[item.id_num]
+        if self._by_name.get(normalize_item_name(item.name)) is item:
+            del self._by_name[normalize_item_name(item.name)]
+        self._target_counts[item.target_position] -= 1
+
+
 @dataclass
 class Score:
     """A class to track the player's score in the adventure game.
@@ -110,7 +254,7 @@ class Moves:
         """Increase the moves by a given amount (must be non-negative)."""
         if amount > 0:
             self.moves += amount
-            print(f"{YELLOW}\033[1;33mMOVES EARNED: +{amount}\033[0m{RESET}")
+            display_message(moves_earned(amount))
 
     def decrease(self, amount: int) -> None:
         """Decrease the moves by a given amount (must not drop below 0)."""
@@ -118,7 +262,7 @@ class Moves:
             self.moves = max(0, self.moves - amount)
 
 
-@dataclass
+@dataclass(slots=True)
 class Location:
     """A location in our text adventure game world.
 
@@ -127,11 +271,17 @@ class Location:
         - name: A string that represents the name of this location.
         - brief_description: A short description displayed if the location has been visited before, or None if it
                             is unnecessary.
-        - long_description: A detailed description displayed upon the player's first visit.
+        - long_description: A detailed description displayed upon the player's first visit. Like
+                            brief_description, if the location has a template, it is only read from the template
+                            the first time it is needed, so a game never reads the descriptions of the locations
+                            it doesn't show.
         - available_commands: a mapping of available commands at this location to
                             the location executing that command would lead to, or None if it does not change
-                            the player's location.
-        - items: a list of Item objects present at this location, or None if this location has no items.
+                            the player's location. This may be a read-only mapping shared with other games,
+                            so use set_command to change it.
+        - command_table: the commands available at this location, compiled for fast lookup. Like
+                         available_commands, this may be shared with other games.
+        - items: the items present at this location, or None if this location never holds items.
         - visited: A flag indicating whether the player has previously visited this location.
         - sub_locations: A list of IDs representing sublocations within this location, or None if this location
                         has no sublocations.
@@ -141,76 +291,114 @@ class Location:
     """
     id_num: int
     name: str
-    brief_description: str
-    long_description: str
-    available_commands: dict[str, Optional[int]] = None
-    items: Optional[list[Item]] = None
+    available_commands: Mapping[str, Optional[int]] = None
+    items: Optional[ItemCollection] = None
     visited: bool = False
     sub_locations: Optional[list[int]] = None
+    _brief_description: Optional[str] = field(default="", repr=False)
+    _long_description: Optional[str] = field(default="", repr=False)
+    _template: Optional['LocationTemplate'] = field(default=None, compare=False, repr=False)
+    _command_table: Optional[CommandTable] = field(default=None, compare=False, repr=False)
 
     def __init__(self, location_id: int = 0, name: str = "", brief_description: str = "", long_description: str = "",
-                 available_commands: Optional[dict[str, Optional[int]]] = None,
-                 items: Optional[list[Item]] = None, visited: bool = False,
-                 sub_locations: Optional[list[int]] = None) -> None:
-        """Initialize a new location."""
+                 available_commands: Optional[Mapping[str, Optional[int]]] = None,
+                 items: Optional[Iterable[Item]] = None, visited: bool = False,
+                 sub_locations: Optional[list[int]] = None, command_table: Optional[CommandTable] = None,
+                 template: Optional['LocationTemplate'] = None) -> None:
+        """Initialize a new location.
+
+        command_table may be given if it has already been compiled from available_commands. If template is given,
+        the location's descriptions are read from it when they are first needed, and brief_description and
+        long_description are ignored.
+        """
 
         self.id_num = location_id
         self.name = name
-        self.brief_description = brief_description
-        self.long_description = long_description
+        if template is None:
+            self._brief_description, self._long_description = brief_description, long_description
+        else:
+            self._brief_description = self._long_description = None
+        self._template = template
         self.available_commands = available_commands
-        self.items = items
+        self.items = None if items is None else ItemCollection(items)
         self.visited = visited
         self.sub_locations = None
+        self._command_table = command_table
+
+    @property
+    def brief_description(self) -> str:
+        """The description displayed if the player has visited this location before."""
+        if self._brief_description is None:
+            self._brief_description = read_description(self._template.text, *self._template.brief_ref)
+        return self._brief_description
+
+    @property
+    def long_description(self) -> str:
+        """The description displayed upon the player's first visit."""
+        if self._long_description is None:
+            self._long_description = read_description(self._template.text, *self._template.long_ref)
+        return self._long_description
+
+    @property
+    def command_table(self) -> CommandTable:
+        """The commands available at this location, compiled for fast lookup."""
+        if self._command_table is None:
+            self._command_table = CommandTable(self.available_commands or {})
+        return self._command_table
+
+    def set_command(self, command: str, destination: Optional[int]) -> None:
+        """Make the given command at this location lead to the given destination location id.
+
+        The first change copies available_commands, so that other games sharing the original are not affected.
+        """
+        if not isinstance(self.available_commands, dict):
+            self.available_commands = dict(self.available_commands)
+        if command not in self.available_commands:
+            self._command_table = None  # Compile the new set of commands the next time they are needed
+        self.available_commands[command] = destination
 
-    def handle_pickup_item(self, choice: str, inventory: list[Item]) -> Optional[Item]:
+    def handle_pickup_item(self, choice: str, inventory: ItemCollection) -> Optional[Item]:
         """Handle item pickups at this location."""
-        print(f"{YELLOW}Handling pickup for choice: {choice}{RESET}")
+        display(f"{YELLOW}Handling pickup for choice: {choice}{RESET}")
 
-        # Find the matching item by exact name
-        item = next((matching_item for matching_item in self.items if matching_item.name in choice), None)
+        # Find the item named in the choice
+        item = self.items.find_in(choice)
 
         if not item:
-            print("No such item found here.")
+            display("No such item found here.")
             return None
 
         # Check if the inventory already has an item with the same name
-        if any(inv_item.name == item.name for inv_item in inventory):
-            print(f"You already have {item.name} in your inventory.")
+        if inventory.find(item.name) is not None:
+            display(f"You already have {item.name} in your inventory.")
             return None
 
-        # Find the exact instance in self.items and remove it safely
-        stored_item = next((stored for stored in self.items if stored.name == item.name), None)
-
-        if stored_item:
-            self.items.remove(stored_item)  # Remove item from location
-            inventory.append(stored_item)  # Add the item to inventory
-            typewriter_effect(f"{YELLOW}Added {stored_item.name} to your inventory.{RESET}")
-            typewriter_effect(f"{stored_item.description}")
-            return stored_item  # Return the picked-up item to update game log
+        self.items.remove(item)  # Remove item from location
+        inventory.append(item)  # Add the item to inventory
+        typewriter_effect(f"{YELLOW}Added {item.name} to your inventory.{RESET}")
+        typewriter_effect(f"{item.description}")
+        return item  # Return the picked-up item to update game log
 
-        return None
-
-    def location_3_commands(self, choice: str, inventory: list[Item]) -> None:
+    def location_3_commands(self, choice: str, inventory: ItemCollection) -> None:
         """Handle available commands at location 3: ROBARTS COMMONS and its sublocations.
 
         Preconditions:
             - self.id_num == 3
         """
-        if choice == "go to second floor":
-            if not any(item.id_num == 1 for item in inventory):  # Check if T-Card is in inventory
+        if choice == GATE_COMMAND:
+            if inventory.get(GATE_ITEM) is None:  # Check if T-Card is in inventory
                 typewriter_effect("Oh no! Seems like you need your T-Card to get in."
                                   "\nDo you remember where you last left it?\n")
-                time.sleep(1)
+                pause(1)
 
                 available_commands = ", ".join(self.available_commands.keys())
-                print(f"Available commands: {available_commands}")
-                self.available_commands[choice] = 4
+                display(f"Available commands: {available_commands}")
+                self.set_command(choice, GATE_DESTINATION)
                 return  # Exit early if no T-Card
             else:  # Update the location that this choice leads to
-                self.id_num = 4
+                self.id_num = GATE_DESTINATION
 
-    def sublocation_5_commands(self, choice: str, moves: Moves, score: Score, inventory: list[Item]) -> None:
+    def sublocation_5_commands(self, choice: str, moves: Moves, score: Score, inventory: ItemCollection) -> None:
         """Handle available commands at sublocation 5: Starbucks.
 
         Preconditions:
@@ -221,50 +409,60 @@ class Location:
             if puzzle.barista_dialogue(moves):
                 lucky_mug = self.items.pop()
                 inventory.append(lucky_mug)
-                print(f"{YELLOW}Added to inventory: \033[3m{lucky_mug.description}\033[0m{RESET}")
+                display(f"{YELLOW}Added to inventory: \033[3m{lucky_mug.description}\033[0m{RESET}")
                 score.increase(10)
-                print(f"{YELLOW}\033[1mEARNED POINTS: +{10}\033[0m")
+                display_message(points_earned(10))
                 return
 
-    def sublocation_6_commands(self, choice: str, moves: Moves, score: Score, inventory: list[Item]) -> None:
+    def sublocation_6_commands(self, choice: str, moves: Moves, score: Score, inventory: ItemCollection,
+                               new_random: Callable[[], random.Random] = random.Random,
+                               board: Optional['ConnectionsBoard'] = None) -> None:
         """Handle available commands at sublocation 6: Robarts Common Room and its sublocations.
 
+        The puzzle is played on the given board, or on DEFAULT_CONNECTIONS_BOARD if board is None, and its grid is
+        shuffled by a random number generator returned by new_random.
+
         Preconditions:
             - self.id_num == 6
         """
         if choice != "ask the librarian":
             return  # If the choice is something else, do nothing
 
+        rng = new_random()
+        if board is None:
+            board = DEFAULT_CONNECTIONS_BOARD
         while True:  # Allow multiple attempts if the player fails
-            puzzle = ConnectionsPuzzle()
+            puzzle = ConnectionsPuzzle(rng, board)
             success = puzzle.play_game(moves)
 
             if success:
                 score.increase(10)
-                print(f"{YELLOW}\033[1mEARNED POINTS: +{10}\033[0m")
+                display_message(points_earned(10))
                 puzzle.roommate_dialogue()
                 laptop_charger = self.items.pop()
                 inventory.append(laptop_charger)
                 return  # Exit function if successful
 
-            print("Librarian: A noble effort, but the puzzle remains unsolved. Perhaps another attempt?")
-            retry = input("\nWould you like to try again? (yes/no) ").strip().lower()
+            display("Librarian: A noble effort, but the puzzle remains unsolved. Perhaps another attempt?")
+            retry = prompt("\nWould you like to try again? (yes/no) ").strip().lower()
 
             if retry == "no":
-                print("Librarian: Didn't think you'd give up so easily. Let me know if you change your mind.")
+                display("Librarian: Didn't think you'd give up so easily. Let me know if you change your mind.")
                 return  # Exit function if the player refuses to retry
 
             if retry != "yes":
-                print("Librarian: Please answer with 'yes' or 'no'.")
+                display("Librarian: Please answer with 'yes' or 'no'.")
 
-    def location_8_commands(self, choice: str, moves: Moves, inventory: list[Item], score: Score) -> None:
-        """Handle available commands at location 8: Hart House Fitness Centre.
+    def location_8_commands(self, choice: str, moves: Moves, inventory: ItemCollection, score: Score,
+                            clock: Callable[[], float] = time.time) -> None:
+        """Handle available commands at location 8: Hart House Fitness Centre, timing the player with the given
+        clock.
 
         Preconditions:
             - self.id_num == 8"""
         if choice == "find coach carter":
             # Create the puzzle instance here, no need to store it as an attribute of Location8
-            puzzle = TreadmillPuzzle()
+            puzzle = TreadmillPuzzle(clock)
 
             # Pass the state between method calls
             success = puzzle.coach_challenge(moves)
@@ -272,9 +470,9 @@ class Location:
             if success:
                 t_card = self.items.pop()
                 inventory.append(t_card)
-                print(f"{YELLOW}Added to inventory: \033[3m{t_card.description}\033[0m{RESET}")
+                display(f"{YELLOW}Added to inventory: \033[3m{t_card.description}\033[0m{RESET}")
                 score.increase(10)
-                print(f"{YELLOW}\033[1mEARNED POINTS: +{10}\033[0m")
+                display_message(points_earned(10))
                 moves.decrease(1)
 
     def sublocation_11_commands(self, choice: str) -> None:
@@ -282,7 +480,8 @@ class Location:
         if choice == "eavesdrop on the students":
             typewriter_effect("\033[3mAs you pass a group of students, you overhear a conversation that "
                               "catches your attention.\033[0m")
-            typewriter_effect("\nStudent 1: I don’t know if I’m cut out for this. First year feels like such a mess. "
+            typewriter_effect("\nStudent 1: I don’t know if I’m cut out for this. "
+                              "First year feels like such a mess. "
                               "\nThere are too many possibilities... I’m not even sure what I want anymore."
                               "\nIt’s like I’m stuck in this whirlwind of uncertainty.")
             typewriter_effect("\nStudent 2: Isn’t that how it always goes?  "
@@ -293,38 +492,38 @@ class Location:
             typewriter_effect("A table lamp flickers beside you, its light switching on and off in an unusual rhythm."
                               "\nAfter watching for a few moments, a pattern begins to emerge:"
                               "\nOn.")
-            time.sleep(0.5)
+            pause(0.5)
 
             typewriter_effect("\nOff.")
-            time.sleep(0.5)
+            pause(0.5)
 
             typewriter_effect("\nOn.")
-            time.sleep(0.5)
+            pause(0.5)
 
             typewriter_effect("\nOff.")
-            time.sleep(0.5)
+            pause(0.5)
 
             typewriter_effect("\nOff.")
-            time.sleep(0.5)
+            pause(0.5)
 
-    def sublocation_12_commands(self, choice: str, moves: Moves, inventory: list[Item], score: Score) -> None:
-        """Handle available commands at sublocation 12: Lost and Found."""
+    def sublocation_12_commands(self, choice: str, moves: Moves, inventory: ItemCollection, score: Score,
+                                shift_key: int = 20, encrypted_message: str = f"{RED}BYFFI QILFX{RESET}") -> None:
+        """Handle available commands at sublocation 12: Lost and Found, whose door is unlocked by decrypting
+        encrypted_message, a Caesar cipher with the given shift key."""
         if choice == "unlock door":
-            shift_key = 20
-            encrypted_message = f"{RED}BYFFI QILFX{RESET}"
             puzzle = CaesarCipher(shift_key, encrypted_message)
             success = puzzle.unlock_door(moves)
 
             if success:
                 usb_drive = self.items.pop()
                 inventory.append(usb_drive)
-                print(f"{YELLOW}Added to inventory: \033[3m{usb_drive.description}\033[0m{RESET}")
+                display(f"{YELLOW}Added to inventory: \033[3m{usb_drive.description}\033[0m{RESET}")
                 score.increase(15)
-                print(f"{YELLOW}\033[1mEARNED POINTS: +{15}\033[0m")
+                display_message(points_earned(15))
                 moves.decrease(1)
 
                 typewriter_effect("Great job! Go on with your adventure!")
-                input("Press Enter to continue...")
+                prompt("Press Enter to continue...")
 
 
 # PUZZLE CLASSES
@@ -335,45 +534,48 @@ class TreadmillPuzzle:
     Instance Attributes:
         - max_attempts: An integer representing the maximum number of attempts at solving the puzzle.
         - found_coach_carter: A boolean value that tracks whether the player has already found coach carter.
+        - clock: A function that returns the current time in seconds, which the player's run is timed with.
 
     Representation Invariants:
         - max_attempts > 0
     """
     max_attempts: int
+    clock: Callable[[], float]
 
-    def __init__(self) -> None:
-        """Initialize a new Treadmill Puzzle"""
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        """Initialize a new Treadmill Puzzle that times the player with the given clock."""
         self.max_attempts = 3  # the player has 3 tries to win the game
+        self.clock = clock
 
     def coach_challenge(self, moves: Moves) -> bool:
         """Initiate a dialogue from Coach Carter to initiate the puzzle."""
 
         typewriter_effect("\nCoach Carter: Well, well, well... I knew you'd be showing up sooner or later."
                           "\nLooking for your T-Card, huh?")
-        time.sleep(1)
+        pause(1)
 
         typewriter_effect("\n\n\033[3mYou give a determined nod, hoping not to face much trouble.\033[0m")
-        time.sleep(1)
+        pause(1)
 
         typewriter_effect("\nCoach Carter: Haha, you think I'm just going to hand it over that easily? "
                           "Nah, not on my watch.")
-        time.sleep(1)
+        pause(1)
 
         typewriter_effect("\nYou’ve been slacking off lately. I can’t have that on my team. "
                           "Time to prove yourself!")
-        time.sleep(1)
+        pause(1)
 
         typewriter_effect("\nLet’s see if you've got the speed and precision of a true athlete.")
-        time.sleep(1)
+        pause(1)
 
         typewriter_effect("\nI’m setting up a little challenge. You’re going to run for exactly 10 seconds."
                           f"\nRun too long or too short, and you’re out! You’ve got {self.max_attempts} tries. ")
-        time.sleep(1)
+        pause(1)
 
         typewriter_effect("\nReady to prove your worth?")
-        time.sleep(1)
+        pause(1)
 
-        input("\nPress Enter to begin your challenge...")
+        prompt("\nPress Enter to begin your challenge...")
 
         return self.treadmill_game(moves)
 
@@ -382,27 +584,27 @@ class TreadmillPuzzle:
         tries_left = self.max_attempts
 
         while tries_left > 0:
-            print(f"\nYou have {tries_left} tries left!")
-            print("\nGreat! Press Enter after I say 'Go', and try to press Enter again exactly when 10 seconds hit!")
-            time.sleep(2)
+            display(f"\nYou have {tries_left} tries left!")
+            display("\nGreat! Press Enter after I say 'Go', and try to press Enter again exactly when 10 seconds hit!")
+            pause(2)
 
             typewriter_effect("Ready...")
-            time.sleep(0.5)
+            pause(0.5)
 
             typewriter_effect("Set...")
-            time.sleep(0.5)
+            pause(0.5)
 
             typewriter_effect("Go!")
-            time.sleep(0.5)
+            pause(0.5)
 
             # Wait for the player to press Enter to start the timing
-            input("\nPress Enter to start timing...")  # Timing starts here
-            start_time = time.time()
+            prompt("\nPress Enter to start timing...")  # Timing starts here
+            start_time = self.clock()
 
             # Wait for the player to press Enter after 10 seconds
-            input("\nPress Enter after exactly 10 seconds...")
+            prompt("\nPress Enter after exactly 10 seconds...")
 
-            end_time = time.time()
+            end_time = self.clock()
             elapsed_time = round(end_time - start_time, 2)
 
             if 9.2 <= elapsed_time <= 10.8:
@@ -415,7 +617,7 @@ class TreadmillPuzzle:
                                   f"Not quite there.'")
                 tries_left -= 1
                 moves.decrease(2)
-                print(f"{RED}\033[1mMOVES DECREASED: -{2}\033[0m{RESET}")
+                display(f"{RED}\033[1mMOVES DECREASED: -{2}\033[0m{RESET}")
 
         typewriter_effect("\nCoach Carter: 'You’ve used all your tries... Better luck next time!'")
         return False  # Return failure with unchanged state
@@ -432,13 +634,13 @@ class MugPuzzle:
                           "\nIt seems like you might be missing something from your last visit."
                           "\n(Hint: Try asking about your \033[1mMUG\033[0m specifically!)")
 
-        time.sleep(1)
+        pause(1)
 
         typewriter_effect("\nBarista: 'Oh hey! I remember you! You were here pretty late yesterday. "
                           "\nDid you need help with something?'")
 
         while True:
-            player_response = input("Enter your question: ").strip().lower()
+            player_response = prompt("Enter your question: ").strip().lower()
 
             if 'mug' in player_response:
                 typewriter_effect("\nBarista: Oh! You’re looking for a mug? That sounds familiar... "
@@ -449,11 +651,11 @@ class MugPuzzle:
                 typewriter_effect("\nBarista: Hmm... I don't think I can help with that. "
                                   "Are you sure you're asking about the right thing?")
                 moves.decrease(1)
-                print(f"{RED}\033[1mMOVES DECREASED: -{1}\033[0m{RESET}")
+                display(f"{RED}\033[1mMOVES DECREASED: -{1}\033[0m{RESET}")
 
         attempts = 3
         while attempts > 0:
-            order_number = input("Please type in your order number: ").strip()
+            order_number = prompt("Please type in your order number: ").strip()
 
             if order_number == "7069":
                 typewriter_effect("\nBarista: Got it! Your mug should be here... but there’s just one problem.")
@@ -463,7 +665,7 @@ class MugPuzzle:
             else:
                 attempts -= 1
                 moves.decrease(1)
-                print(f"{RED}\033[1mMOVES DECREASED: -{1}\033[0m{RESET}")
+                display(f"{RED}\033[1mMOVES DECREASED: -{1}\033[0m{RESET}")
                 if attempts > 0:
                     typewriter_effect(f"\nBarista: Oops, that doesn’t seem right. You have {attempts} attempts left.")
                 else:
@@ -473,7 +675,7 @@ class MugPuzzle:
 
         # Ask if they want to solve the puzzle
         while True:
-            player_answer = input("What do you say? (Answer yes/no): ").strip().lower()
+            player_answer = prompt("What do you say? (Answer yes/no): ").strip().lower()
             if player_answer == "no":
                 typewriter_effect("\nBarista: Well... looks like your mug is on its own adventure!")
                 return False  # Return False if the player refuses to play
@@ -505,13 +707,13 @@ class MugPuzzle:
             'D': 'uoft'
         }
 
-        print("\n\n\033[1mPUZZLE: Help the barista match customers with their mugs!\033[0m")
-        time.sleep(1)
+        display("\n\n\033[1mPUZZLE: Help the barista match customers with their mugs!\033[0m")
+        pause(1)
 
         typewriter_effect("You have to match the customers to the mugs. Here are the clues:")
         for clue in clues:
-            print(f"- {clue}")
-            time.sleep(1)
+            display(f"- {clue}")
+            pause(1)
 
         attempts = 3  # Player gets 3 tries
         while attempts > 0:
@@ -519,10 +721,10 @@ class MugPuzzle:
             typewriter_effect("Enter your guesses for each customer:")
             typewriter_effect("Options: Green, Pink, UofT, Cat")
 
-            customer_a_mug = input("\nCustomer A (Latte): Which mug does Customer A get? ").strip().lower()
-            customer_b_mug = input("Customer B (Cappuccino): Which mug does Customer B get? ").strip().lower()
-            customer_c_mug = input("Customer C (Vanilla latte): Which mug does Customer C get? ").strip().lower()
-            customer_d_mug = input("Customer D (Espresso): Which mug does Customer D get? ").strip().lower()
+            customer_a_mug = prompt("\nCustomer A (Latte): Which mug does Customer A get? ").strip().lower()
+            customer_b_mug = prompt("Customer B (Cappuccino): Which mug does Customer B get? ").strip().lower()
+            customer_c_mug = prompt("Customer C (Vanilla latte): Which mug does Customer C get? ").strip().lower()
+            customer_d_mug = prompt("Customer D (Espresso): Which mug does Customer D get? ").strip().lower()
 
             guesses = {
                 'A': customer_a_mug,
@@ -539,19 +741,103 @@ class MugPuzzle:
             typewriter_effect("\nBarista: oops! Some of your guesses were incorrect. Try again!")
             attempts -= 1
             moves.decrease(2)
-            print(f"{RED}\033[1mMOVES DECREASED: -{2}\033[0m{RESET}")
+            display(f"{RED}\033[1mMOVES DECREASED: -{2}\033[0m{RESET}")
 
         typewriter_effect("\nBarista: You've used all your attempts! Looks like your mug remains lost in the mix :(")
         return False  # Player loses
 
 
+@dataclass(frozen=True)
+class ConnectionsBoard:
+    """The categories of a Connections puzzle and their words, indexed for checking guesses.
+
+    A board is built once and shared by every puzzle played on it, so its indexes are only built once too.
+
+    Instance Attributes:
+        - categories: A read-only mapping of each category to its words, in order.
+        - words: Every word of every category, in order.
+        - word_categories: A mapping of each word, in lowercase, to its category.
+        - category_words: A mapping of each category to the set of its words in lowercase.
+        - exact_words: The set of every word, as written.
+
+    Representation Invariants:
+        - len(self.categories) > 0
+        - all(len(words) == len(self.words) // len(self.categories) for words in self.categories.values())
+        - len(self.word_categories) == len(self.words)
+    """
+    categories: Mapping[str, tuple[str, ...]]
+    words: tuple[str, ...]
+    word_categories: Mapping[str, str]
+    category_words: Mapping[str, frozenset[str]]
+    exact_words: frozenset[str]
+
+    @staticmethod
+    def from_data(categories: Mapping[str, Iterable[str]]) -> "ConnectionsBoard":
+        """Return the board with the given categories, each mapped to its words.
+
+        Raise a ValueError if the categories don't all have the same number of words, or if any word (ignoring
+        case) is in more than one category, since the board would not have exactly one solution.
+
+        >>> board = ConnectionsBoard.from_data({"Twos": ["Twin", "Pair"], "Eights": ["Octopus", "Octagon"]})
+        >>> board.word_categories["pair"], board.size
+        ('Twos', 2)
+        """
+        categories = {category: tuple(words) for category, words in categories.items()}
+        sizes = {len(words) for words in categories.values()}
+        if len(sizes) != 1 or 0 in sizes:
+            raise ValueError("Every category of a Connections board must have the same number of words.")
+
+        word_categories = {}
+        for category, words in categories.items():
+            for word in words:
+                if word.lower() in word_categories:
+                    raise ValueError(f"The word {word!r} is in more than one place on the Connections board.")
+                word_categories[word.lower()] = category
+
+        return ConnectionsBoard(MappingProxyType(categories),
+                                tuple(word for words in categories.values() for word in words),
+                                MappingProxyType(word_categories),
+                                MappingProxyType({category: frozenset(word.lower() for word in words)
+                                                  for category, words in categories.items()}),
+                                frozenset(word for words in categories.values() for word in words))
+
+    @property
+    def size(self) -> int:
+        """The number of words in each category, which is also the number of words in a guess and in each row of
+        the grid."""
+        return len(self.words) // len(self.categories)
+
+    def category_of(self, guess: Iterable[str]) -> Optional[str]:
+        """Return the category whose words, in lowercase, are exactly the given lowercase words, or None if there
+        is none.
+
+        >>> DEFAULT_CONNECTIONS_BOARD.category_of(["pair", "twin", "binary", "clone"])
+        'Two of a Kind'
+        """
+        guess = frozenset(guess)
+        category = self.word_categories.get(next(iter(guess), None))
+        if category is not None and self.category_words[category] == guess:
+            return category
+        return None
+
+
+# The board of the Connections puzzle in the Robarts Common Room
+DEFAULT_CONNECTIONS_BOARD = ConnectionsBoard.from_data({
+    "Two of a Kind": ["Binary", "Twin", "Pair", "Clone"],
+    "97th Oscar Nominated Films": ["Conclave", "Wicked", "Anora", "Nosferatu"],
+    "Having 8 of Something": ["Octopus", "Arachnids", "Octagon", "Medium pizza slices"],
+    "One__": ["Way Ticket", "Size Fits All", "Night Stand", "Hit Wonder"]
+})
+
+
 @dataclass
 class ConnectionsPuzzle():
     """A Connections puzzle where the player has to guess word associations.
 
     Instance Attributes:
-        - categories: A dictionary of 4 categories that maps to a list of 4 associating words.
-        - words: A list that contains all the words in categories in order.
+        - board: The board of the puzzle, shared with every other puzzle played on it.
+        - categories: A read-only mapping of each category to its words.
+        - words: A list that contains all the words in categories, shuffled into the order of the grid.
         - solved_categories: A set that tracks the categories solved by the player so far.
         - solved_words: A set representing the words that are already grouped in the right category.
         - max_attempts: An integer representing the maximum number of attempts at solving the puzzle.
@@ -562,24 +848,22 @@ class ConnectionsPuzzle():
         - self.words != []
         - self.max_attempts > 0
     """
-    categories: dict[str, list[str]]
+    board: ConnectionsBoard
+    categories: Mapping[str, tuple[str, ...]]
     words: list[str]
     solved_categories: set[str]
     solved_words: set[str]
     max_attempts: int
 
-    def __init__(self) -> None:
-        """Initialize a new Connections Puzzle."""
-        # Word categories and their associated words
-        self.categories = {
-            "Two of a Kind": ["Binary", "Twin", "Pair", "Clone"],
-            "97th Oscar Nominated Films": ["Conclave", "Wicked", "Anora", "Nosferatu"],
-            "Having 8 of Something": ["Octopus", "Arachnids", "Octagon", "Medium pizza slices"],
-            "One__": ["Way Ticket", "Size Fits All", "Night Stand", "Hit Wonder"]
-        }
+    def __init__(self, rng: Optional[random.Random] = None,
+                 board: ConnectionsBoard = DEFAULT_CONNECTIONS_BOARD) -> None:
+        """Initialize a new Connections Puzzle on the given board, whose grid is shuffled by the given random number
+        generator, or by the random module's if rng is None."""
+        self.board = board
+        self.categories = board.categories
 
-        self.words = [word for category in self.categories.values() for word in category]
-        random.shuffle(self.words)  # Reorders the words to create the shuffled grid
+        self.words = list(board.words)
+        (random if rng is None else rng).shuffle(self.words)  # Reorders the words to create the shuffled grid
 
         self.solved_categories = set()
 
@@ -598,110 +882,107 @@ class ConnectionsPuzzle():
             "\nAs a wise man once said: 'Language is the thread that binds us "
             "together across time and space,'"
             "It connects us in ways words alone cannot explain.'"
-            "\nSo here’s a challenge to sharpen your mind. I’ll give you 16 random words."
-            "\nYour task? Group them into 4 categories based on their hidden connections."
+            f"\nSo here’s a challenge to sharpen your mind. I’ll give you {len(self.words)} random words."
+            f"\nYour task? Group them into {len(self.categories)} categories based on their hidden connections."
             "\nSolve this, and you’ll be one step closer to the answer you seek."
         )
-        time.sleep(1)
+        pause(1)
 
-        input("\nPress Enter to begin..\n")
+        prompt("\nPress Enter to begin..\n")
 
     def display_grid(self) -> None:
-        """Displays the shuffled grid of 16 words (4x4), highlighting solved words."""
+        """Displays the shuffled grid of words, one category's worth of words to a row, highlighting solved words."""
         typewriter_effect("\nHere's your shuffled grid of words:")
-        time.sleep(1)
-        for i in range(0, 16, 4):
-            row = self.words[i:i + 4]
+        pause(1)
+        size = self.board.size
+        for i in range(0, len(self.words), size):
+            row = self.words[i:i + size]
             row_display = [f"\033[1m{word}\033[0m" if word in self.solved_words else word for word in row]
-            print(f"\n{row_display[0]:<20} {row_display[1]:<20} {row_display[2]:<20} {row_display[3]:<20}")
-        print()
-
-    def check_guess(self, guess: str) -> list:
-        """Checks the player's guess and gives feedback."""
-        correct_categories = []
-        guessed_words = set(guess)
-
-        for category, words in self.categories.items():
-            if guessed_words == {word.lower() for word in words}:
-                correct_categories.append(category)
+            display("\n" + " ".join(f"{word:<20}" for word in row_display))
+        display()
 
-        return correct_categories
+    def check_guess(self, guess: Iterable[str]) -> list:
+        """Checks the player's guess, a collection of lowercase words, and returns the categories it matches."""
+        category = self.board.category_of(guess)
+        return [] if category is None else [category]
 
     def play_game(self, moves: Moves) -> bool:
         """Runs the connections puzzle."""
         self.game_introduction()
 
-        print("\033[1mHere is a reminder of how the game works!\033[0m")
-        time.sleep(1)
+        display("\033[1mHere is a reminder of how the game works!\033[0m")
+        pause(1)
 
-        print("\nYour task is to group 4 words into categories.")
-        time.sleep(1)
+        display(f"\nYour task is to group {self.board.size} words into categories.")
+        pause(1)
 
-        print("\nYou have 5 guesses to figure out all the categories.")
-        time.sleep(1)
+        display(f"\nYou have {self.max_attempts} guesses to figure out all the categories.")
+        pause(1)
 
-        print("\nEach guess will be checked for one category at a time.")
-        time.sleep(1)
+        display("\nEach guess will be checked for one category at a time.")
+        pause(1)
 
-        print("\nGood luck!")
-        time.sleep(1.5)
+        display("\nGood luck!")
+        pause(1.5)
 
         self.display_grid()
 
         attempts = 0
         remaining_words = self.words[:]
+        remaining_lowercase = {word.lower() for word in remaining_words}
 
         while attempts < self.max_attempts and len(self.solved_categories) < len(self.categories):
-            print("\nCurrent Words: ", ", ".join(sorted(remaining_words)))
+            display("\nCurrent Words: ", ", ".join(sorted(remaining_words)))
 
             # Store the player's guess
-            guess = input("\nEnter 4 words you think belong together, separated by commas: ").strip().lower().split(",")
+            guess = prompt(f"\nEnter {self.board.size} words you think belong together, separated by commas: ")
+            guess = guess.strip().lower().split(",")
             guess = [word.strip() for word in guess]
 
             # Check if guess is valid
-            if len(guess) != 4 or not all(any(word.lower() == w.lower() for w in remaining_words) for word in guess):
+            if len(guess) != self.board.size or not all(word in remaining_lowercase for word in guess):
                 typewriter_effect("\nLibrarian: Hmm... That doesn't seem quite right. Try again.")
                 continue
 
             # Check if the guess matches a category
-            category_found = False
-            for category, words in self.categories.items():
-                if category not in self.solved_categories and set(guess) == set(word.lower() for word in words):
-                    self.solved_categories.add(category)
-                    self.solved_words.update(words)
-                    remaining_words = [word for word in remaining_words if word not in words]
-                    print(f"\nLibrarian: Well done! You discovered the category: {category}.\n")
-                    category_found = True
-                    break  # Stop checking other categories
+            category = self.board.category_of(guess)
+            category_found = category is not None and category not in self.solved_categories
+            if category_found:
+                words = self.categories[category]
+                self.solved_categories.add(category)
+                self.solved_words.update(words)
+                remaining_words = [word for word in remaining_words if word not in words]
+                remaining_lowercase.difference_update(self.board.category_words[category])
+                display(f"\nLibrarian: Well done! You discovered the category: {category}.\n")
 
             if not category_found:
-                correct_guesses = sum(1 for word in guess if any(word in category_words
-                                                                 for category_words in self.categories.values()))
+                # Guesses are lowercase, so only words written in lowercase on the board count here
+                correct_guesses = sum(1 for word in guess if word in self.board.exact_words)
 
                 if correct_guesses == 3:
-                    print("\nLibrarian: So close! One of your words is incorrect.")
+                    display("\nLibrarian: So close! One of your words is incorrect.")
                 elif correct_guesses == 2:
-                    print("\nLibrarian: Almost there! Two of your words are incorrect.")
+                    display("\nLibrarian: Almost there! Two of your words are incorrect.")
                 elif correct_guesses == 1:
-                    print("\nLibrarian: Almost there! Three of your words are incorrect.")
+                    display("\nLibrarian: Almost there! Three of your words are incorrect.")
                 else:
-                    print("\nLibrarian: Hmmm..that is not a category I had in mind. Try again!")
+                    display("\nLibrarian: Hmmm..that is not a category I had in mind. Try again!")
 
-                time.sleep(2)
+                pause(2)
 
                 attempts += 1
                 moves.decrease(2)  # Deduct player's total number of moves by 2 for each attempt
-                print(f"{RED}\033[1mMOVES DECREASED: -{2}\033[0m{RESET}")
+                display(f"{RED}\033[1mMOVES DECREASED: -{2}\033[0m{RESET}")
 
             if len(self.solved_categories) == len(self.categories):
-                print("Congratulations! You've solved all categories!")
+                display("Congratulations! You've solved all categories!")
                 guess_room_number = self.guess_room_number(moves)
                 if guess_room_number:
                     return True  # The player successfully completed the puzzle
 
             self.display_grid()
 
-        print("Game Over! Better luck next time.")
+        display("Game Over! Better luck next time.")
         return False  # The player failed to complete the puzzle
 
     def guess_room_number(self, moves: Moves) -> bool:
@@ -711,9 +992,9 @@ class ConnectionsPuzzle():
             - self.play_game() == True
         """
         typewriter_effect("\nHere are the solved categories: ")
-        time.sleep(1)
+        pause(1)
         for category in self.solved_categories:
-            print("-", category)
+            display("-", category)
 
         typewriter_effect(
             "Librarian: Ah, sharper than I took you for at first glance!"
@@ -725,13 +1006,13 @@ class ConnectionsPuzzle():
         )
 
         while True:
-            player_guess = input("\nWhich study room do you think your roommate is in? (hint: 2XXXXX) ")
+            player_guess = prompt("\nWhich study room do you think your roommate is in? (hint: 2XXXXX) ")
 
             if player_guess.strip() == "212789":
-                print("\nCorrect! Let's take our journey there!")
+                display("\nCorrect! Let's take our journey there!")
                 return True
             else:
-                print("\nNot quite there... Try again!")
+                display("\nNot quite there... Try again!")
                 moves.decrease(1)
 
         return False
@@ -741,7 +1022,7 @@ class ConnectionsPuzzle():
 
         # Inform player about the laptop charger
         typewriter_effect("Roommate: OMG! You finally made it! Here’s your laptop charger.")
-        time.sleep(1)
+        pause(1)
 
         # Hint to player about Bahen Centre
         typewriter_effect(
@@ -771,6 +1052,9 @@ class CaesarCipher:
 
     Representation Invariants:
         - 0 <= shift_key <= 25
+
+    Text is shifted with a translation table (see shift_tables), so encrypting or decrypting is a single
+    str.translate however long the text is.
     """
     shift_key: int
     alphabet: str
@@ -779,30 +1063,65 @@ class CaesarCipher:
     def __init__(self, shift_key: int, encrypted_message: str) -> None:
         """Initialize a an instance of CaesarCipher."""
         self.shift_key = shift_key
-        self.alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        self.alphabet = CIPHER_ALPHABET
         self.encrypted_message = encrypted_message
 
     def encrypt(self, text: str) -> str:
-        """Encrypt the given text using the Caesar Cipher."""
-        encrypted_text = []
-        for char in text.upper():
-            if char in self.alphabet:
-                new_index = (self.alphabet.index(char) + self.shift_key) % len(self.alphabet)
-                encrypted_text.append(self.alphabet[new_index])
-            else:
-                encrypted_text.append(char)
-        return ''.join(encrypted_text)
+        """Encrypt the given text using the Caesar Cipher.
+
+        >>> CaesarCipher(20, "").encrypt("Hello, world!")
+        'BYFFI, QILFX!'
+        """
+        tables = shift_tables(self.alphabet)
+        return text.upper().translate(tables[self.shift_key % len(tables)])
 
     def decrypt(self, text: str, shift: int) -> str:
         """Decrypt the given text using the Caesar Cipher."""
-        decrypted_text = []
-        for char in text.upper():
-            if char in self.alphabet:
-                new_index = (self.alphabet.index(char) - shift) % len(self.alphabet)
-                decrypted_text.append(self.alphabet[new_index])
-            else:
-                decrypted_text.append(char)
-        return ''.join(decrypted_text)
+        tables = shift_tables(self.alphabet)
+        return text.upper().translate(tables[-shift % len(tables)])
+
+    def find_key(self, crib: str) -> Optional[int]:
+        """Return the smallest shift that decrypts this puzzle's encrypted message to text containing crib, or None
+        if no shift does. A generated puzzle is only solvable if this is not None.
+
+        >>> CaesarCipher(20, "BYFFI QILFX").find_key("HELLO WORLD")
+        20
+        """
+        text = self.encrypted_message.upper()
+        tables = shift_tables(self.alphabet)
+        for shift in range(len(tables)):
+            if crib in text.translate(tables[-shift % len(tables)]):
+                return shift
+        return None
+
+    @staticmethod
+    def score_shifts(text: str) -> list[float]:
+        """Return how unlike English the given text is when decrypted with each shift, from 0 to 25, as the
+        chi-squared distance of its letter counts from ENGLISH_LETTER_FREQUENCIES. Lower is more like English.
+
+        The letters of text are counted once, and every shift is scored from those counts.
+        """
+        counts = letter_counts(text)
+        total = sum(counts)
+        if total == 0:
+            return [0.0] * len(CIPHER_ALPHABET)
+
+        expected = [total * frequency for frequency in ENGLISH_LETTER_FREQUENCIES]
+        size = len(counts)
+        # Decrypting with a shift turns the letter at index i + shift into the letter at index i
+        return [sum((counts[(i + shift) % size] - expected[i]) ** 2 / expected[i] for i in range(size))
+                for shift in range(size)]
+
+    @staticmethod
+    def crack(text: str) -> int:
+        """Return the shift that most likely encrypted the given English text, by frequency analysis.
+
+        >>> cipher = CaesarCipher(11, "")
+        >>> CaesarCipher.crack(cipher.encrypt("The quick brown fox jumps over the lazy dog, then naps in the sun."))
+        11
+        """
+        scores = CaesarCipher.score_shifts(text)
+        return min(range(len(scores)), key=scores.__getitem__)
 
     def unlock_door(self, moves: Moves) -> bool:
         """Start the game where the player guesses the key to unlock the Lost and Found door."""
@@ -811,29 +1130,70 @@ class CaesarCipher:
         while attempts < 3 and moves.moves > 0:
             try:
                 # Prompt for the key
-                guessed_key = int(input("Enter the key to unlock the door: "))
+                guessed_key = int(prompt("Enter the key to unlock the door: "))
                 decrypted_message = self.decrypt(self.encrypted_message, guessed_key)
 
                 # Check if the decrypted message makes sense
-                if "HELLO WORLD" in decrypted_message:
-                    print(f"Congratulations! You've unlocked the Lost and Found. The message says: {decrypted_message}")
+                if CIPHER_PLAINTEXT in decrypted_message:
+                    display("Congratulations! You've unlocked the Lost and Found. "
+                            f"The message says: {decrypted_message}")
                     return True  # Exit the game after a correct answer
                 else:
-                    print("The decryption didn't work. Try again.")
+                    display("The decryption didn't work. Try again.")
                     attempts += 1
                     moves.decrease(1)  # Reduce the remaining moves for each attempt
-                    print(f"{RED}\033[1mMOVES DECREASED: -{1}\033[0m{RESET}")
+                    display(f"{RED}\033[1mMOVES DECREASED: -{1}\033[0m{RESET}")
             except ValueError:
-                print("Invalid input. Please enter a number.")
+                display("Invalid input. Please enter a number.")
 
         if attempts == 3:
-            print("Sorry, you've used all your attempts. Better luck next time.")
+            display("Sorry, you've used all your attempts. Better luck next time.")
         else:
-            print("Sorry, you've run out of moves. Better luck next time.")
+            display("Sorry, you've run out of moves. Better luck next time.")
 
         return False
 
 
+@lru_cache(maxsize=None)
+def shift_tables(alphabet: str = CIPHER_ALPHABET) -> tuple[dict[int, int], ...]:
+    """Return a str.translate table for each shift of the given alphabet, from 0 to len(alphabet) - 1, that
+    shifts each of its letters forward by that many places and leaves every other character alone.
+
+    >>> "HAL".translate(shift_tables()[1])
+    'IBM'
+    """
+    return tuple(str.maketrans(alphabet, alphabet[shift:] + alphabet[:shift]) for shift in range(len(alphabet)))
+
+
+def letter_counts(text: str) -> list[int]:
+    """Return the number of times each letter of CIPHER_ALPHABET appears in text, in either case.
+
+    Long text is counted in a single pass with NumPy when it is installed, and letter by letter otherwise.
+
+    >>> letter_counts("Abba")[:3]
+    [2, 2, 0]
+    """
+    text = text.upper()
+    numpy = _numpy() if len(text) >= NUMPY_MIN_LENGTH else None
+    if numpy is None:
+        return [text.count(letter) for letter in CIPHER_ALPHABET]
+
+    # Bytes below 128 only ever encode ASCII characters in UTF-8, so this counts the letters exactly
+    counts = numpy.bincount(numpy.frombuffer(text.encode("utf-8"), dtype=numpy.uint8), minlength=128)
+    first = ord(CIPHER_ALPHABET[0])
+    return counts[first:first + len(CIPHER_ALPHABET)].tolist()
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Optional[ModuleType]:
+    """Return the numpy module, or None if it isn't installed. It is only imported the first time it's needed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
 if __name__ == "__main__":
     import python_ta
     python_ta.check_all(config={
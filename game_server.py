@@ -0,0 +1,352 @@
+"""CSC111 Project 1: Text Adventure Game - Game Server
+
+This module hosts many games at once over TCP, one per connection, so players can connect with telnet or nc.
+
+The server runs on asyncio and never waits on a player itself. The game (including its puzzles) asks its
+questions with ordinary blocking calls, so each session plays its game on a thread of its own and only that
+thread waits for the player's next line. The event loop just moves lines between the sockets and the sessions,
+so a slow player, or one in the middle of a puzzle, never holds up anybody else.
+
+Threads are what limit how many players the server can host. Every game that is being played (not put aside,
+see below) holds a thread, with a stack of SESSION_STACK_SIZE, until its player next answers, so the number of
+players who are active at once is capped by the operating system's limit on threads per process and by memory
+for their stacks (about 2.5 GiB of address space for 10,000 players). The games' threads also share the GIL,
+so the server uses one CPU core however many players it has; host more players by running more servers.
+
+Everything a game shows is collected as UTF-8 bytes in a BufferedRenderer, with the game's pre-rendered
+messages (see messages) added as they were encoded once, and sent to the client in a single write whenever the
+game asks for input. The server can also strip colours, for clients that don't understand ANSI colour codes.
+
+A player who leaves their game waiting for an action for longer than the idle timeout keeps their connection,
+but their game is packed into a snapshot (see AdventureGame.snapshot) and its thread ends. The game is
+rehydrated from the snapshot, on a new thread, as soon as they send their next line.
+
+The server can also profile every game it hosts with one shared Profiler (see profiler), and serve the
+measurements over HTTP in the Prometheus text format, at /metrics on the metrics port.
+
+Usage:
+    python game_server.py --port 4000
+    python game_server.py --port 4000 --metrics-port 9100 --profile-dump profile.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import queue
+import threading
+from typing import Optional
+
+from additional_functions import BufferedRenderer, GameIO
+from adventure import AdventureGame, MAX_MOVES
+from profiler import Profiler
+
+# The stack size of each session's thread. The game never recurses deeply, so this keeps thousands of
+# sessions cheap.
+SESSION_STACK_SIZE = 256 * 1024
+
+# The number of seconds a game may wait for the player's next action before it is snapshotted and its thread
+# ends. None means games are never put aside.
+IDLE_TIMEOUT = 300.0
+
+# The longest request line and headers, in bytes, that the metrics endpoint reads before it gives up on a request
+MAX_METRICS_REQUEST = 8192
+
+
+class SessionClosed(Exception):
+    """Raised in a session's thread when the game asks for input after its client has disconnected."""
+
+
+class SessionIdle(Exception):
+    """Raised in a session's thread when its game has been put aside in a snapshot, so the thread can end."""
+
+
+class GameSession:
+    """A game being played by one client of the server.
+
+    Instance Attributes:
+        - game: the game the client is playing, or None while it is put aside in a snapshot.
+        - idle_timeout: the number of seconds the game may wait for an action before it is put aside, or None
+          if it never is.
+        - renderer: the renderer that collects what the game shows until it is sent to the client.
+        - profiler: the profiler that measures the game, or None if it is not profiled.
+    """
+    # Private Instance Attributes:
+    #   - _game_data_file, _initial_location_id, _moves: the settings the game was started with.
+    #   - _io: the GameIO through which the game talks to the client, through renderer.
+    #   - _snapshot: the snapshot of the game while it is put aside, otherwise None.
+    #   - _lock: held while the game is being put aside or rehydrated, so a line can't arrive in between.
+    #   - _loop: the event loop that owns the client's connection.
+    #   - _writer: the stream that sends text to the client.
+    #   - _lines: the lines the client has sent that the game has not read yet, followed by None once the
+    #             client has disconnected.
+    game: Optional[AdventureGame]
+    idle_timeout: Optional[float]
+    renderer: BufferedRenderer
+    profiler: Optional[Profiler]
+    _game_data_file: str
+    _initial_location_id: int
+    _moves: int
+    _io: GameIO
+    _snapshot: Optional[bytes]
+    _lock: threading.Lock
+    _loop: asyncio.AbstractEventLoop
+    _writer: asyncio.StreamWriter
+    _lines: queue.SimpleQueue[Optional[str]]
+
+    def __init__(self, game_data_file: str, initial_location_id: int, moves: int,
+                 loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter,
+                 idle_timeout: Optional[float] = IDLE_TIMEOUT, colour: bool = True,
+                 profiler: Optional[Profiler] = None) -> None:
+        """Initialize a new session whose game talks to the client through the given writer, with or without
+        colour, and is measured by the given profiler if there is one."""
+        self.idle_timeout = idle_timeout
+        self.profiler = profiler
+        self._game_data_file = game_data_file
+        self._initial_location_id = initial_location_id
+        self._moves = moves
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._writer = writer
+        self._lines = queue.SimpleQueue()
+
+        self.renderer = BufferedRenderer(flush=self._flush, colour=colour)
+        self._io = GameIO(read=self._read, renderer=self.renderer)
+        self.game = self._new_game()
+
+    def start(self, resume: bool = False) -> None:
+        """Play the game on a new thread of its own."""
+        threading.Thread(target=self.play, args=(resume,), daemon=True).start()
+
+    def feed(self, line: Optional[str]) -> None:
+        """Hand the given line from the client to the game, or None if the client has disconnected.
+
+        If the game has been put aside, it is rehydrated from its snapshot first, or simply dropped if the
+        client has disconnected.
+        """
+        with self._lock:
+            if self._snapshot is not None:
+                if line is None:
+                    self._snapshot = None
+                    self._loop.call_soon_threadsafe(self._writer.close)
+                    return
+
+                self.game = self._new_game()
+                self.game.restore(self._snapshot)
+                self._snapshot = None
+                self.start(resume=True)
+
+            self._lines.put(line)
+
+    def play(self, resume: bool = False) -> None:
+        """Play the game until it ends or the client disconnects, then close the connection. If the game is put
+        aside instead, return and leave the connection open.
+
+        This blocks while the game waits for the client, so it must be called on the session's own thread.
+        """
+        closing = True
+        try:
+            self.game.play(resume)
+        except SessionIdle:
+            closing = False
+        except SessionClosed:
+            pass
+        finally:
+            if closing:
+                self._flush()
+                self._loop.call_soon_threadsafe(self._writer.close)
+
+    def _new_game(self) -> AdventureGame:
+        """Return a new game with this session's settings that talks to the client."""
+        return AdventureGame(self._game_data_file, self._initial_location_id, self._moves, self._io,
+                             profiler=self.profiler)
+
+    def _read(self, message: str) -> str:
+        """Send everything shown so far along with the given prompt, then wait for the client's next line.
+
+        If the game is waiting for the player's next action and no line arrives within the idle timeout, put the
+        game aside in a snapshot and raise SessionIdle.
+        """
+        self.renderer.show(message)
+        self._flush()
+
+        if self.idle_timeout is None or not self.game.awaiting_action:
+            line = self._lines.get()
+        else:
+            try:
+                line = self._lines.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if self._lines.empty():
+                        self._snapshot = self.game.snapshot()
+                        self.game = None
+                        raise SessionIdle from None
+                line = self._lines.get()
+
+        if line is None:
+            raise SessionClosed
+        return line
+
+    def _flush(self) -> None:
+        """Send everything the game has shown since the last flush to the client in a single write."""
+        data = self.renderer.take()
+        if data:
+            self._loop.call_soon_threadsafe(self._send, data)
+
+    def _send(self, data: bytes) -> None:
+        """Write the given data to the client, unless the connection is already closing.
+
+        This must be called on the event loop's thread.
+        """
+        if not self._writer.is_closing():
+            self._writer.write(data)
+
+
+class GameServer:
+    """A TCP server that hosts a separate game for every client that connects.
+
+    Instance Attributes:
+        - game_data_file: the game data file that every session plays.
+        - initial_location_id: the location where every session begins.
+        - moves: the number of moves every session begins with.
+        - idle_timeout: the number of seconds a session's game may wait for an action before it is put aside, or
+          None if games are never put aside.
+        - colour: whether clients are sent colours, or the ANSI colour codes are stripped from their output.
+        - profiler: the profiler shared by every session's game, or None if games are not profiled.
+        - sessions: the sessions whose clients are currently connected.
+    """
+    game_data_file: str
+    initial_location_id: int
+    moves: int
+    idle_timeout: Optional[float]
+    colour: bool
+    profiler: Optional[Profiler]
+    sessions: set[GameSession]
+
+    def __init__(self, game_data_file: str = 'game_data.json', initial_location_id: int = 1,
+                 moves: int = MAX_MOVES, idle_timeout: Optional[float] = IDLE_TIMEOUT, colour: bool = True,
+                 profiler: Optional[Profiler] = None) -> None:
+        """Initialize a new server for the given game, with no sessions, whose games are measured by the given
+        profiler if there is one."""
+        self.game_data_file = game_data_file
+        self.initial_location_id = initial_location_id
+        self.moves = moves
+        self.idle_timeout = idle_timeout
+        self.colour = colour
+        self.profiler = profiler
+        self.sessions = set()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Host a new game for the client connected through the given streams until it disconnects."""
+        session = GameSession(self.game_data_file, self.initial_location_id, self.moves,
+                              asyncio.get_running_loop(), writer, self.idle_timeout, self.colour,
+                              self.profiler)
+        self.sessions.add(session)
+        session.start()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                session.feed(line.decode("utf-8", "replace").rstrip("\r\n"))
+        except ConnectionError:
+            pass
+        finally:
+            session.feed(None)
+            self.sessions.discard(session)
+
+    def metrics(self) -> str:
+        """Return the server's measurements in the Prometheus text format: those of its profiler, if it has one,
+        and the number of sessions."""
+        text = "" if self.profiler is None else self.profiler.prometheus()
+        return (text + "# HELP adventure_sessions The number of clients currently connected.\n"
+                "# TYPE adventure_sessions gauge\n"
+                f"adventure_sessions {len(self.sessions)}\n")
+
+    async def handle_metrics(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one HTTP request on the metrics port: GET /metrics is answered with the server's measurements,
+        and anything else with 404 Not Found."""
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+
+        method, path = (request.split(b"\r\n", 1)[0].split() + [b"", b""])[:2]
+        if method in (b"GET", b"HEAD") and path == b"/metrics":
+            status, body = "200 OK", self.metrics().encode("utf-8")
+        else:
+            status, body = "404 Not Found", b"Not Found\n"
+        headers = (f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                   f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("ascii")
+        writer.write(headers if method == b"HEAD" else headers + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def serve(self, host: str, port: int, ready: Optional[asyncio.Event] = None,
+                    metrics_port: Optional[int] = None) -> None:
+        """Accept clients on the given host and port until cancelled, setting ready once it is listening. If
+        metrics_port is given, also serve the server's measurements over HTTP on that port (see metrics)."""
+        threading.stack_size(SESSION_STACK_SIZE)
+        server = await asyncio.start_server(self.handle_client, host, port, backlog=4096)
+        metrics_server = None
+        if metrics_port is not None:
+            metrics_server = await asyncio.start_server(self.handle_metrics, host, metrics_port,
+                                                        limit=MAX_METRICS_REQUEST)
+        if ready is not None:
+            ready.set()
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if metrics_server is not None:
+                metrics_server.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the game server from the command line."""
+    parser = argparse.ArgumentParser(description="Host adventure games over TCP.")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=4000, help="the port to listen on")
+    parser.add_argument("--game-data", default="game_data.json", help="the game data file to play")
+    parser.add_argument("--moves", type=int, default=MAX_MOVES, help="the number of moves each player starts with")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="the number of seconds a game may wait for an action before it is put aside, or 0 "
+                             "to never put games aside")
+    parser.add_argument("--no-colour", dest="colour", action="store_false",
+                        help="strip colours from what clients are sent, for clients that don't show them")
+    parser.add_argument("--profile", action="store_true", help="measure how long the games' commands take")
+    parser.add_argument("--profile-dump", metavar="FILE",
+                        help="profile the games and write the measurements to FILE as JSON every few seconds")
+    parser.add_argument("--metrics-port", type=int,
+                        help="profile the games and serve the measurements at /metrics on this port")
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.profile or args.profile_dump or args.metrics_port is not None:
+        profiler = Profiler(dump_file=args.profile_dump)
+    server = GameServer(args.game_data, 1, args.moves, args.idle_timeout or None, args.colour, profiler)
+
+    async def run_server() -> None:
+        """Serve forever, announcing the address once the server is listening."""
+        ready = asyncio.Event()
+        serving = asyncio.create_task(server.serve(args.host, args.port, ready, args.metrics_port))
+        await ready.wait()
+        print(f"Serving on {args.host}:{args.port}", flush=True)
+        if args.metrics_port is not None:
+            print(f"Serving metrics on http://{args.host}:{args.metrics_port}/metrics", flush=True)
+        await serving
+
+    try:
+        asyncio.run(run_server())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
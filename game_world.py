@@ -0,0 +1,212 @@
+"""CSC111 Project 1: Text Adventure Game - Game World
+
+This module loads game data files into world templates. A WorldTemplate holds everything about a world that
+never changes during a game (names, descriptions, commands and Item objects) and is shared by every game
+started from the same file. Each game only gets a small set of Location objects of its own that point into the
+template, along with the few things a player can change: which locations they have visited, where the items
+are, and any commands that a location has changed (see Location.set_command). A game's Location objects are
+only created as it uses them (see GameLocations), and a template's descriptions are only read from its text
+blob as they are needed (see descriptions). A template also holds the puzzles its world declares, and the handlers
+made for them (see puzzle_registry).
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Collection, Mapping, Optional
+
+from commands import CommandTable
+from descriptions import TextBlob, read_description
+from game_entities import Item, Location
+from puzzle_registry import DEFAULT_PUZZLES, PuzzleHandler, PuzzleSpec, dispatch_table, puzzles_from_data
+
+
+@dataclass(frozen=True)
+class LocationTemplate:
+    """The unchanging data of one location, shared by every game played in its world.
+
+    Instance Attributes:
+        - id_num: The unique integer id of this location.
+        - name: The name of this location.
+        - text: The blob that holds this location's descriptions.
+        - brief_ref: The (offset, length) in text of the description shown when the player returns to this
+                     location.
+        - long_ref: The (offset, length) in text of the description shown on the player's first visit.
+        - available_commands: A read-only mapping of the commands available at this location to the id of the
+                              location they lead to, or None if they don't move the player.
+        - item_ids: The ids of the items that start at this location, or None if it never holds items.
+        - visited: Whether this location starts out visited.
+        - sub_locations: The ids of the sublocations within this location, or None if it has none.
+    """
+    id_num: int
+    name: str
+    text: TextBlob
+    brief_ref: tuple[int, int]
+    long_ref: tuple[int, int]
+    available_commands: Mapping[str, Optional[int]]
+    item_ids: Optional[tuple[int, ...]]
+    visited: bool
+    sub_locations: Optional[tuple[int, ...]]
+
+    @property
+    def brief_description(self) -> str:
+        """The description shown when the player returns to this location, read from text."""
+        return read_description(self.text, *self.brief_ref)
+
+    @property
+    def long_description(self) -> str:
+        """The description shown on the player's first visit, read from text."""
+        return read_description(self.text, *self.long_ref)
+
+    @cached_property
+    def command_table(self) -> CommandTable:
+        """The commands available at this location, compiled once and shared by every game."""
+        return CommandTable(self.available_commands)
+
+    def new_location(self, items_by_id: Mapping[int, Item]) -> Location:
+        """Return a new Location for one game, sharing this template's data, holding the Item objects from
+        items_by_id for the items that start here. Its descriptions are left in this template's text until they
+        are shown."""
+        items = None if self.item_ids is None else [items_by_id[item_id] for item_id in self.item_ids
+                                                    if item_id in items_by_id]
+        return Location(self.id_num, self.name, available_commands=self.available_commands, items=items,
+                        visited=self.visited, sub_locations=self.sub_locations, command_table=self.command_table,
+                        template=self)
+
+
+class GameLocations(dict):
+    """The locations of one game, as a mapping from location id to Location.
+
+    A location's Location object is only created, from the world's template, the first time the game looks it
+    up, so starting a game costs nothing per location and a game only holds the locations it has used.
+    Iterating over this mapping only covers those locations; use the world template to go through them all.
+    """
+    # Private Instance Attributes:
+    #   - _templates: the templates of every location in the world, by id.
+    #   - _items_by_id: the game's Item objects, by id.
+    _templates: Mapping[int, LocationTemplate]
+    _items_by_id: Mapping[int, Item]
+
+    def __init__(self, templates: Mapping[int, LocationTemplate], items_by_id: Mapping[int, Item]) -> None:
+        """Initialize the locations of a new game in the world with the given location templates and items."""
+        super().__init__()
+        self._templates = templates
+        self._items_by_id = items_by_id
+
+    def __missing__(self, loc_id: int) -> Location:
+        """Create, store and return the Location with the given id.
+
+        Raise a KeyError if the world has no location with that id.
+        """
+        location = self._templates[loc_id].new_location(self._items_by_id)
+        self[loc_id] = location
+        return location
+
+
+@dataclass(frozen=True)
+class WorldTemplate:
+    """The unchanging data of a whole world, shared by every game played in it.
+
+    Instance Attributes:
+        - locations: A mapping from each location's id to its template.
+        - items: A mapping from each item's id to the item. Items never change during a game, so games share
+                 these objects.
+        - puzzles: A mapping from the id of each location with a puzzle to the puzzle, which is DEFAULT_PUZZLES
+                   if the world's game data declares none (see puzzle_registry).
+
+    Representation Invariants:
+        - all(loc_id == self.locations[loc_id].id_num for loc_id in self.locations)
+        - all(item_id == self.items[item_id].id_num for item_id in self.items)
+    """
+    locations: Mapping[int, LocationTemplate]
+    items: Mapping[int, Item]
+    puzzles: Mapping[int, PuzzleSpec] = field(default_factory=lambda: DEFAULT_PUZZLES)
+
+    @cached_property
+    def special_actions(self) -> Mapping[int, PuzzleHandler]:
+        """The handler of the special actions at each location with a puzzle, by location id.
+
+        The handlers are made, and the modules of their puzzle types imported, the first time this is used, and
+        are then shared by every game in this world.
+        """
+        return dispatch_table(self.puzzles)
+
+    def new_game_data(self) -> tuple[GameLocations, Collection[Item]]:
+        """Return the locations and items for a new game in this world, in the same form as
+        AdventureGame._load_game_data.
+
+        The locations hold Item objects already, and are only created as the game looks them up. The items are
+        a read-only view of this template's items, shared by every game.
+        """
+        return GameLocations(self.locations, self.items), self.items.values()
+
+    @staticmethod
+    def from_data(data: dict[str, Any]) -> WorldTemplate:
+        """Return the world template for the given parsed game data.
+
+        The locations' descriptions are packed into one TextBlob, so the parsed strings are not kept.
+        """
+        text, refs = TextBlob.pack(description for loc_data in data['locations']
+                                   for description in (loc_data['brief_description'], loc_data['long_description']))
+        locations = {}
+        for i, loc_data in enumerate(data['locations']):
+            items = loc_data['items']
+            sub_locations = loc_data['sub_locations']
+            locations[loc_data['id_num']] = LocationTemplate(
+                loc_data['id_num'], loc_data['name'], text, refs[2 * i], refs[2 * i + 1],
+                MappingProxyType(dict(loc_data['available_commands'])),
+                None if items is None else tuple(items), loc_data['visited'],
+                None if sub_locations is None else tuple(sub_locations))
+
+        items = {item_data['id_num']: Item(item_data['name'], item_data['id_num'], item_data['description'],
+                                           item_data['start_position'], item_data['target_position'])
+                 for item_data in data['items']}
+
+        return WorldTemplate(MappingProxyType(locations), MappingProxyType(items),
+                             puzzles_from_data(data.get('puzzles')))
+
+
+# The world template last loaded from each game data file, by filename, with the file's modification time then
+_worlds: dict[str, tuple[int, WorldTemplate]] = {}
+
+
+def load_world(filename: str) -> WorldTemplate:
+    """Return the world template for the game data file with the given filename, which is either a JSON file or
+    a compiled world (see compiled_world).
+
+    Templates are cached, so every game started from the same file shares one template. A file that has
+    changed since it was last loaded is read again, and its old template is forgotten.
+    """
+    modified_time = os.stat(filename).st_mtime_ns
+    cached = _worlds.get(filename)
+    if cached is None or cached[0] != modified_time:
+        cached = _worlds[filename] = (modified_time, _read_world(filename))
+    return cached[1]
+
+
+def clear_world_cache() -> None:
+    """Forget every world template loaded so far, so that the next load_world reads its file again."""
+    _worlds.clear()
+
+
+def _read_world(filename: str) -> WorldTemplate:
+    """Return the world template for the given game data file, read from the file."""
+    # Imported here, since compiled_world builds on this module
+    import compiled_world
+
+    if compiled_world.is_compiled(filename):
+        return compiled_world.load_compiled_world(filename)
+
+    with open(filename, 'r') as f:
+        return WorldTemplate.from_data(json.load(f))
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
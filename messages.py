@@ -0,0 +1,99 @@
+"""CSC111 Project 1: Text Adventure Game - Messages
+
+This module holds the game's messages that are shown over and over again with the same text, rendered ahead of
+time. A Message is rendered once, in colour and without it, and encoded as UTF-8 both ways, so showing it again
+(see additional_functions.display_message) costs no formatting at all, and a renderer that sends bytes (such as
+the game server's) can send it without encoding it either.
+
+Messages that are always the same are rendered when this module is imported. Messages that depend on a location
+or an amount are rendered the first time they are needed and kept in LRU caches shared by every game in the
+process. In particular, the list of actions shown at each location is rendered once per location of each world,
+from the location's shared CommandTable, and is rendered again only for a game that changes the location's
+commands.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from additional_functions import strip_colours
+from commands import CommandTable
+
+# The number of rendered messages of each kind kept in each cache
+MESSAGE_CACHE_SIZE = 1024
+
+# Text colors
+MAGENTA = "\033[35m"
+YELLOW = "\033[33m"
+RESET = "\033[0m"
+
+
+@dataclass(frozen=True)
+class Message:
+    """A message rendered ahead of time, ready to be shown with or without its colours.
+
+    Instance Attributes:
+        - text: the message, with its ANSI colour codes.
+        - plain: the message without its colour codes.
+        - data: text, encoded as UTF-8.
+        - plain_data: plain, encoded as UTF-8.
+    """
+    text: str
+    plain: str
+    data: bytes
+    plain_data: bytes
+
+    @staticmethod
+    def render(text: str) -> Message:
+        """Return the message with the given text, which may have ANSI colour codes.
+
+        >>> message = Message.render("\\033[35mWhat now?\\033[0m\\n")
+        >>> message.plain_data
+        b'What now?\\n'
+        """
+        plain = strip_colours(text)
+        return Message(text, plain, text.encode("utf-8"), plain.encode("utf-8"))
+
+
+INVALID_OPTION = Message.render("That was an invalid option; try again.\n")
+
+
+@lru_cache(maxsize=MESSAGE_CACHE_SIZE)
+def action_menu(menu: CommandTable, location_commands: CommandTable) -> Message:
+    """Return the list of actions shown before the player chooses what to do at a location with the given
+    commands, where the commands in menu are available everywhere."""
+    lines = [f"{MAGENTA}\nWhat now? Remember to choose wisely!{RESET}",
+             f"Available actions: {', '.join(menu.commands)}",
+             "At this location, you can also:"]
+    lines.extend(f"- {action}" for action in location_commands.commands)
+    return Message.render("\n".join(lines) + "\n")
+
+
+@lru_cache(maxsize=MESSAGE_CACHE_SIZE)
+def decision(choice: str) -> Message:
+    """Return the message that tells the player which action they chose.
+
+    >>> decision("look").plain
+    '========\\nYou decided to: look\\n'
+    """
+    return Message.render(f"========\n{MAGENTA}You decided to: {choice}{RESET}\n")
+
+
+@lru_cache(maxsize=MESSAGE_CACHE_SIZE)
+def points_earned(amount: int) -> Message:
+    """Return the message that tells the player they earned the given number of points."""
+    return Message.render(f"{YELLOW}\033[1mEARNED POINTS: +{amount}\033[0m\n")
+
+
+@lru_cache(maxsize=MESSAGE_CACHE_SIZE)
+def moves_earned(amount: int) -> Message:
+    """Return the message that tells the player they earned the given number of moves."""
+    return Message.render(f"{YELLOW}\033[1;33mMOVES EARNED: +{amount}\033[0m{RESET}\n")
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
@@ -0,0 +1,267 @@
+"""CSC111 Project 1: Text Adventure Game - Profiler
+
+This module measures where the time goes in a game's turns. A Profiler is attached to a game (see
+AdventureGame), and from then on times, in nanoseconds of a monotonic clock:
+    - every command the player chooses, from when it is chosen until the turn is over
+    - every handler the turn goes through: menu commands, other commands, each location's special actions
+      (including the puzzles), logging and describing the location
+It also counts the events added to the game's log and the net number of memory blocks each command allocates.
+
+Profiling is opt-in. It works by wrapping the methods of the one game it is attached to, so a game without a
+profiler runs exactly the same code as before, with no overhead at all.
+
+The measurements can be seen in three ways: the "stats" menu command, a JSON file that the profiler rewrites
+every so often, and a Prometheus text exposition, which the game server can serve over HTTP (see game_server).
+One profiler may be shared by many games, even on different threads.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from adventure import AdventureGame
+
+# The methods of a game that are timed as handlers, by the name they are reported under
+TIMED_METHODS = {
+    "handle_menu_choice": "menu",
+    "handle_non_menu_choice": "command",
+    "add_event_to_log": "logging",
+    "describe_location": "output"
+}
+
+# The number of seconds between dumps of the measurements to a profiler's dump file
+DEFAULT_DUMP_INTERVAL = 10.0
+
+
+@dataclass
+class Timing:
+    """The times taken by every call of something being profiled.
+
+    Instance Attributes:
+        - count: the number of calls.
+        - total_ns: the total time taken by the calls, in nanoseconds.
+        - max_ns: the longest time taken by any one call, in nanoseconds.
+
+    Representation Invariants:
+        - self.count >= 0
+        - 0 <= self.max_ns <= self.total_ns
+    """
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        """Record a call that took the given number of nanoseconds."""
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+
+    def mean_ns(self) -> float:
+        """Return the mean time taken by a call, in nanoseconds, or 0 if there have been none."""
+        return self.total_ns / self.count if self.count else 0.0
+
+
+class Profiler:
+    """The measurements of the games that this profiler is attached to.
+
+    Instance Attributes:
+        - commands: the timing of each command the player has chosen, by the command.
+        - handlers: the timing of each handler, by its name.
+        - allocated_blocks: the net number of memory blocks allocated by the commands.
+        - dump_file: the file the measurements are written to every dump_interval seconds, or None if they aren't.
+        - dump_interval: the number of seconds between dumps.
+        - clock: a function that returns the current time of a monotonic clock, in nanoseconds.
+    """
+    # Private Instance Attributes:
+    #   - _lock: held while the measurements or _last_dump are changed or read, since games on many threads may
+    #     share them.
+    #   - _last_dump: the time of the last dump, from clock.
+    commands: dict[str, Timing]
+    handlers: dict[str, Timing]
+    allocated_blocks: int
+    dump_file: Optional[str]
+    dump_interval: float
+    clock: Callable[[], int]
+    _lock: threading.Lock
+    _last_dump: int
+
+    def __init__(self, dump_file: Optional[str] = None, dump_interval: float = DEFAULT_DUMP_INTERVAL,
+                 clock: Callable[[], int] = time.perf_counter_ns) -> None:
+        """Initialize a new profiler with no measurements, which dumps them to dump_file every dump_interval
+        seconds if dump_file is given."""
+        self.commands = {}
+        self.handlers = {}
+        self.allocated_blocks = 0
+        self.dump_file = dump_file
+        self.dump_interval = dump_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._last_dump = clock()
+
+    def attach(self, game: AdventureGame) -> None:
+        """Measure everything the given game does from now on."""
+        for method, name in TIMED_METHODS.items():
+            setattr(game, method, self._timed(name, getattr(game, method)))
+        game.special_actions = {loc_id: self._timed(f"special_action_{loc_id}", handler)
+                                for loc_id, handler in game.special_actions.items()}
+        game.handle_choice = self._timed_command(game.handle_choice)
+        game.profiler = self
+
+    def _timed(self, name: str, handler: Callable) -> Callable:
+        """Return a function that calls the given handler and records how long it took under the given name."""
+        clock = self.clock
+
+        @wraps(handler)
+        def timed_handler(*args: Any, **kwargs: Any) -> Any:
+            """Call the handler and time it."""
+            start = clock()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                self.record(self.handlers, name, clock() - start)
+
+        return timed_handler
+
+    def _timed_command(self, handle_choice: Callable[[str, Any], None]) -> Callable[[str, Any], None]:
+        """Return a function that calls the given game's handle_choice and records how long the command took
+        and how many memory blocks it allocated."""
+        clock = self.clock
+
+        @wraps(handle_choice)
+        def timed_handle_choice(choice: str, current_location: Any) -> None:
+            """Carry out the choice and measure it."""
+            blocks = sys.getallocatedblocks()
+            start = clock()
+            try:
+                handle_choice(choice, current_location)
+            finally:
+                elapsed = clock() - start
+                with self._lock:
+                    self.commands.setdefault(choice, Timing()).add(elapsed)
+                    self.allocated_blocks += sys.getallocatedblocks() - blocks
+                self._maybe_dump()
+
+        return timed_handle_choice
+
+    def record(self, table: dict[str, Timing], name: str, elapsed_ns: int) -> None:
+        """Record a call of the thing with the given name in the given table that took elapsed_ns nanoseconds."""
+        with self._lock:
+            timing = table.get(name)
+            if timing is None:
+                timing = table[name] = Timing()
+            timing.add(elapsed_ns)
+
+    def events(self) -> int:
+        """Return the number of events added to the games' logs, which is the number of calls of their
+        add_event_to_log."""
+        timing = self.handlers.get(TIMED_METHODS["add_event_to_log"])
+        return 0 if timing is None else timing.count
+
+    def to_data(self) -> dict[str, Any]:
+        """Return all the measurements as data that can be written as JSON."""
+        with self._lock:
+            return {
+                'commands': {name: vars(timing).copy() for name, timing in self.commands.items()},
+                'handlers': {name: vars(timing).copy() for name, timing in self.handlers.items()},
+                'events': self.events(),
+                'allocated_blocks': self.allocated_blocks
+            }
+
+    def dump(self, filename: Optional[str] = None) -> None:
+        """Write all the measurements as JSON to the file with the given filename, or to dump_file if filename is
+        None. The file is replaced all at once, so it never holds a partly written dump, even if many threads dump
+        at the same time."""
+        filename = filename or self.dump_file
+        temporary = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.to_data(), f, indent=1)
+        os.replace(temporary, filename)
+
+    def _maybe_dump(self) -> None:
+        """Dump the measurements to dump_file if it is given and the last dump was at least dump_interval seconds
+        ago."""
+        if self.dump_file is None:
+            return
+        with self._lock:
+            now = self.clock()
+            if now - self._last_dump < self.dump_interval * 1e9:
+                return
+            self._last_dump = now
+        try:
+            self.dump()
+        except OSError:
+            pass  # The measurements are still kept in memory; they will be dumped again next time
+
+    def report(self) -> str:
+        """Return a table of the measurements for the player to read, slowest handler and command first.
+
+        >>> profiler = Profiler()
+        >>> profiler.record(profiler.handlers, "menu", 1500)
+        >>> print(profiler.report())
+        HANDLER                    CALLS  TOTAL ms   MEAN us    MAX us
+        menu                           1     0.002       1.5       1.5
+        COMMAND                    CALLS  TOTAL ms   MEAN us    MAX us
+        0 event(s) logged, 0 memory block(s) allocated
+        """
+        with self._lock:
+            lines = []
+            for title, table in (("HANDLER", self.handlers), ("COMMAND", self.commands)):
+                lines.append(f"{title:<25}{'CALLS':>7}{'TOTAL ms':>10}{'MEAN us':>10}{'MAX us':>10}")
+                for name, timing in sorted(table.items(), key=lambda entry: -entry[1].total_ns):
+                    lines.append(f"{name[:25]:<25}{timing.count:>7}{timing.total_ns / 1e6:>10.3f}"
+                                 f"{timing.mean_ns() / 1e3:>10.1f}{timing.max_ns / 1e3:>10.1f}")
+            lines.append(f"{self.events()} event(s) logged, {self.allocated_blocks} memory block(s) allocated")
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """Return the measurements in the Prometheus text exposition format.
+
+        >>> profiler = Profiler()
+        >>> profiler.record(profiler.commands, 'go "up"', 2_000_000)
+        >>> print(profiler.prometheus().splitlines()[2])
+        adventure_command_calls_total{command="go \\"up\\""} 1
+        """
+        with self._lock:
+            lines = []
+            for kind, table in (("command", self.commands), ("handler", self.handlers)):
+                series = [(f'{kind}="{_escape_label(name)}"', timing) for name, timing in sorted(table.items())]
+                lines.append(f"# HELP adventure_{kind}_calls_total The number of calls of each {kind}.")
+                lines.append(f"# TYPE adventure_{kind}_calls_total counter")
+                lines.extend(f"adventure_{kind}_calls_total{{{label}}} {timing.count}" for label, timing in series)
+                lines.append(f"# HELP adventure_{kind}_seconds_total The total time taken by each {kind}.")
+                lines.append(f"# TYPE adventure_{kind}_seconds_total counter")
+                lines.extend(f"adventure_{kind}_seconds_total{{{label}}} {timing.total_ns / 1e9:.9f}"
+                             for label, timing in series)
+                lines.append(f"# HELP adventure_{kind}_max_seconds The longest time taken by one call of each "
+                             f"{kind}.")
+                lines.append(f"# TYPE adventure_{kind}_max_seconds gauge")
+                lines.extend(f"adventure_{kind}_max_seconds{{{label}}} {timing.max_ns / 1e9:.9f}"
+                             for label, timing in series)
+            lines.append("# HELP adventure_events_total The number of events added to game logs.")
+            lines.append("# TYPE adventure_events_total counter")
+            lines.append(f"adventure_events_total {self.events()}")
+            lines.append("# HELP adventure_allocated_blocks_total The net number of memory blocks allocated by "
+                         "commands.")
+            lines.append("# TYPE adventure_allocated_blocks_total counter")
+            lines.append(f"adventure_allocated_blocks_total {self.allocated_blocks}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    """Return the given value escaped for use as a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
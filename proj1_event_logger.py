@@ -22,12 +22,21 @@ This file is Copyright (c) 2025 CSC111 Teaching Team
 """
 
 from __future__ import annotations
+from array import array
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
+from weakref import WeakValueDictionary
+from additional_functions import display
 from game_entities import Item
 
+if TYPE_CHECKING:
+    from event_journal import EventJournal
 
-@dataclass
+# Stands in for a missing location id, string or item in an EventList's arrays
+NONE = -(2 ** 31)
+
+
+@dataclass(slots=True)
 class Event:
     """
     A node representing one event in an adventure game.
@@ -55,84 +64,216 @@ class Event:
     item: Optional[Item] = None
 
 
+class EventView:
+    """One event stored in an EventList, with the same attributes as an Event.
+
+    Views are created when an event is looked up and read the event's fields straight from the list's arrays, so
+    an event costs the list a few bytes rather than a whole object. While a view is in use, looking the same event
+    up again returns the same view, so views can be compared with `is` like linked Event nodes.
+    """
+    __slots__ = ('_events', '_index', '__weakref__')
+    _events: EventList
+    _index: int
+
+    def __init__(self, events: EventList, index: int) -> None:
+        """Initialize a view of the event at the given index of the given list."""
+        self._events = events
+        self._index = index
+
+    def __repr__(self) -> str:
+        """Return a string representation of this event."""
+        return (f"Event(id_num={self.id_num!r}, description={self.description!r}, "
+                f"next_command={self.next_command!r}, item={self.item!r})")
+
+    @property
+    def id_num(self) -> Optional[int]:
+        """Integer id of this event's location."""
+        id_num = self._events._location_ids[self._index]
+        return None if id_num == NONE else id_num
+
+    @property
+    def description(self) -> Optional[str]:
+        """Long description of this event's location."""
+        return self._events._string(self._events._descriptions[self._index])
+
+    @property
+    def next_command(self) -> Optional[str]:
+        """The command stored with this event (see Event.next_command)."""
+        return self._events._string(self._events._commands[self._index])
+
+    @next_command.setter
+    def next_command(self, command: Optional[str]) -> None:
+        """Change the command stored with this event."""
+        self._events._commands[self._index] = self._events._intern(command)
+
+    @property
+    def item(self) -> Optional[Item]:
+        """The Item found at this event's location, if any."""
+        return self._events._items.get(self._events._item_ids[self._index])
+
+    @property
+    def next(self) -> Optional[EventView]:
+        """The next event in the list, or None if this is the last event."""
+        return self._events._view(self._index + 1)
+
+    @property
+    def prev(self) -> Optional[EventView]:
+        """The previous event in the list, or None if this is the first event."""
+        return self._events._view(self._index - 1)
+
+
 class EventList:
     """
-    A linked list of game events.
+    A list of game events, with the interface of a linked list.
+
+    The events are stored in parallel arrays of integers, one entry per event, rather than as linked Event
+    objects. Commands and descriptions are stored once each, in a table, and referred to by index, and items are
+    stored by id. first, last, and the next and prev of each event are EventViews onto the arrays.
 
     Instance Attributes:
         - first: Event object representing the first event in the game, or None if the list is empty.
         - last: Event object representing the last event in the game, or None if the list is empty.
+        - journal: the journal that every change to this list is appended to, or None if it is only kept in memory.
 
     Representation Invariants:
         - self.first is not None and self.last is not None
         - self.first.prev == None
         - self.last.next == None
     """
-    first: Optional[Event]
-    last: Optional[Event]
+    # Private Instance Attributes:
+    #   - _location_ids, _commands, _descriptions, _item_ids: the location id, the index of the command and of
+    #     the description in _strings, and the item id of each event, or NONE where there is none.
+    #   - _strings: every command and description stored in this list.
+    #   - _string_indexes: the index of each string in _strings.
+    #   - _items: every item stored in this list, by id.
+    #   - _views: the views of this list's events that are in use, by index.
+    journal: Optional[EventJournal]
+    _location_ids: array
+    _commands: array
+    _descriptions: array
+    _item_ids: array
+    _strings: list[str]
+    _string_indexes: dict[str, int]
+    _items: dict[int, Item]
+    _views: WeakValueDictionary[int, EventView]
+
+    def __init__(self, journal: Optional[EventJournal] = None) -> None:
+        """Initialize a new empty event list, which appends every change to the given journal if there is one."""
+
+        self.journal = journal
+        self._location_ids = array('i')
+        self._commands = array('i')
+        self._descriptions = array('i')
+        self._item_ids = array('i')
+        self._strings = []
+        self._string_indexes = {}
+        self._items = {}
+        self._views = WeakValueDictionary()
 
-    def __init__(self) -> None:
-        """Initialize a new empty event list."""
+    def __len__(self) -> int:
+        """Return the number of events in this list."""
+        return len(self._location_ids)
 
-        self.first = None
-        self.last = None
+    @property
+    def first(self) -> Optional[EventView]:
+        """The first event in this list, or None if the list is empty."""
+        return self._view(0)
+
+    @property
+    def last(self) -> Optional[EventView]:
+        """The last event in this list, or None if the list is empty."""
+        return self._view(len(self._location_ids) - 1)
 
     def display_events(self) -> None:
-        """Display all events in chronological order."""
-        curr = self.first
-        while curr:
-            print(f"Location: {curr.id_num}, Command: {curr.next_command}")
-            curr = curr.next
+        """Display all events in chronological order, through the current GameIO (see additional_functions)."""
+        for id_num, command in zip(self._location_ids, self._commands):
+            display(f"Location: {None if id_num == NONE else id_num}, Command: {self._string(command)}")
 
     def is_empty(self) -> bool:
         """Return whether this event list is empty."""
 
-        return self.first is None
+        return not self._location_ids
 
     def add_event(self, event: Event, command: str = None) -> None:
         """Add the given new event to the end of this event list.
         The given command is the command which was used to reach this new event, or None if this is the first
         event in the game.
+
+        The event's fields are copied into this list, so later changes to the given Event are not seen here.
         """
-        # Hint: You should update the previous node's <next_command> as needed
-        if self.first is None:  # if the list is empty, the given event is both the first and last.
-            self.first = event
-            self.last = event
-        else:  # if the list is not empty, add the new event to the end of the event list.
-            self.last.next = event
-            event.prev = self.last
+        # if command is not None, update the next_command of the previous last event.
+        if command is not None and self._commands:
+            self._commands[-1] = self._intern(command)
 
-            # if command is not None, update the next_command of the previous last event.
-            if command is not None:
-                self.last.next_command = command
+        self._location_ids.append(NONE if event.id_num is None else event.id_num)
+        self._commands.append(self._intern(event.next_command))
+        self._descriptions.append(self._intern(event.description))
+        if event.item is None:
+            self._item_ids.append(NONE)
+        else:
+            self._items[event.item.id_num] = event.item
+            self._item_ids.append(event.item.id_num)
 
-            self.last = event  # Update the last event to be the given new event.
+        if self.journal is not None:
+            self.journal.record_event(event, command)
 
-    def remove_last_event(self) -> None:
+    def remove_last_event(self, clear_command: bool = True) -> None:
         """Remove the last event from this event list.
-        If the list is empty, do nothing."""
+        If the list is empty, do nothing.
+
+        If clear_command is False, the new last event keeps its next_command. This is for lists like the game's log,
+        where each event's next_command is the command that led to it rather than the one that left it.
+        """
+        if self.journal is not None:
+            self.journal.record_removal(clear_command)
 
-        # Hint: The <next_command> and <next> attributes for the new last event should be updated as needed
         if self.is_empty():  # If the list is empty, do nothing.
             return
-        elif self.first == self.last:  # If there is only one event in the list.
-            self.first = None
-            self.last = None
-        else:  # If there is more than one event in the list.
-            self.last = self.last.prev
-            self.last.next = None
-            self.last.next_command = None
+
+        self._views.pop(len(self._location_ids) - 1, None)
+        for column in (self._location_ids, self._commands, self._descriptions, self._item_ids):
+            column.pop()
+        if clear_command and self._commands:
+            self._commands[-1] = NONE
 
     def get_id_log(self) -> list[int]:
         """Return a list of all location IDs visited for each event in this list, in sequence."""
 
-        id_log = []  # Initialize a new empy list.
-        curr = self.first  # Set curr to the first event in the list.
-        while curr is not None:
-            id_log.append(curr.id_num)  # Append the current event's id_num to id_log
-            curr = curr.next  # Move to the next event
+        return [None if id_num == NONE else id_num for id_num in self._location_ids]
+
+    def entries(self) -> list[tuple[Optional[int], Optional[str], Optional[int]]]:
+        """Return the location id, next command and item id of every event in this list, in sequence, read straight
+        from the arrays without creating any views."""
+        return [(None if id_num == NONE else id_num, self._string(command), None if item_id == NONE else item_id)
+                for id_num, command, item_id in zip(self._location_ids, self._commands, self._item_ids)]
+
+    def _view(self, index: int) -> Optional[EventView]:
+        """Return the view of the event at the given index, or None if there is no event there."""
+        if not 0 <= index < len(self._location_ids):
+            return None
+
+        view = self._views.get(index)
+        if view is None:
+            view = EventView(self, index)
+            self._views[index] = view
+        return view
+
+    def _intern(self, text: Optional[str]) -> int:
+        """Return the index of the given string in this list's table, adding it if it is new, or NONE if text is
+        None."""
+        if text is None:
+            return NONE
+
+        index = self._string_indexes.get(text)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(text)
+            self._string_indexes[text] = index
+        return index
 
-        return id_log
+    def _string(self, index: int) -> Optional[str]:
+        """Return the string with the given index in this list's table, or None if index is NONE."""
+        return None if index == NONE else self._strings[index]
 
 
 if __name__ == "__main__":
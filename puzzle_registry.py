@@ -0,0 +1,168 @@
+"""CSC111 Project 1: Text Adventure Game - Puzzle Registry
+
+This module finds the handlers of the puzzles a world declares. A world's game data may have a "puzzles" list,
+where each puzzle names the location it is at, its type and, optionally, the parameters of its type:
+
+    "puzzles" : [
+      {"location" : 12, "type" : "cipher", "params" : {"shift_key" : 20}}
+    ]
+
+A type must be one of the names in PUZZLE_TYPES, each of which is registered with the "module:function" of the
+function that makes its handlers. A type's function is called with the puzzle's parameters and returns its
+handler, and its module is only imported once a world that uses it is loaded, so a game only pays for the
+puzzles in its world. World files are only ever data: they can name registered types, but never a module of
+their own choosing, so puzzle types defined elsewhere must be registered in code first (see
+register_puzzle_type). A world without a "puzzles" list has the puzzles of the original game (DEFAULT_PUZZLES).
+
+The handlers of a world's puzzles are made once, when the first game in it starts (see
+game_world.WorldTemplate.special_actions), and shared by every game played in it.
+"""
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from adventure import AdventureGame
+    from game_entities import Location
+
+# The handler of the special actions at a puzzle's location. Each is called with the game, the location where the
+# player chose their action, and the action.
+PuzzleHandler = Callable[['AdventureGame', 'Location', str], None]
+
+# The function that makes the handlers of each registered puzzle type, as "module:function"
+PUZZLE_TYPES = {
+    "gate": "puzzles:gate",
+    "mug": "puzzles:mug",
+    "connections": "puzzles:connections",
+    "treadmill": "puzzles:treadmill",
+    "lounge": "puzzles:lounge",
+    "cipher": "puzzles:cipher"
+}
+
+
+@dataclass(frozen=True)
+class PuzzleSpec:
+    """A puzzle declared by a world.
+
+    Instance Attributes:
+        - location: the id of the location the puzzle is at.
+        - type: the puzzle's type, a name in PUZZLE_TYPES.
+        - params: the keyword arguments that the type's function is called with.
+    """
+    location: int
+    type: str
+    params: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    @staticmethod
+    def from_data(data: dict[str, Any]) -> PuzzleSpec:
+        """Return the puzzle declared by the given entry of a world's "puzzles" list.
+
+        >>> PuzzleSpec.from_data({"location": 12, "type": "cipher", "params": {"shift_key": 3}}).params["shift_key"]
+        3
+        """
+        return PuzzleSpec(data['location'], data['type'], MappingProxyType(dict(data.get('params', {}))))
+
+    def to_data(self) -> dict[str, Any]:
+        """Return this puzzle as an entry of a world's "puzzles" list."""
+        data = {'location': self.location, 'type': self.type}
+        if self.params:
+            data['params'] = dict(self.params)
+        return data
+
+
+# The puzzles of the original game, which every world without a "puzzles" list has
+DEFAULT_PUZZLES = MappingProxyType({
+    3: PuzzleSpec(3, "gate"),
+    5: PuzzleSpec(5, "mug"),
+    6: PuzzleSpec(6, "connections"),
+    8: PuzzleSpec(8, "treadmill"),
+    11: PuzzleSpec(11, "lounge"),
+    12: PuzzleSpec(12, "cipher")
+})
+
+
+def register_puzzle_type(name: str, factory_path: str) -> None:
+    """Register the puzzle type with the given name, whose handlers are made by the function at factory_path, a
+    "module:function". The module is not imported until a world with a puzzle of this type is loaded.
+
+    Raise a ValueError if factory_path is not a "module:function", or name is already registered.
+    """
+    module_name, _, function_name = factory_path.partition(":")
+    if not module_name or not function_name:
+        raise ValueError(f"{factory_path!r} is not a \"module:function\".")
+    if name in PUZZLE_TYPES:
+        raise ValueError(f"The puzzle type {name!r} is already registered.")
+    PUZZLE_TYPES[name] = factory_path
+
+
+def is_known_type(puzzle_type: str) -> bool:
+    """Return whether the given puzzle type is registered, without importing anything.
+
+    >>> is_known_type("cipher"), is_known_type("os:system"), is_known_type("riddle")
+    (True, False, False)
+    """
+    return puzzle_type in PUZZLE_TYPES
+
+
+def puzzles_from_data(data: Optional[list[dict[str, Any]]]) -> Mapping[int, PuzzleSpec]:
+    """Return the puzzles declared by the given "puzzles" list of a world's game data, by location id, or
+    DEFAULT_PUZZLES if data is None.
+
+    Raise a ValueError if two puzzles are at the same location.
+
+    >>> puzzles = puzzles_from_data([{"location": 2, "type": "mug"}])
+    >>> puzzles[2].type
+    'mug'
+    >>> puzzles_from_data(None) is DEFAULT_PUZZLES
+    True
+    """
+    if data is None:
+        return DEFAULT_PUZZLES
+
+    puzzles = {}
+    for puzzle_data in data:
+        spec = PuzzleSpec.from_data(puzzle_data)
+        if spec.location in puzzles:
+            raise ValueError(f"There is more than one puzzle at location {spec.location}.")
+        puzzles[spec.location] = spec
+    return MappingProxyType(puzzles)
+
+
+def load_factory(puzzle_type: str) -> Callable[..., PuzzleHandler]:
+    """Return the function that makes the handlers of the given puzzle type, importing its module if it hasn't
+    been imported yet.
+
+    Raise a ValueError if the type is not registered or its function can't be found.
+    """
+    if not is_known_type(puzzle_type):
+        raise ValueError(f"Unknown puzzle type {puzzle_type!r}.")
+
+    module_name, _, function_name = PUZZLE_TYPES[puzzle_type].partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError) as error:
+        raise ValueError(f"The puzzle type {puzzle_type!r} can't be loaded: {error}") from error
+
+
+def dispatch_table(puzzles: Mapping[int, PuzzleSpec]) -> Mapping[int, PuzzleHandler]:
+    """Return the handler of each of the given puzzles, by location id.
+
+    Raise a ValueError if a puzzle's type can't be loaded, or a TypeError if it is given parameters its type
+    doesn't take.
+
+    >>> table = dispatch_table(puzzles_from_data([{"location": 2, "type": "lounge"}]))
+    >>> list(table)
+    [2]
+    """
+    return MappingProxyType({loc_id: load_factory(spec.type)(**spec.params) for loc_id, spec in puzzles.items()})
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
@@ -0,0 +1,66 @@
+"""CSC111 Project 1: Text Adventure Game - Puzzles
+
+This module makes the handlers of the game's built-in puzzle types (see puzzle_registry.PUZZLE_TYPES). Each
+function takes the parameters a world gives its puzzle, and returns the handler of the special actions at the
+puzzle's location, which hands the game's state to that location's commands (see game_entities.Location).
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from game_entities import CIPHER_PLAINTEXT, DEFAULT_CONNECTIONS_BOARD, RED, RESET, CaesarCipher, ConnectionsBoard
+from puzzle_registry import PuzzleHandler
+
+
+def gate() -> PuzzleHandler:
+    """Return the handler of the way to Robarts' second floor, which is shut to players without their T-Card."""
+    return lambda game, loc, choice: loc.location_3_commands(choice, game.inventory)
+
+
+def mug() -> PuzzleHandler:
+    """Return the handler of the barista's riddle, which rewards the player with the item held at its location."""
+    return lambda game, loc, choice: loc.sublocation_5_commands(choice, game.game_state.moves,
+                                                                game.game_state.score, game.inventory)
+
+
+def connections(board: Optional[dict[str, list[str]]] = None) -> PuzzleHandler:
+    """Return the handler of the librarian's Connections puzzle, played on the board mapping each category to its
+    words, or on DEFAULT_CONNECTIONS_BOARD if board is None.
+
+    Raise a ValueError if board is not a valid board (see ConnectionsBoard.from_data).
+    """
+    puzzle_board = DEFAULT_CONNECTIONS_BOARD if board is None else ConnectionsBoard.from_data(board)
+    return lambda game, loc, choice: loc.sublocation_6_commands(choice, game.game_state.moves,
+                                                                game.game_state.score, game.inventory,
+                                                                game.puzzle_random, puzzle_board)
+
+
+def treadmill() -> PuzzleHandler:
+    """Return the handler of Coach Carter's treadmill challenge, timed with the game's clock."""
+    return lambda game, loc, choice: loc.location_8_commands(choice, game.game_state.moves, game.inventory,
+                                                             game.game_state.score, game.clock)
+
+
+def lounge() -> PuzzleHandler:
+    """Return the handler of the clues in the CSSU Lounge."""
+    return lambda game, loc, choice: loc.sublocation_11_commands(choice)
+
+
+def cipher(shift_key: int = 20) -> PuzzleHandler:
+    """Return the handler of the Lost and Found door, which is unlocked by decrypting a message encrypted with a
+    Caesar cipher of the given shift key.
+
+    Preconditions:
+        - 0 <= shift_key <= 25
+    """
+    encrypted_message = f"{RED}{CaesarCipher(shift_key, '').encrypt(CIPHER_PLAINTEXT)}{RESET}"
+    return lambda game, loc, choice: loc.sublocation_12_commands(choice, game.game_state.moves, game.inventory,
+                                                                 game.game_state.score, shift_key, encrypted_message)
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
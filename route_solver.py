@@ -0,0 +1,359 @@
+"""CSC111 Project 1: Text Adventure Game - Route Solver
+
+This module finds the shortest way to win a game: the route that uses the fewest moves, and among those the
+fewest commands, to bring WINNING_ITEM_COUNT target items back to the starting location.
+
+The solver follows the game's own rules:
+    - a command that leads to a location costs one move
+    - at a location with a puzzle (see puzzle_registry), the command of the puzzle's type gives the player the
+      item held there for the moves listed in PUZZLES, assuming they answer it correctly; other commands
+      without a destination do nothing
+    - at any other location, a command without a destination picks up the item it names, for free
+    - at Robarts Commons, "go to second floor" does nothing the first time except open the way, as long as
+      the player is not carrying the T-card (with the T-card, it never opens the way)
+    - dropping an item at the starting location is free, and the game is won once enough target items are
+      there, as long as the player still has at least one move left
+
+Only the items whose target is the starting location matter, and only the locations where they are found
+(along with the starting location) are places the player needs to go. So the solver first finds the shortest
+paths between those places by breadth-first search, with the way to the second floor shut and open, and then
+searches over states made of the place the player is at, bitmasks of the items they have picked up and
+delivered, and whether the way is open. That search is A*, guided by the distances already found, so it stays
+fast on worlds with hundreds of locations and dozens of items.
+
+Usage:
+    python route_solver.py --game-data game_data.json
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from adventure import MAX_MOVES, WINNING_ITEM_COUNT
+from game_entities import GATE_COMMAND, GATE_DESTINATION, GATE_ITEM, GATE_LOCATION, ItemCollection
+from game_world import WorldTemplate, load_world
+
+# The command of each puzzle type that rewards the player with the item held at the puzzle's location, and the
+# number of moves the puzzle costs when it is answered correctly
+PUZZLES = {
+    "mug": ("talk to the barista", 0),
+    "connections": ("ask the librarian", 0),
+    "treadmill": ("find coach carter", 1),
+    "cipher": ("unlock door", 1)
+}
+
+
+@dataclass
+class Route:
+    """A winning route through a game.
+
+    Instance Attributes:
+        - commands: every line the player types, in order, other than the answers to puzzles: the actions they
+                    choose, the names of the items they drop, and the final submission.
+        - moves: the number of moves the route uses.
+        - puzzles: the commands in the route that start a puzzle, which must be answered correctly.
+    """
+    commands: list[str]
+    moves: int
+    puzzles: list[str]
+
+
+class RouteSolver:
+    """A solver for the routes through one world.
+
+    Instance Attributes:
+        - start: the id of the location where the game begins and where the target items must be brought.
+    """
+    # Private Instance Attributes:
+    #   - _edges: the (command, destination) of every command that leads somewhere, by location id.
+    #   - _names: the name of each target item, by its bit.
+    #   - _gate_bit: the bit of the item that keeps the way to the second floor shut, or 0 if it isn't a target.
+    #   - _sources: the (bit, command, moves) of each target item that can be picked up or won at each location,
+    #               by location id.
+    #   - _places: the ids of the locations the player may need to go to: the start and every item's source.
+    #   - _outposts: for each place with items, its id, the bits of its items, the fewest moves from it to any
+    #                other place, and the fewest moves from it back to the start.
+    #   - _returns: the fewest moves from each location back to the start with the way open, by location id.
+    #   - _searches: the (distances, parents) of the breadth-first searches done so far, by origin and by
+    #                whether the way to the second floor is open.
+    start: int
+    _edges: dict[int, list[tuple[str, int]]]
+    _names: dict[int, str]
+    _gate_bit: int
+    _sources: dict[int, list[tuple[int, str, int]]]
+    _places: list[int]
+    _outposts: list[tuple[int, int, int, int]]
+    _returns: dict[int, int]
+    _searches: dict[tuple[int, bool], tuple[dict[int, int], dict[int, tuple[int, str]]]]
+
+    def __init__(self, world: WorldTemplate, start: int) -> None:
+        """Initialize a solver for the given world, for games that begin at the given location."""
+        self.start = start
+        targets = [item for _, item in sorted(world.items.items()) if item.target_position == start]
+        bits = {item.id_num: 1 << i for i, item in enumerate(targets)}
+        self._names = {bits[item.id_num]: item.name for item in targets}
+        self._gate_bit = bits.get(GATE_ITEM, 0)
+
+        self._edges = {}
+        self._sources = {}
+        for loc_id, template in world.locations.items():
+            held = ItemCollection(world.items[item_id] for item_id in template.item_ids or ()
+                                  if item_id in world.items)
+            sources = []
+            for command, destination in template.available_commands.items():
+                if destination is not None:
+                    self._edges.setdefault(loc_id, []).append((command, destination))
+                elif loc_id in world.puzzles:
+                    puzzle = PUZZLES.get(world.puzzles[loc_id].type)
+                    if puzzle is not None and puzzle[0] == command and held:
+                        reward = list(held)[-1]  # The puzzle hands over the last item held there
+                        sources.append((bits.get(reward.id_num, 0), command, puzzle[1]))
+                else:
+                    item = held.find_in(command)
+                    if item is not None:
+                        sources.append((bits.get(item.id_num, 0), command, 0))
+
+            sources = [source for source in sources if source[0]]
+            if sources:
+                self._sources[loc_id] = sources
+
+        self._places = [start] + [loc_id for loc_id in self._sources if loc_id != start]
+        self._searches = {}
+        self._returns = {}
+        self._outposts = []
+        for loc_id, sources in self._sources.items():
+            distances, _ = self._search(loc_id, True)
+            departure = min((distances[other] for other in self._places if other != loc_id and other in distances),
+                            default=0)
+            mask = sum(bit for bit, _, _ in sources)
+            self._outposts.append((loc_id, mask, departure, self._return_distance(loc_id)))
+
+    def solve(self, moves: int = MAX_MOVES, winning_count: int = WINNING_ITEM_COUNT) -> Optional[Route]:
+        """Return the route that wins with the fewest moves, and among those the fewest commands, when the
+        player starts with the given number of moves, or None if the game can't be won.
+
+        >>> route = RouteSolver(load_world('game_data.json'), 1).solve()
+        >>> route.moves
+        16
+        >>> route.commands[-1]
+        'SUBMIT PROJECT'
+        """
+        start_state = (self.start, 0, 0, False)
+        best = {start_state: (0, 0)}
+        parents = {start_state: None}
+        frontier = [(self._estimate(start_state, winning_count), 0, 0, start_state)]
+
+        while frontier:
+            _, count, used, state = heapq.heappop(frontier)
+            if best[state] != (used, count):
+                continue  # A shorter way to this state was found after this entry was queued
+
+            if state[2].bit_count() >= winning_count:
+                return self._route(state, parents, used)
+
+            for lines, cost, next_state in self._successors(state, winning_count):
+                next_used, next_count = used + cost, count + len(lines)
+                if next_used >= moves or best.get(next_state, (moves, 0)) <= (next_used, next_count):
+                    continue
+                estimate = next_used + self._estimate(next_state, winning_count)
+                if estimate < moves:
+                    best[next_state] = (next_used, next_count)
+                    parents[next_state] = (state, lines)
+                    heapq.heappush(frontier, (estimate, next_count, next_used, next_state))
+
+        return None
+
+    def _successors(self, state: tuple[int, int, int, bool],
+                    winning_count: int) -> list[tuple[list[str], int, tuple]]:
+        """Return the lines typed, the moves used and the resulting state for every useful trip from the given
+        state: to a place to collect items there, or back to the start to drop everything being carried.
+
+        Dropping items early never saves moves, so the player only goes back to the start before they have enough
+        items to drop the T-card, which keeps the way to the second floor shut.
+        """
+        place, taken, delivered, gate_open = state
+        carried = taken & ~delivered
+        successors = []
+
+        for destination in self._places:
+            sources = [source for source in self._sources.get(destination, ()) if not taken & source[0]]
+            if destination == self.start:
+                if not sources and not (carried & self._gate_bit and not gate_open) \
+                        and taken.bit_count() < winning_count:
+                    continue
+            elif not sources:
+                continue
+
+            # Collect everything there, or everything but the item that keeps the way shut
+            choices = [sources]
+            if any(bit == self._gate_bit for bit, _, _ in sources) and len(sources) > 1:
+                choices.append([source for source in sources if source[0] != self._gate_bit])
+
+            for lines, cost, now_open in self._trips(place, destination, gate_open, bool(carried & self._gate_bit)):
+                for collected in choices:
+                    next_taken = taken
+                    next_lines = list(lines)
+                    next_cost = cost
+                    for bit, command, puzzle_moves in collected:
+                        next_taken |= bit
+                        next_lines.append(command)
+                        next_cost += puzzle_moves
+
+                    next_delivered = delivered
+                    if destination == self.start:  # Drop everything being carried
+                        for bit in self._names:
+                            if next_taken & ~delivered & bit:
+                                next_lines.extend(["drop", self._names[bit]])
+                        next_delivered = next_taken
+
+                    successors.append((next_lines, next_cost, (destination, next_taken, next_delivered, now_open)))
+
+        return successors
+
+    def _trips(self, origin: int, destination: int, gate_open: bool,
+               carrying_gate_item: bool) -> list[tuple[list[str], int, bool]]:
+        """Return the commands, the moves used and whether the way to the second floor ends up open for the
+        shortest trips from origin to destination: one that leaves the way as it is, and, if the way is shut and
+        the player could open it, one that opens it on the way."""
+        trips = []
+        distances, _ = self._search(origin, gate_open)
+        if destination in distances:
+            trips.append((self._path(origin, destination, gate_open), distances[destination], gate_open))
+
+        if not gate_open and not carrying_gate_item and GATE_LOCATION in distances:
+            onward, _ = self._search(GATE_LOCATION, True)
+            if destination in onward:
+                trips.append((self._path(origin, GATE_LOCATION, False) + [GATE_COMMAND]
+                              + self._path(GATE_LOCATION, destination, True),
+                              distances[GATE_LOCATION] + onward[destination], True))
+        return trips
+
+    def _estimate(self, state: tuple[int, int, int, bool], winning_count: int) -> int:
+        """Return a lower bound on the moves still needed to win from the given state.
+
+        The player must get back to the start, and if they aren't carrying enough items, they must first visit
+        enough places to collect the rest: getting to the nearest of those places, and leaving each place they
+        visit, costs at least the distance to the nearest other place. Distances are taken with the way to the
+        second floor open, which is never longer.
+        """
+        place, taken, delivered, _ = state
+        needed = winning_count - delivered.bit_count()
+        if needed <= 0:
+            return 0
+
+        estimate = self._return_distance(place)
+        missing = needed - (taken & ~delivered).bit_count()
+        if missing <= 0:
+            return estimate
+
+        distances, _ = self._search(place, True)
+        entry = nearest = None
+        counts = []
+        departures = []
+        for loc_id, mask, departure, back in self._outposts:
+            count = (mask & ~taken).bit_count()
+            if count and loc_id == self.start:
+                missing -= count
+            elif count and loc_id in distances:
+                distance = distances[loc_id]
+                counts.append(count)
+                departures.append(departure)
+                entry = distance + back if entry is None else min(entry, distance + back)
+                nearest = distance if nearest is None else min(nearest, distance)
+        if missing <= 0 or entry is None:
+            return estimate
+
+        # The fewest places that can hold the missing items, charged at their cheapest departures
+        counts.sort(reverse=True)
+        departures.sort()
+        fewest = 0
+        while missing > 0 and fewest < len(counts):
+            missing -= counts[fewest]
+            fewest += 1
+        return max(estimate, entry, nearest + sum(departures[:fewest]))
+
+    def _return_distance(self, loc_id: int) -> int:
+        """Return the fewest moves from the given location back to the start with the way open, or 0 if the start
+        can't be reached from there."""
+        if loc_id not in self._returns:
+            self._returns[loc_id] = self._search(loc_id, True)[0].get(self.start, 0)
+        return self._returns[loc_id]
+
+    def _search(self, origin: int, gate_open: bool) -> tuple[dict[int, int], dict[int, tuple[int, str]]]:
+        """Return the fewest moves from origin to every location it can reach, and the location and command that
+        each one is reached by, with the way to the second floor open or shut, by breadth-first search."""
+        key = (origin, gate_open)
+        if key not in self._searches:
+            distances = {origin: 0}
+            parents = {}
+            queue = deque([origin])
+            while queue:
+                loc_id = queue.popleft()
+                edges = self._edges.get(loc_id, [])
+                if gate_open and loc_id == GATE_LOCATION:
+                    edges = edges + [(GATE_COMMAND, GATE_DESTINATION)]
+                for command, destination in edges:
+                    if destination not in distances:
+                        distances[destination] = distances[loc_id] + 1
+                        parents[destination] = (loc_id, command)
+                        queue.append(destination)
+            self._searches[key] = (distances, parents)
+        return self._searches[key]
+
+    def _path(self, origin: int, destination: int, gate_open: bool) -> list[str]:
+        """Return the commands of a shortest path from origin to destination.
+
+        Preconditions:
+            - destination can be reached from origin
+        """
+        _, parents = self._search(origin, gate_open)
+        commands = []
+        while destination != origin:
+            destination, command = parents[destination]
+            commands.append(command)
+        commands.reverse()
+        return commands
+
+    def _route(self, state: tuple, parents: dict, moves: int) -> Route:
+        """Return the route that reaches the given winning state, following parents back to the start."""
+        steps = []
+        while parents[state] is not None:
+            state, lines = parents[state]
+            steps.append(lines)
+        steps.reverse()
+
+        puzzle_commands = {command for command, _ in PUZZLES.values()}
+        commands = [line for lines in steps for line in lines] + ["SUBMIT PROJECT"]
+        return Route(commands, moves, [command for command in commands if command in puzzle_commands])
+
+
+def solve(game_data_file: str, initial_location_id: int = 1, moves: int = MAX_MOVES) -> Optional[Route]:
+    """Return the shortest winning route through the game in the given file, starting at the given location with
+    the given number of moves, or None if the game can't be won."""
+    return RouteSolver(load_world(game_data_file), initial_location_id).solve(moves)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Find the shortest winning route from the command line."""
+    parser = argparse.ArgumentParser(description="Find the shortest winning route through a game.")
+    parser.add_argument("--game-data", default="game_data.json", help="the game data file to solve")
+    parser.add_argument("--start", type=int, default=1, help="the initial location id")
+    parser.add_argument("--moves", type=int, default=MAX_MOVES, help="the number of moves the player starts with")
+    args = parser.parse_args(argv)
+
+    route = solve(args.game_data, args.start, args.moves)
+    if route is None:
+        print(f"The game can't be won in {args.moves} moves.")
+        return
+
+    print(f"The game can be won in {route.moves} moves:")
+    for command in route.commands:
+        print(f"  {command}")
+    print(f"Puzzles to solve along the way: {', '.join(route.puzzles) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""CSC111 Project 1: Text Adventure Game - Route Table
+
+This module finds the shortest paths between locations in a world, so that the game can tell the player the way
+to any location (see AdventureGame.give_hint).
+
+A RouteTable holds one row per location that has been searched from, found by breadth-first search: for every
+location it can reach, the number of moves there and the location and command that the shortest path arrives
+from. Following those back from a location gives the whole path to it. A row is only searched the first time a
+path from its location is asked for, so a game in a world of any size starts without searching at all, and a
+table shared by a world's games only remembers the rows it used most recently (see MAX_ROWS).
+
+A table can also be precomputed, with every row searched, and cached in a file alongside its world (the world's
+filename followed by CACHE_SUFFIX), as JSON, but only when the caller asks for it (see load_route_table). The
+cache also holds the commands the table was built from, so when the world file changes, only the rows that could
+have changed are searched again: those of the locations that reach a location whose commands are different.
+
+Usage:
+    python route_table.py game_data.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Iterator, Mapping, Optional
+
+from game_world import WorldTemplate, load_world
+
+# The format version of route table caches
+ROUTE_TABLE_VERSION = 2
+
+# Added to a world's filename to give the name of its route table cache
+CACHE_SUFFIX = ".routes"
+
+# The most rows that the table shared by a world's games remembers at once
+MAX_ROWS = 256
+
+# For each location a row reaches: the number of moves there, and the location and command that the shortest path
+# arrives from (both None at the row's own location)
+Row = dict[int, tuple[int, Optional[int], Optional[str]]]
+
+# The route table last loaded for each game data file, by filename and whether it has a cache file, with the
+# file's modification time then
+_route_tables: dict[tuple[str, bool], tuple[int, RouteTable]] = {}
+
+
+class WorldEdges(Mapping[int, tuple[tuple[str, int], ...]]):
+    """The edges of a world, in the form of RouteTable.edges, read from its location templates as they are looked
+    up, so that a route table can be made for a world of any size without going over the whole world."""
+    # Private Instance Attributes:
+    #   - _world: the world whose edges these are.
+    _world: WorldTemplate
+
+    def __init__(self, world: WorldTemplate) -> None:
+        """Initialize the edges of the given world."""
+        self._world = world
+
+    def __getitem__(self, loc_id: int) -> tuple[tuple[str, int], ...]:
+        return tuple((command, destination)
+                     for command, destination in self._world.locations[loc_id].available_commands.items()
+                     if destination is not None)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._world.locations)
+
+    def __len__(self) -> int:
+        return len(self._world.locations)
+
+
+class RouteTable:
+    """The shortest paths between the locations in a world.
+
+    Instance Attributes:
+        - edges: the (command, destination) of every command that leads somewhere, by location id. Every
+                 location in the world has an entry, even if none of its commands lead anywhere.
+        - max_rows: the most rows the table remembers at once, or None if it remembers every row it searches.
+
+    Representation Invariants:
+        - all(origin in self.edges for origin in self._rows)
+        - all(self._rows[origin][origin] == (0, None, None) for origin in self._rows)
+        - self.max_rows is None or len(self._rows) <= self.max_rows
+    """
+    # Private Instance Attributes:
+    #   - _rows: the row of each location searched from, from the least recently used.
+    #   - _lock: held while rows are added, reordered or forgotten, since games on different threads share a table.
+    edges: Mapping[int, tuple[tuple[str, int], ...]]
+    max_rows: Optional[int]
+    _rows: dict[int, Row]
+    _lock: threading.Lock
+
+    def __init__(self, edges: Mapping[int, tuple[tuple[str, int], ...]], rows: Optional[dict[int, Row]] = None,
+                 max_rows: Optional[int] = None) -> None:
+        """Initialize a route table for the given edges that starts with the given rows, if any, and searches for
+        every other row the first time it is needed.
+
+        Preconditions:
+            - rows is None or rows holds rows of a route table for the given edges
+        """
+        self.edges = edges
+        self.max_rows = max_rows
+        self._rows = {} if rows is None else rows
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def world_edges(world: WorldTemplate) -> dict[int, tuple[tuple[str, int], ...]]:
+        """Return the edges of the given world, in the form of RouteTable.edges."""
+        return dict(WorldEdges(world))
+
+    def distance(self, origin: int, destination: int) -> Optional[int]:
+        """Return the fewest moves from origin to destination, or None if destination can't be reached from origin.
+
+        >>> table = RouteTable({1: (("go north", 2),), 2: (("go south", 1), ("go up", 3)), 3: ()})
+        >>> table.distance(1, 3)
+        2
+        >>> table.distance(3, 1) is None
+        True
+        """
+        if origin not in self.edges:
+            return None
+        step = self._row(origin).get(destination)
+        return None if step is None else step[0]
+
+    def path(self, origin: int, destination: int) -> Optional[list[str]]:
+        """Return the commands of a shortest path from origin to destination, or None if destination can't be
+        reached from origin.
+
+        Only the row of origin is searched, if it hasn't been already.
+
+        >>> table = RouteTable({1: (("go north", 2),), 2: (("go south", 1), ("go up", 3)), 3: ()})
+        >>> table.path(1, 3)
+        ['go north', 'go up']
+        >>> table.path(3, 3)
+        []
+        """
+        if origin not in self.edges:
+            return None
+        row = self._row(origin)
+        if destination not in row:
+            return None
+
+        commands = []
+        while destination != origin:
+            _, destination, command = row[destination]
+            commands.append(command)
+        commands.reverse()
+        return commands
+
+    def search_all(self) -> None:
+        """Search for the row of every location that this table doesn't have yet.
+
+        Preconditions:
+            - self.max_rows is None
+        """
+        for origin in self.edges:
+            self._row(origin)
+
+    def update(self, edges: Mapping[int, tuple[tuple[str, int], ...]]) -> set[int]:
+        """Change this table to the given edges and return the ids of the locations whose rows were forgotten,
+        to be searched again when they are next needed.
+
+        Only the rows of locations that reach a location whose edges are different (or that are new) can change,
+        so only those are forgotten.
+
+        >>> table = RouteTable({1: (("go north", 2),), 2: (), 3: (("go west", 2),)})
+        >>> table.search_all()
+        >>> sorted(table.update({1: (("go north", 2),), 2: (("go south", 1),), 3: (("go west", 2),)}))
+        [1, 2, 3]
+        >>> table.search_all()
+        >>> sorted(table.update({1: (("go north", 2),), 2: (("go south", 1),), 3: (("go east", 1),)}))
+        [3]
+        >>> table.path(3, 2)
+        ['go east', 'go north']
+        """
+        changed = {loc_id for loc_id in self.edges.keys() | edges.keys()
+                   if self.edges.get(loc_id) != edges.get(loc_id)}
+        self.edges = edges
+
+        with self._lock:
+            stale = {origin for origin, row in self._rows.items()
+                     if origin not in self.edges or not changed.isdisjoint(row)}
+            for origin in stale:
+                del self._rows[origin]
+        return stale
+
+    def to_data(self) -> dict[str, Any]:
+        """Return this table as data that can be written as JSON, to be read back with RouteTable.from_data."""
+        return {
+            'version': ROUTE_TABLE_VERSION,
+            'edges': {str(loc_id): [list(edge) for edge in edges] for loc_id, edges in self.edges.items()},
+            'rows': {str(origin): [[loc_id, moves, previous, command]
+                                   for loc_id, (moves, previous, command) in row.items()]
+                     for origin, row in self._rows.items()}
+        }
+
+    @staticmethod
+    def from_data(data: dict[str, Any]) -> RouteTable:
+        """Return the route table in the given data, as returned by RouteTable.to_data.
+
+        Raise a ValueError if the data is not a route table of this version.
+        """
+        if not isinstance(data, dict) or data.get('version') != ROUTE_TABLE_VERSION:
+            raise ValueError("This is not a route table of the current version.")
+
+        edges = {int(loc_id): tuple((command, destination) for command, destination in loc_edges)
+                 for loc_id, loc_edges in data['edges'].items()}
+        rows = {int(origin): {loc_id: (moves, previous, command) for loc_id, moves, previous, command in row}
+                for origin, row in data['rows'].items()}
+        return RouteTable(edges, rows)
+
+    def _row(self, origin: int) -> Row:
+        """Return the row of the given location, searching for it if this table doesn't have it, and forgetting
+        the least recently used row if the table then has more than max_rows.
+
+        Preconditions:
+            - origin in self.edges
+        """
+        row = self._rows.get(origin)
+        if row is not None:
+            if self.max_rows is not None:
+                with self._lock:
+                    # Another thread may have forgotten the row since it was looked up
+                    if origin in self._rows:
+                        self._rows[origin] = self._rows.pop(origin)
+            return row
+
+        row = self._search(origin)
+        with self._lock:
+            self._rows[origin] = row
+            if self.max_rows is not None and len(self._rows) > self.max_rows:
+                del self._rows[next(iter(self._rows))]
+        return row
+
+    def _search(self, origin: int) -> Row:
+        """Return the row of the given location, by breadth-first search."""
+        row = {origin: (0, None, None)}
+        queue = deque([origin])
+        while queue:
+            loc_id = queue.popleft()
+            moves = row[loc_id][0]
+            for command, destination in self.edges.get(loc_id, ()):
+                if destination not in row:
+                    row[destination] = (moves + 1, loc_id, command)
+                    queue.append(destination)
+        return row
+
+
+def load_route_table(filename: str, cache_file: bool = False) -> RouteTable:
+    """Return the route table of the world in the game data file with the given filename.
+
+    Tables are kept in memory, so every game started from the same file shares one table, until the file changes
+    and its table is replaced. Unless cache_file is True, the table only searches for the rows it is asked for,
+    reads the world's locations as it goes, and remembers at most MAX_ROWS rows.
+
+    If cache_file is True, the table has every row, and is read from its cache file if there is one, bringing it
+    up to date with the world if the world has changed. The cache file is written if it is missing or out of date.
+    """
+    modified_time = os.stat(filename).st_mtime_ns
+    cached = _route_tables.get((filename, cache_file))
+    if cached is None or cached[0] != modified_time:
+        cached = _route_tables[filename, cache_file] = (modified_time, _read_route_table(filename, cache_file))
+    return cached[1]
+
+
+def _read_route_table(filename: str, cache_file: bool) -> RouteTable:
+    """Return the route table of the world in the given game data file, as load_route_table describes, without
+    looking in memory for it."""
+    if not cache_file:
+        return RouteTable(WorldEdges(load_world(filename)), max_rows=MAX_ROWS)
+
+    edges = RouteTable.world_edges(load_world(filename))
+    cache_filename = filename + CACHE_SUFFIX
+
+    try:
+        with open(cache_filename, 'r') as f:
+            table = RouteTable.from_data(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        table = None
+
+    if table is not None and table.edges == edges:
+        return table
+
+    if table is None:
+        table = RouteTable(edges)
+    else:
+        table.update(edges)
+    table.search_all()
+
+    try:
+        with open(cache_filename, 'w') as f:
+            json.dump(table.to_data(), f)
+    except OSError:
+        pass  # The table still works without its cache; it will just be searched for again next time
+    return table
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Build the route table of a world from the command line and report on it."""
+    parser = argparse.ArgumentParser(description="Precompute the shortest paths between every pair of locations.")
+    parser.add_argument("game_data", help="the game data file to build the route table of")
+    args = parser.parse_args(argv)
+
+    table = load_route_table(args.game_data, cache_file=True)
+    print(f"Routes between {len(table.edges)} locations cached in {args.game_data + CACHE_SUFFIX}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""CSC111 Project 1: Text Adventure Game - Simulation Cache
+
+This module remembers the states that scripted games pass through, so that playing a script that begins the
+same way as one played before only plays the part of it that is new (see proj1_simulation.run_headless).
+
+Each time a scripted game asks for the player's next action, its state is taken as a snapshot (see
+AdventureGame.snapshot) and stored in a trie of script lines, at the node of the lines read so far. A new script
+follows the trie as far as its lines match, and its game is restored from the last snapshot on the way and
+carries on from there with the rest of the script.
+
+Games only play out the same way from the same start, so each start has a trie of its own, keyed by a hash of
+the world file's contents, the seed, the starting location, the moves and the step of the virtual clock.
+
+Snapshots are evicted, least recently used first, once the cache holds more than its memory budget, and a cache
+can be saved to a file and loaded back, to be shared between runs.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Optional, Sequence, TYPE_CHECKING
+
+from additional_functions import ScriptedInput
+
+if TYPE_CHECKING:
+    from adventure import AdventureGame
+
+# The format version of saved simulation caches
+SIMULATION_CACHE_VERSION = 1
+
+# The memory budget of a cache that isn't given one, in bytes
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+# Roughly the number of bytes a node of the trie takes up, besides its line and its snapshot
+NODE_SIZE = 200
+
+# The size of the blocks world files are hashed in, in bytes
+HASH_BLOCK_SIZE = 1 << 20
+
+# The hash of each world file hashed so far, by filename, with the file's modification time then
+_world_hashes: dict[str, tuple[int, str]] = {}
+
+
+class _Node:
+    """A node of a trie of script lines: the point in a script after the lines on the path to it from the root.
+
+    Instance Attributes:
+        - parent: the node before this one, or None if this is the root.
+        - line: the line that leads here from parent, or None if this is the root.
+        - children: the node after each line that has been read here.
+        - snapshot: the state of the game at this point, or None if it isn't cached.
+    """
+    parent: Optional[_Node]
+    line: Optional[str]
+    children: dict[str, _Node]
+    snapshot: Optional[bytes]
+
+    def __init__(self, parent: Optional[_Node] = None, line: Optional[str] = None) -> None:
+        """Initialize a new node with no children and no snapshot."""
+        self.parent = parent
+        self.line = line
+        self.children = {}
+        self.snapshot = None
+
+
+class SimulationCache:
+    """The states that scripted games have passed through, by the lines of script that led to them.
+
+    A game's state is only worth a snapshot at a point that more than one script passes through, so the cache
+    first only records the lines of each script, which is cheap, and takes snapshots along the part of a later
+    script that follows lines already recorded.
+
+    Instance Attributes:
+        - budget: the most memory the cache may take up, in bytes.
+        - size: roughly the memory the cache takes up now, in bytes.
+        - snapshots: the number of snapshots in the cache.
+        - hits: the number of scripts that were played from a snapshot.
+        - misses: the number of scripts that were played from the start.
+
+    Representation Invariants:
+        - self.size <= self.budget or self._recent == {}
+    """
+    # Private Instance Attributes:
+    #   - _roots: the root of the trie of each start, by the key of the start (see SimulationCache.key).
+    #   - _recent: every node that holds a snapshot or that a script ended at, least recently used first. These
+    #              are the ends of every path in the tries, so evicting them all empties the cache.
+    budget: int
+    size: int
+    snapshots: int
+    hits: int
+    misses: int
+    _roots: dict[tuple, _Node]
+    _recent: OrderedDict[_Node, None]
+
+    def __init__(self, budget: int = DEFAULT_BUDGET) -> None:
+        """Initialize a new, empty cache with the given memory budget, in bytes."""
+        self.budget = budget
+        self.size = 0
+        self.snapshots = 0
+        self.hits = 0
+        self.misses = 0
+        self._roots = {}
+        self._recent = OrderedDict()
+
+    @staticmethod
+    def key(game_data_file: str, seed: int, initial_location_id: int, moves: int, step: float) -> tuple:
+        """Return the key of the start of games played in the world in the given file, from the given seed,
+        location and moves, timed by a virtual clock with the given step."""
+        return world_hash(game_data_file), seed, initial_location_id, moves, step
+
+    def find(self, key: tuple, script: Sequence[str]) -> tuple[int, Optional[bytes], int]:
+        """Return the number of lines of script read before the last snapshot that a game played from the given
+        key's start with script passes through, that snapshot, and the number of lines of script that have been
+        recorded before. The first two are (0, None) if the game passes through no snapshot.
+        """
+        node = self._roots.get(key)
+        found, snapshot_node = 0, None
+        depth = 0
+        while node is not None:
+            if node.snapshot is not None:
+                found, snapshot_node = depth, node
+            if depth == len(script) or script[depth] not in node.children:
+                break
+            node = node.children[script[depth]]
+            depth += 1
+
+        if snapshot_node is None:
+            self.misses += 1
+            return 0, None, depth
+
+        self.hits += 1
+        self._recent.move_to_end(snapshot_node)
+        return found, snapshot_node.snapshot, depth
+
+    def store(self, key: tuple, script: Sequence[str], lines_read: int,
+              snapshots: Sequence[tuple[int, bytes]]) -> None:
+        """Record the first lines_read lines of the given script, played from the given key's start, along with
+        the given (number of lines read, snapshot) pairs of its game, then evict the least recently used paths
+        and snapshots until the cache is within its budget.
+
+        Preconditions:
+            - the numbers of lines in snapshots are in increasing order, and none is more than lines_read
+            - lines_read <= len(script)
+        """
+        node = self._roots.get(key)
+        if node is None:
+            node = self._roots[key] = _Node()
+
+        snapshots = iter(snapshots)
+        position, snapshot = next(snapshots, (None, None))
+        for depth in range(lines_read + 1):
+            if depth == position:
+                if node.snapshot is None:
+                    node.snapshot = snapshot
+                    self.size += len(snapshot)
+                    self.snapshots += 1
+                self._recent[node] = None
+                self._recent.move_to_end(node)
+                position, snapshot = next(snapshots, (None, None))
+            if depth < lines_read:
+                line = script[depth]
+                if line not in node.children:
+                    node.children[line] = _Node(node, line)
+                    self.size += NODE_SIZE + len(line)
+                node = node.children[line]
+
+        self._recent[node] = None
+        self._recent.move_to_end(node)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict the least recently used paths and snapshots until the cache is within its budget, removing the
+        nodes that no longer lead to any snapshot or end any path."""
+        while self.size > self.budget and self._recent:
+            node, _ = self._recent.popitem(last=False)
+            if node.snapshot is not None:
+                self.size -= len(node.snapshot)
+                self.snapshots -= 1
+                node.snapshot = None
+            while node.parent is not None and not node.children and node not in self._recent:
+                del node.parent.children[node.line]
+                self.size -= NODE_SIZE + len(node.line)
+                node = node.parent
+
+    def save(self, filename: str) -> None:
+        """Save this cache to the file with the given filename, as JSON, to be read back with
+        SimulationCache.load."""
+        tries = []
+        for key, root in self._roots.items():
+            # Each node is written as the index of its parent, its line and its snapshot, parents first
+            nodes = []
+            stack = [(root, -1)]
+            while stack:
+                node, parent_index = stack.pop()
+                nodes.append([parent_index, node.line,
+                              None if node.snapshot is None else node.snapshot.decode('utf-8')])
+                index = len(nodes) - 1
+                stack.extend((child, index) for child in node.children.values())
+            tries.append({'key': list(key), 'nodes': nodes})
+
+        with open(filename, 'w') as f:
+            json.dump({'version': SIMULATION_CACHE_VERSION, 'tries': tries}, f)
+
+    @staticmethod
+    def load(filename: str, budget: int = DEFAULT_BUDGET) -> SimulationCache:
+        """Return the cache saved in the file with the given filename, with the given memory budget.
+
+        Raise a ValueError if the file is not a simulation cache of this version.
+        """
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('version') != SIMULATION_CACHE_VERSION:
+            raise ValueError(f"{filename} is not a simulation cache of the current version.")
+
+        cache = SimulationCache(budget)
+        for trie in data['tries']:
+            nodes = []
+            for parent_index, line, snapshot in trie['nodes']:
+                if parent_index < 0:
+                    node = cache._roots[tuple(trie['key'])] = _Node()
+                else:
+                    parent = nodes[parent_index]
+                    node = parent.children[line] = _Node(parent, line)
+                    cache.size += NODE_SIZE + len(line)
+                if snapshot is not None:
+                    node.snapshot = snapshot.encode('utf-8')
+                    cache.size += len(node.snapshot)
+                    cache.snapshots += 1
+                    cache._recent[node] = None
+                nodes.append(node)
+            cache._recent.update((node, None) for node in nodes if not node.children and node.parent is not None)
+
+        cache._evict()
+        return cache
+
+
+class RecordingInput(ScriptedInput):
+    """A ScriptedInput that takes a snapshot of its game each time the game asks for the player's next action.
+
+    Instance Attributes:
+        - game: the game reading from this input, or None if it has not been given yet.
+        - offset: the number of lines of the whole script that were read before this input's first line.
+        - after, before: snapshots are only taken after more than after lines of the whole script have been read,
+                         and no more than before.
+        - snapshots: the (number of lines of the whole script read, snapshot) of each snapshot taken, in order.
+    """
+    game: Optional[AdventureGame]
+    offset: int
+    after: int
+    before: int
+    snapshots: list[tuple[int, bytes]]
+
+    def __init__(self, lines: Sequence[str], offset: int = 0, after: int = 0, before: int = 0) -> None:
+        """Initialize a new recording input that reads the given lines, which follow offset lines of the whole
+        script, and only takes snapshots after more than after lines of the whole script, and no more than before.
+        """
+        super().__init__(lines)
+        self.game = None
+        self.offset = offset
+        self.after = after
+        self.before = before
+        self.snapshots = []
+
+    def __call__(self, message: str = "") -> str:
+        """Take a snapshot of the game if it is asking for the player's next action, then return the next line of
+        the script, or raise ScriptExhausted if there are none left."""
+        position = self.offset + self.consumed
+        if self.game is not None and self.game.awaiting_action and self.after < position <= self.before:
+            self.snapshots.append((position, self.game.snapshot()))
+        return super().__call__(message)
+
+
+def world_hash(filename: str) -> str:
+    """Return a hash of the contents of the world file with the given filename.
+
+    Hashes are also kept in memory, one per file, so a file is only read again once it has changed.
+    """
+    modified_time = os.stat(filename).st_mtime_ns
+    cached = _world_hashes.get(filename)
+    if cached is None or cached[0] != modified_time:
+        cached = _world_hashes[filename] = (modified_time, _hash_file(filename))
+    return cached[1]
+
+
+def _hash_file(filename: str) -> str:
+    """Return a hash of the contents of the given world file, read from the file."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 120,
+        'disable': ['R1705', 'E9998', 'E9999']
+    })
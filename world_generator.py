@@ -0,0 +1,230 @@
+"""CSC111 Project 1: Text Adventure Game - World Generator
+
+This module generates worlds of any size in the same schema as game_data.json, for measuring how the game and
+its tools behave at scale. Every world generated is valid and can be won (see world_validator):
+    - the locations form a ring, each leading to the next and the previous one, so every location can be
+      reached from every other; the rest of each location's exits lead to random locations
+    - the first WINNING_ITEM_COUNT items belong at the starting location, and the rest at random locations
+    - items are picked up with "pickup <name>", except at the puzzle locations that are switched on
+
+Generated worlds declare no puzzles of their own, so they have the original game's puzzles at the same location
+ids (see puzzle_registry.DEFAULT_PUZZLES), and puzzle_density is the chance that each of those locations is
+switched on in a generated world: a switched-on puzzle location has its puzzle's command and holds one of the
+items, and Robarts' second-floor gate (see game_entities.GATE_COMMAND) replaces the ring's way forward from its
+location. No item is ever placed at a puzzle location that isn't switched on, since it could never be picked up
+there.
+
+A world is generated one location at a time from its seed, and written out as it is generated, so a world with
+millions of locations never has to be held in memory. Only the items and where they are placed are.
+
+Usage:
+    python world_generator.py world.json --locations 100000 --items 40 --seed 1
+    python world_generator.py world.world --locations 10000000 --format compiled
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterator, Optional, TextIO
+
+from adventure import WINNING_ITEM_COUNT
+from compiled_world import CompiledWorldWriter
+from game_entities import GATE_COMMAND, GATE_DESTINATION, GATE_LOCATION
+from puzzle_registry import DEFAULT_PUZZLES
+from route_solver import PUZZLES
+
+# The command and cost of the puzzle at each location of the original game with a puzzle that rewards an item
+REWARDS = {loc_id: PUZZLES[spec.type] for loc_id, spec in DEFAULT_PUZZLES.items() if spec.type in PUZZLES}
+
+# The words that generated names and descriptions are made from
+ADJECTIVES = ["quiet", "crowded", "dusty", "sunlit", "narrow", "echoing", "cluttered", "drafty", "cozy", "grand"]
+PLACES = ["hallway", "study room", "lecture hall", "courtyard", "stairwell", "lab", "lounge", "library", "office",
+          "atrium"]
+THINGS = ["notebook", "calculator", "umbrella", "keycard", "textbook", "headphones", "water bottle", "stapler",
+          "scarf", "flash drive"]
+
+STARTING_LOCATION = 1
+
+
+@dataclass
+class WorldSpec:
+    """The settings of a generated world.
+
+    Instance Attributes:
+        - locations: the number of locations, with ids from 1 up.
+        - branching: the number of exits from each location, including the two along the ring.
+        - items: the number of items, with ids from 1 up.
+        - puzzle_density: the chance that each puzzle location is switched on.
+        - seed: the seed of the random numbers the world is generated from.
+
+    Representation Invariants:
+        - self.locations >= 2
+        - self.branching >= 2
+        - self.items >= WINNING_ITEM_COUNT
+        - 0 <= self.puzzle_density <= 1
+    """
+    locations: int
+    branching: int = 3
+    items: int = WINNING_ITEM_COUNT
+    puzzle_density: float = 0.0
+    seed: int = 0
+
+
+class WorldGenerator:
+    """A generator of the game data of one world.
+
+    Instance Attributes:
+        - spec: the settings of the world.
+        - puzzles: the ids of the puzzle locations that are switched on.
+    """
+    # Private Instance Attributes:
+    #   - _placements: the ids of the items held by each location that holds any, by location id.
+    spec: WorldSpec
+    puzzles: set[int]
+    _placements: dict[int, list[int]]
+
+    def __init__(self, spec: WorldSpec) -> None:
+        """Initialize a generator of the world with the given settings, and choose where its items are.
+
+        Raise a ValueError if the settings can't make a valid world that can be won.
+        """
+        if spec.locations < 2 or spec.branching < 2:
+            raise ValueError("A world needs at least 2 locations, each with at least 2 exits.")
+        if spec.items < WINNING_ITEM_COUNT:
+            raise ValueError(f"A world that can be won needs at least {WINNING_ITEM_COUNT} items.")
+
+        self.spec = spec
+        rng = random.Random(f"{spec.seed}/items")
+        self.puzzles = {loc_id for loc_id in sorted(REWARDS.keys() | {GATE_LOCATION})
+                        if loc_id <= spec.locations and loc_id != STARTING_LOCATION
+                        and rng.random() < spec.puzzle_density}
+
+        # Each switched-on puzzle (other than the gate) rewards one item; the rest are placed where they can be
+        # picked up, which is anywhere but the start and the special locations
+        rewards = sorted(self.puzzles & REWARDS.keys())[:spec.items]
+        self._placements = {loc_id: [item_id] for item_id, loc_id in enumerate(rewards, 1)}
+        for item_id in range(len(rewards) + 1, spec.items + 1):
+            loc_id = rng.randrange(2, spec.locations + 1)
+            while loc_id in DEFAULT_PUZZLES:
+                loc_id = rng.randrange(2, spec.locations + 1)
+            self._placements.setdefault(loc_id, []).append(item_id)
+
+    def locations(self) -> Iterator[dict[str, Any]]:
+        """Yield the game data of each location, in increasing order of id."""
+        count = self.spec.locations
+        rng = random.Random(f"{self.spec.seed}/locations")
+        for loc_id in range(1, count + 1):
+            place = f"{rng.choice(ADJECTIVES)} {rng.choice(PLACES)}"
+            exits = [loc_id % count + 1, (loc_id - 2) % count + 1]
+            exits.extend(rng.randrange(1, count + 1) for _ in range(self.spec.branching - 2))
+
+            commands = {}
+            for destination in exits:
+                if destination != loc_id:
+                    commands[f"go to room {destination}"] = destination
+            if loc_id == GATE_LOCATION and loc_id in self.puzzles:
+                commands.pop(f"go to room {GATE_DESTINATION}", None)
+                commands[GATE_COMMAND] = None
+
+            item_ids = self._placements.get(loc_id, [])
+            if loc_id in self.puzzles and loc_id in REWARDS:
+                commands[REWARDS[loc_id][0]] = None
+            else:
+                for item_id in item_ids:
+                    commands[f"pickup {self.item_name(item_id)}"] = None
+
+            yield {
+                "id_num": loc_id,
+                "name": f"Room {loc_id}",
+                "brief_description": f"You are back in the {place}.",
+                "long_description": f"You are in a {place}, room {loc_id} of {count}.",
+                "available_commands": commands,
+                "items": item_ids,
+                "visited": False,
+                "sub_locations": None
+            }
+
+    def items(self) -> Iterator[dict[str, Any]]:
+        """Yield the game data of each item, in increasing order of id."""
+        rng = random.Random(f"{self.spec.seed}/targets")
+        starts = {item_id: loc_id for loc_id, item_ids in self._placements.items() for item_id in item_ids}
+        for item_id in range(1, self.spec.items + 1):
+            if item_id <= WINNING_ITEM_COUNT:
+                target = STARTING_LOCATION
+            else:
+                target = rng.randrange(1, self.spec.locations + 1)
+            yield {
+                "name": self.item_name(item_id),
+                "id_num": item_id,
+                "description": f"A {THINGS[item_id % len(THINGS)]} that someone left behind.",
+                "start_position": starts[item_id],
+                "target_position": target
+            }
+
+    @staticmethod
+    def item_name(item_id: int) -> str:
+        """Return the name of the item with the given id.
+
+        >>> WorldGenerator.item_name(12)
+        'umbrella 12'
+        """
+        return f"{THINGS[item_id % len(THINGS)]} {item_id}"
+
+    def write_json(self, f: TextIO) -> None:
+        """Write this world to the given text file as game data JSON, one location or item per line."""
+        f.write('{"locations": [\n')
+        for i, loc_data in enumerate(self.locations()):
+            f.write((",\n" if i else "") + json.dumps(loc_data))
+        f.write('\n],\n"items": [\n')
+        for i, item_data in enumerate(self.items()):
+            f.write((",\n" if i else "") + json.dumps(item_data))
+        f.write('\n]}\n')
+
+    def write_compiled(self, f: BinaryIO) -> None:
+        """Write this world to the given binary file as a compiled world (see compiled_world)."""
+        writer = CompiledWorldWriter(f)
+        for loc_data in self.locations():
+            writer.add_location(loc_data)
+        for item_data in self.items():
+            writer.add_item(item_data)
+        writer.close()
+
+
+def generate_world(filename: str, spec: WorldSpec, output_format: str = "json") -> None:
+    """Generate the world with the given settings into the file with the given name, either as game data JSON or
+    as a compiled world.
+
+    Raise a ValueError if output_format is not "json" or "compiled".
+    """
+    generator = WorldGenerator(spec)
+    if output_format == "json":
+        with open(filename, 'w') as f:
+            generator.write_json(f)
+    elif output_format == "compiled":
+        with open(filename, 'wb') as f:
+            generator.write_compiled(f)
+    else:
+        raise ValueError(f"Unknown output format {output_format!r}; expected 'json' or 'compiled'.")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Generate a world from the command line."""
+    parser = argparse.ArgumentParser(description="Generate a valid, winnable world of any size.")
+    parser.add_argument("output", help="the file to write the world to")
+    parser.add_argument("--locations", type=int, default=1000, help="the number of locations")
+    parser.add_argument("--branching", type=int, default=3, help="the number of exits from each location")
+    parser.add_argument("--items", type=int, default=WINNING_ITEM_COUNT, help="the number of items")
+    parser.add_argument("--puzzle-density", type=float, default=0.0,
+                        help="the chance that each puzzle location is switched on")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the world")
+    parser.add_argument("--format", choices=["json", "compiled"], default="json", help="the format to write")
+    args = parser.parse_args(argv)
+
+    generate_world(args.output, WorldSpec(args.locations, args.branching, args.items, args.puzzle_density,
+                                          args.seed), args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""CSC111 Project 1: Text Adventure Game - World Validator
+
+This module checks game data for mistakes that would otherwise only be found by playing: commands that lead to
+locations that don't exist, items placed at or meant for unknown locations, puzzles at unknown locations or of
+unknown types, locations the player can never reach or never leave, and worlds that can't be won at all.
+
+Every check takes time linear in the size of the world, and looks over the whole world at once with set
+operations wherever it can, so a world of a million locations is checked in well under a minute. Compiled
+worlds are checked straight from their records, without building their locations. Each mistake found is a
+Problem, and is either an ERROR, which will break a game, or a WARNING, which games survive but is probably not
+what the world's author meant.
+
+A game can be made to check its world before it starts (see AdventureGame), in which case it raises an
+InvalidWorldError if the world has any errors.
+
+Usage:
+    python world_validator.py game_data.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from typing import Any, Collection, Iterable, Mapping, Optional
+
+import compiled_world
+from commands import normalize_command
+from game_entities import GATE_COMMAND, GATE_DESTINATION, GATE_LOCATION
+from game_world import WorldTemplate, load_world
+from puzzle_registry import DEFAULT_PUZZLES, is_known_type
+
+ERROR = "error"
+WARNING = "warning"
+
+
+@dataclass(frozen=True)
+class Problem:
+    """A mistake found in a world.
+
+    Instance Attributes:
+        - severity: ERROR if the mistake will break a game, or WARNING if games survive it.
+        - location: the id of the location where the mistake is, or None if it isn't at one location.
+        - message: a description of the mistake.
+
+    Representation Invariants:
+        - self.severity in {ERROR, WARNING}
+    """
+    severity: str
+    location: Optional[int]
+    message: str
+
+    def __str__(self) -> str:
+        """Return a description of this problem, for the world's author."""
+        return f"{self.severity}: {self.message}"
+
+
+class InvalidWorldError(ValueError):
+    """Raised when a game is started from a world with errors.
+
+    Instance Attributes:
+        - problems: every problem found in the world, errors and warnings alike.
+    """
+    problems: list[Problem]
+
+    def __init__(self, filename: str, problems: list[Problem]) -> None:
+        """Initialize a new error for the world in the given file, which has the given problems."""
+        errors = [problem for problem in problems if problem.severity == ERROR]
+        super().__init__(f"{filename} has {len(errors)} error(s), the first being: {errors[0].message}")
+        self.problems = problems
+
+
+def validate_data(data: dict[str, Any], start: int, winning_count: int = 1,
+                  menu: Collection[str] = ()) -> list[Problem]:
+    """Return every problem found in the given parsed game data, for games that begin at the given location and
+    are won by bringing winning_count items there. menu holds the commands that are available everywhere, which
+    a location's own commands can't be chosen over.
+
+    >>> data = {'locations': [
+    ...     {'id_num': 1, 'available_commands': {'go north': 2, 'Go  North': 3, 'look': None}, 'items': [7]},
+    ...     {'id_num': 2, 'available_commands': {'go south': 1}, 'items': [5]}],
+    ...     'items': [{'id_num': 5, 'start_position': 2, 'target_position': 1}]}
+    >>> for problem in validate_data(data, 1, menu=['look']):
+    ...     print(problem)
+    error: the command 'Go  North' at location 1 leads to location 3, which does not exist
+    warning: the commands 'go north' and 'Go  North' at location 1 are the same command
+    warning: the command 'look' at location 1 can never be chosen, since it is also a menu command
+    warning: location 1 holds item 7, which does not exist
+    """
+    locations = ((loc_data['id_num'], loc_data['available_commands'], loc_data.get('items'),
+                  loc_data.get('sub_locations')) for loc_data in data['locations'])
+    items = ((item_data['id_num'], item_data['start_position'], item_data.get('target_position'))
+             for item_data in data['items'])
+    return _validate(locations, items, data.get('puzzles'), start, winning_count, menu)
+
+
+def validate_world(world: WorldTemplate, start: int, winning_count: int = 1,
+                   menu: Collection[str] = ()) -> list[Problem]:
+    """Return every problem found in the given world, as validate_data does for game data.
+
+    The locations of a compiled world are read straight from its file (see CompiledLocations.outlines), without
+    making their templates. The world's puzzles are only checked if it declares its own, since the original game's
+    puzzles (DEFAULT_PUZZLES) are at locations that smaller worlds may not have.
+    """
+    if isinstance(world.locations, compiled_world.CompiledLocations):
+        locations = world.locations.outlines()
+    else:
+        locations = ((loc_id, template.available_commands, template.item_ids, template.sub_locations)
+                     for loc_id, template in world.locations.items())
+    items = ((item.id_num, item.start_position, item.target_position) for item in world.items.values())
+    puzzles = None if world.puzzles is DEFAULT_PUZZLES else [spec.to_data() for spec in world.puzzles.values()]
+    return _validate(locations, items, puzzles, start, winning_count, menu)
+
+
+def _validate(locations: Iterable[tuple[int, Mapping[str, Optional[int]], Optional[Collection[int]],
+                                        Optional[Collection[int]]]],
+              items: Iterable[tuple[int, int, Optional[int]]], puzzles: Optional[list[dict[str, Any]]], start: int,
+              winning_count: int, menu: Collection[str]) -> list[Problem]:
+    """Return every problem found in a world with the given locations, as (id, commands, item ids, sublocation
+    ids), items, as (id, start position, target position), and "puzzles" list, as validate_data describes."""
+    # Most checks first look over the whole world at once, with set operations, and only go location by location
+    # to describe the problems if there are any
+    problems = []
+    commands = {}
+    held_items = []
+    sub_locations = []
+    for loc_id, available_commands, item_ids, sub_ids in locations:
+        if loc_id in commands:
+            problems.append(Problem(ERROR, loc_id, f"there is more than one location {loc_id}"))
+        commands[loc_id] = available_commands
+        if item_ids:
+            held_items.append((loc_id, item_ids))
+        if sub_ids:
+            sub_locations.append((loc_id, sub_ids))
+
+    positions = {}
+    for item_id, start_position, target_position in items:
+        if item_id in positions:
+            problems.append(Problem(ERROR, None, f"there is more than one item {item_id}"))
+        positions[item_id] = (start_position, target_position)
+    for item_id, (start_position, target) in positions.items():
+        if start_position not in commands:
+            problems.append(Problem(ERROR, None, f"item {item_id} starts at location {start_position}, which does "
+                                                 f"not exist"))
+        if target is not None and target not in commands:
+            problems.append(Problem(ERROR, None, f"item {item_id} belongs at location {target}, which does not exist"))
+
+    destinations = {destination for available_commands in commands.values()
+                    for destination in available_commands.values()}
+    missing = destinations - commands.keys()
+    missing.discard(None)
+    menu = {normalize_command(command) for command in menu}
+    clashes_with_menu = any(command in menu for available_commands in commands.values()
+                            for command in available_commands)
+    if missing or not _all_normalized(commands) or clashes_with_menu:
+        for loc_id, available_commands in commands.items():
+            problems.extend(_check_commands(loc_id, available_commands, missing, menu))
+
+    held_by = {}
+    for loc_id, item_ids in held_items:
+        for item_id in item_ids:
+            if item_id not in positions:
+                problems.append(Problem(WARNING, loc_id, f"location {loc_id} holds item {item_id}, which does not "
+                                                         f"exist"))
+            else:
+                held_by[item_id] = loc_id
+
+    for loc_id, sub_ids in sub_locations:
+        for sub_id in sub_ids:
+            if sub_id not in commands:
+                problems.append(Problem(WARNING, loc_id, f"location {loc_id} has sublocation {sub_id}, which does "
+                                                         f"not exist"))
+
+    if GATE_COMMAND in commands.get(GATE_LOCATION, {}) and GATE_DESTINATION not in commands:
+        problems.append(Problem(ERROR, GATE_LOCATION, f"the command {GATE_COMMAND!r} at location {GATE_LOCATION} "
+                                                      f"opens the way to location {GATE_DESTINATION}, which does not "
+                                                      f"exist"))
+
+    if puzzles is not None:
+        problems.extend(_check_puzzles(puzzles, commands))
+
+    if start not in commands:
+        problems.append(Problem(ERROR, None, f"the game begins at location {start}, which does not exist"))
+        return problems
+
+    problems.extend(_check_graph(start, commands, missing, positions, held_by, winning_count))
+    return problems
+
+
+def _check_puzzles(puzzles: list[dict[str, Any]], commands: Collection[int]) -> list[Problem]:
+    """Return a problem for every puzzle in the given "puzzles" list that is at a location not in commands, of an
+    unknown type, or at the same location as another puzzle (see puzzle_registry).
+
+    Only registered puzzle types are known (see puzzle_registry.register_puzzle_type).
+
+    >>> for problem in _check_puzzles([{'location': 1, 'type': 'mug'}, {'location': 1, 'type': 'riddle'},
+    ...                                {'location': 9, 'type': 'cipher'}], {1, 2}):
+    ...     print(problem)
+    error: there is more than one puzzle at location 1
+    error: the puzzle at location 1 has the unknown type 'riddle'
+    error: the puzzle at location 9 is at a location that does not exist
+    """
+    problems = []
+    seen = set()
+    for puzzle_data in puzzles:
+        loc_id = puzzle_data['location']
+        if loc_id in seen:
+            problems.append(Problem(ERROR, loc_id, f"there is more than one puzzle at location {loc_id}"))
+        seen.add(loc_id)
+        if loc_id not in commands:
+            problems.append(Problem(ERROR, None, f"the puzzle at location {loc_id} is at a location that does not "
+                                                 f"exist"))
+        if not is_known_type(puzzle_data['type']):
+            problems.append(Problem(ERROR, loc_id, f"the puzzle at location {loc_id} has the unknown type "
+                                                   f"{puzzle_data['type']!r}"))
+    return problems
+
+
+def _all_normalized(commands: dict[int, dict[str, Optional[int]]]) -> bool:
+    """Return whether every command in commands is already in its normalized form (see
+    commands.normalize_command), in which case no two commands at a location can be the same command."""
+    text = "\n" + "\n".join(command for available_commands in commands.values()
+                            for command in available_commands) + "\n"
+    return text == text.lower() and "  " not in text and " \n" not in text and "\n " not in text \
+        and "\t" not in text
+
+
+def _check_commands(loc_id: int, available_commands: dict[str, Optional[int]], missing: Collection[int],
+                    menu: Collection[str]) -> list[Problem]:
+    """Return the problems with the given commands of the location with the given id, in a world where the given
+    location ids are missing and with the given menu commands."""
+    problems = []
+    for command, destination in available_commands.items():
+        if destination in missing:
+            problems.append(Problem(ERROR, loc_id, f"the command {command!r} at location {loc_id} leads to location "
+                                                   f"{destination}, which does not exist"))
+
+    normalized = {}
+    for command in available_commands:
+        key = normalize_command(command)
+        if key in normalized:
+            problems.append(Problem(WARNING, loc_id, f"the commands {normalized[key]!r} and {command!r} at location "
+                                                     f"{loc_id} are the same command"))
+        else:
+            normalized[key] = command
+        if key in menu:
+            problems.append(Problem(WARNING, loc_id, f"the command {command!r} at location {loc_id} can never be "
+                                                     f"chosen, since it is also a menu command"))
+    return problems
+
+
+def _check_graph(start: int, commands: dict[int, dict[str, Optional[int]]], missing: set[int],
+                 positions: dict[int, tuple[int, Optional[int]]], held_by: dict[int, int],
+                 winning_count: int) -> list[Problem]:
+    """Return the problems with how the locations with the given commands connect, for games that begin at start,
+    where the given location ids are missing, the items have the given (start position, target position) and are
+    held by the given locations.
+
+    The way through the gate (see game_entities.GATE_COMMAND) is counted as open, since the player can open it.
+    """
+    reachable = _reach(start, commands, missing)
+
+    problems = []
+    for loc_id, available_commands in commands.items():
+        if loc_id not in reachable:
+            problems.append(Problem(WARNING, loc_id, f"location {loc_id} can't be reached from the start"))
+        elif loc_id != GATE_LOCATION and all(destination is None for destination in available_commands.values()):
+            problems.append(Problem(WARNING, loc_id, f"location {loc_id} is a dead end: none of its commands lead "
+                                                     f"anywhere"))
+
+    # The locations that an item can be brought back to the start from are found with one search backwards from
+    # the start, however many items there are
+    returnable = _reach_back(start, _predecessors(commands))
+    winnable = 0
+    for item_id, (_, target) in positions.items():
+        holder = held_by.get(item_id)
+        if holder is None:
+            problems.append(Problem(WARNING, None, f"item {item_id} is not held by any location"))
+        elif holder not in reachable:
+            problems.append(Problem(WARNING, holder, f"item {item_id} is at location {holder}, which can't be reached"))
+        elif target == start and holder in returnable:
+            winnable += 1
+
+    if winnable < winning_count:
+        problems.append(Problem(ERROR, start, f"only {winnable} item(s) can be brought back to the start, and "
+                                              f"{winning_count} are needed to win"))
+    return problems
+
+
+def _reach(origin: int, commands: dict[int, dict[str, Optional[int]]], missing: set[int]) -> set[int]:
+    """Return the ids of the locations that can be reached from origin by the given commands, by breadth-first
+    search.
+
+    Each step of the search expands the whole frontier at once, with set operations.
+    """
+    seen = {origin}
+    frontier = {origin}
+    while frontier:
+        reached = {destination for loc_id in frontier for destination in commands[loc_id].values()}
+        if GATE_LOCATION in frontier and GATE_COMMAND in commands[GATE_LOCATION] and GATE_DESTINATION in commands:
+            reached.add(GATE_DESTINATION)
+        reached.discard(None)
+        frontier = reached - seen - missing
+        seen |= frontier
+    return seen
+
+
+def _predecessors(commands: dict[int, dict[str, Optional[int]]]) -> dict[int, list[int]]:
+    """Return the ids of the locations whose commands lead to each location, by location id.
+
+    The way through the gate (see game_entities.GATE_COMMAND) is counted as open, since the player can open it.
+    """
+    predecessors = {loc_id: [] for loc_id in commands}
+    for loc_id, available_commands in commands.items():
+        for destination in available_commands.values():
+            if destination in predecessors:
+                predecessors[destination].append(loc_id)
+    if GATE_COMMAND in commands.get(GATE_LOCATION, {}) and GATE_DESTINATION in commands:
+        predecessors[GATE_DESTINATION].append(GATE_LOCATION)
+    return predecessors
+
+
+def _reach_back(goal: int, predecessors: dict[int, list[int]]) -> set[int]:
+    """Return the ids of the locations that goal can be reached from, given the predecessors of every location
+    (see _predecessors), by breadth-first search backwards from goal."""
+    seen = {goal}
+    frontier = {goal}
+    while frontier:
+        frontier = {loc_id for destination in frontier for loc_id in predecessors[destination]} - seen
+        seen |= frontier
+    return seen
+
+
+def validate_file(filename: str, start: int, winning_count: int = 1, menu: Collection[str] = ()) -> list[Problem]:
+    """Return every problem found in the game data file with the given filename, which is either a JSON file or a
+    compiled world (see validate_data and validate_world)."""
+    if compiled_world.is_compiled(filename):
+        return validate_world(load_world(filename), start, winning_count, menu)
+
+    with open(filename, 'r') as f:
+        return validate_data(json.load(f), start, winning_count, menu)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Check a game data file from the command line and list its problems."""
+    # Imported here, since adventure builds on this module
+    from adventure import MENU, WINNING_ITEM_COUNT
+
+    parser = argparse.ArgumentParser(description="Check a game data file for mistakes.")
+    parser.add_argument("game_data", help="the game data file to check")
+    parser.add_argument("--start", type=int, default=1, help="the initial location id")
+    parser.add_argument("--limit", type=int, default=50, help="the most problems to list")
+    args = parser.parse_args(argv)
+
+    problems = validate_file(args.game_data, args.start, WINNING_ITEM_COUNT, MENU)
+    for problem in problems[:args.limit]:
+        print(problem)
+    if len(problems) > args.limit:
+        print(f"... and {len(problems) - args.limit} more")
+
+    errors = sum(1 for problem in problems if problem.severity == ERROR)
+    print(f"{errors} error(s), {len(problems) - errors} warning(s)")
+    if errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()